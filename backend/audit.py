@@ -0,0 +1,305 @@
+"""
+HeartCare AI - Audit Log
+Every scored prediction (inputs, raw and adjusted risk, model version, latency)
+queued in memory and written in batches to an append-only SQLite file
+
+The API only appends to an in-memory queue; a background task writes what has
+accumulated every HEARTCARE_AUDIT_FLUSH_INTERVAL_S (or as soon as a batch is
+full) in one transaction, off the event loop. The database runs in WAL mode, so
+the query tool below can read while the API writes, and triggers refuse UPDATE
+and DELETE on the table.
+
+Usage:
+    python audit.py query --since 2026-10-01 --until 2026-10-02T12:00
+    python audit.py query --since 2026-10-17T09:00 --format json --limit 100
+    python audit.py stats
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sqlite3
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from encoder import ANSWERS, CAT_FIELDS, INPUT_FIELDS, NUM_FIELDS
+from metrics import AUDIT_FLUSH_SECONDS, AUDIT_ROWS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    route TEXT NOT NULL,
+    model_version TEXT,
+    model_sha256 TEXT,
+    {", ".join(f"{field} REAL" for field in NUM_FIELDS)},
+    {", ".join(f"{field} TEXT" for field in CAT_FIELDS)},
+    raw_risk REAL NOT NULL,
+    adjusted_risk INTEGER NOT NULL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS predictions_ts ON predictions (ts);
+CREATE TRIGGER IF NOT EXISTS predictions_no_update BEFORE UPDATE ON predictions
+BEGIN SELECT RAISE(ABORT, 'the audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS predictions_no_delete BEFORE DELETE ON predictions
+BEGIN SELECT RAISE(ABORT, 'the audit log is append-only'); END;
+"""
+
+COLUMNS = ["ts", "route", "model_version", "model_sha256", *INPUT_FIELDS, "raw_risk", "adjusted_risk", "latency_ms"]
+INSERT = f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def connect(path, readonly: bool = False) -> sqlite3.Connection:
+    """Connection to an audit database; the writer creates the schema and switches it to WAL"""
+    if readonly:
+        return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode a commit survives a process crash without an fsync per batch
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def audit_rows(entry: tuple) -> list:
+    """One queued entry (one scoring call) -> INSERT parameter tuples, answer codes decoded"""
+    ts, route, version, sha256, vectors, raw_risk, adjusted_risk, latency_ms = entry
+    n_num = len(NUM_FIELDS)
+    answers = [
+        np.array(ANSWERS[field], dtype=object)[vectors[:, j].astype(np.intp)].tolist()
+        for j, field in enumerate(CAT_FIELDS, n_num)
+    ]
+    return [
+        (ts, route, version, sha256, *num, *cat, raw, adjusted, latency_ms)
+        for num, cat, raw, adjusted in zip(
+            vectors[:, :n_num].tolist(), zip(*answers), np.asarray(raw_risk).tolist(), adjusted_risk
+        )
+    ]
+
+
+class AuditLog:
+    """
+    Bounded in-memory queue in front of the SQLite writer.
+
+    record() appends one entry per scoring call (not per row) and returns at
+    once. A writer task wakes up when batch_size rows are queued or every
+    flush_interval_s, and inserts everything queued in one transaction on a
+    worker thread. At most max_queue rows wait; beyond that, overflow="drop"
+    discards the new rows (counted in /metrics and on /health) and
+    overflow="block" makes the request wait until the writer has caught up.
+    stop() writes whatever is still queued, including entries recorded while
+    the last flush was running, before closing the database; later record()
+    calls are dropped until start() is called again.
+    """
+
+    def __init__(self, path, max_queue: int = 10000, batch_size: int = 500, flush_interval_s: float = 1.0,
+                 overflow: str = "drop"):
+        self.path = Path(path)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.overflow = overflow
+        self._queue = deque()
+        self._connection = None
+        self._writer = None
+        self._wakeup = None
+        self._drained = None
+        self._closing = False
+
+        # Metrics
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        """Start the writer task (must be called from the running event loop)"""
+        if self._writer is None:
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._drained = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_loop())
+            logger.info(f"🧾 Audit log at {self.path} (batches of {self.batch_size}, overflow: {self.overflow})")
+
+    async def stop(self):
+        """Let the writer flush the queue one last time, then close the database"""
+        if self._writer is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._writer
+            self._writer = None
+        if self._connection is not None:
+            await asyncio.to_thread(self._connection.close)
+            self._connection = None
+
+    async def record(self, route: str, version: str, sha256: str, vectors: np.ndarray, raw_risk, adjusted_risk,
+                     latency_ms: float = None) -> bool:
+        """Queue the rows of one scoring call (patient_vectors() output, risks in percent); False if dropped"""
+        n = len(vectors)
+        # Once stopping, the writer may already have made its last flush, so nothing more is queued
+        if not self._closing:
+            self.start()
+        while not self._closing and self.queued + n > self.max_queue and self.queued and self.overflow == "block":
+            self._wakeup.set()
+            self._drained.clear()
+            await self._drained.wait()
+        if self._closing or (self.queued + n > self.max_queue and self.queued):
+            self.dropped += n
+            AUDIT_ROWS.inc(n, result="dropped")
+            return False
+        self._queue.append((time.time(), route, version, sha256, vectors, raw_risk, list(adjusted_risk), latency_ms))
+        self.queued += n
+        if self.queued >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def _write_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+            # record() may have queued more while the flush was writing
+            if self._closing and not self._queue:
+                return
+
+    async def _flush(self):
+        """Write every queued entry in one transaction"""
+        if not self._queue:
+            return
+        entries = list(self._queue)
+        self._queue.clear()
+        rows = sum(len(entry[4]) for entry in entries)
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._insert, entries)
+        except Exception as e:
+            self.failed += rows
+            AUDIT_ROWS.inc(rows, result="failed")
+            logger.error(f"❌ Audit log write of {rows} rows failed: {e}")
+        else:
+            self.written += rows
+            self.flushes += 1
+            AUDIT_ROWS.inc(rows, result="written")
+            AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - start)
+        finally:
+            self.queued -= rows
+            if self._drained is not None:
+                self._drained.set()
+
+    def _insert(self, entries: list):
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = connect(self.path)
+        with self._connection:
+            self._connection.executemany(INSERT, [row for entry in entries for row in audit_rows(entry)])
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "path": str(self.path),
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "overflow": self.overflow,
+        }
+
+
+def parse_time(value: str) -> float:
+    """ISO date or datetime (UTC unless it has an offset) -> unix seconds"""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def format_time(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds")
+
+
+def query(path, since: float = None, until: float = None, limit: int = None) -> list:
+    """Audit rows with since <= ts < until, oldest first, as dicts (ts as ISO time)"""
+    conditions, params = [], []
+    if since is not None:
+        conditions.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append("ts < ?")
+        params.append(until)
+    sql = f"SELECT id, {', '.join(COLUMNS)} FROM predictions"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY ts, id"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    connection = connect(path, readonly=True)
+    try:
+        rows = connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+    columns = ["id", *COLUMNS]
+    return [{**dict(zip(columns, row)), "ts": format_time(row[1])} for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=str(Path(__file__).parent / "audit.db"), help="Audit database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    select = commands.add_parser("query", help="Predictions in a time range (UTC unless an offset is given)")
+    select.add_argument("--since", help="ISO date/time, inclusive")
+    select.add_argument("--until", help="ISO date/time, exclusive")
+    select.add_argument("--limit", type=int)
+    select.add_argument("--format", choices=["csv", "json"], default="csv", help="csv, or one JSON object per line")
+    commands.add_parser("stats", help="Row count, time span and rows per model version")
+    args = parser.parse_args()
+
+    if not Path(args.path).exists():
+        raise SystemExit(f"❌ No audit database at {args.path}")
+    try:
+        if args.command == "query":
+            rows = query(
+                args.path,
+                parse_time(args.since) if args.since else None,
+                parse_time(args.until) if args.until else None,
+                args.limit
+            )
+            if args.format == "json":
+                for row in rows:
+                    print(json.dumps(row))
+            else:
+                writer = csv.DictWriter(sys.stdout, fieldnames=["id", *COLUMNS])
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            connection = connect(args.path, readonly=True)
+            try:
+                count, first, last = connection.execute("SELECT COUNT(*), MIN(ts), MAX(ts) FROM predictions").fetchone()
+                versions = connection.execute(
+                    "SELECT model_version, COUNT(*) FROM predictions GROUP BY model_version ORDER BY MIN(ts)"
+                ).fetchall()
+            finally:
+                connection.close()
+            print(f"{count} predictions" + (f" from {format_time(first)} to {format_time(last)}" if count else ""))
+            for version, rows in versions:
+                print(f"  {version}: {rows}")
+    except (ValueError, sqlite3.Error) as e:
+        raise SystemExit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+HeartCare AI - Micro-Batching
+Coalesces concurrent single-patient requests into one model call
+"""
+
+import asyncio
+import logging
+import time
+
+from executor import ExecutorSaturated
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class MicroBatcher:
+    """
+    Dynamic batcher in front of the model.
+
+    Callers submit one item and await its result. A collector task waits for
+    the first item, then keeps collecting until max_batch_size items are queued
+    or max_wait_ms has passed, scores the whole batch with one call to
+    score_batch(items) and hands row i of the result back to caller i.
+    Up to max_concurrent batches are scored at once; while all slots are busy
+    new requests keep queueing, so batches grow with load. At most max_queue
+    rows may wait to be scored; beyond that submit() raises ExecutorSaturated,
+    and a caller whose row is not scored within timeout_s gets
+    asyncio.TimeoutError, like a direct InferenceExecutor.run() call.
+    """
+
+    def __init__(self, score_batch, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 max_concurrent: int = 2, max_queue: int = 32, timeout_s: float = 30.0):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+        self._queue = None
+        self._slots = None
+        self._collector = None
+        self._in_flight = set()
+
+        # Metrics
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.batches = 0
+        self.rows = 0
+        self.max_seen = 0
+        self.flushed_full = 0
+        self.flushed_timeout = 0
+        self.bucket_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def start(self):
+        """Start the collector task (must be called from the running event loop)"""
+        if self._collector is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._collector = asyncio.create_task(self._collect())
+            logger.info(f"📦 Micro-batching on (max {self.max_batch_size} rows, {self.max_wait_ms} ms)")
+
+    async def stop(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            self._collector = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def submit(self, item):
+        """Queue one item and wait for its row of the batch result; raises ExecutorSaturated when full"""
+        self.start()
+        # queued is only touched from the event loop thread, so no lock is needed
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self.queued} rows waiting for a batch")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        self.queued += 1
+        try:
+            # On timeout the future is cancelled, so the row is dropped if it has not been dispatched yet
+            return await asyncio.wait_for(future, self.timeout_s)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Top up with anything that queued while we waited, without waiting longer
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            await self._slots.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch):
+        self.queued -= len(batch)
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            self._slots.release()
+            return
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        self._record(len(batch))
+        try:
+            result = await self.score_batch(items)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for index, future in enumerate(futures):
+                if not future.done():
+                    future.set_result(result[index:index + 1])
+        finally:
+            self._slots.release()
+
+    def _record(self, size: int):
+        self.batches += 1
+        self.rows += size
+        self.max_seen = max(self.max_seen, size)
+        if size >= self.max_batch_size:
+            self.flushed_full += 1
+        else:
+            self.flushed_timeout += 1
+        for index, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self.bucket_counts[index] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+
+    def stats(self) -> dict:
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_seen,
+            "flushed_full": self.flushed_full,
+            "flushed_timeout": self.flushed_timeout,
+            "batch_size_histogram": dict(zip(labels, self.bucket_counts)),
+        }
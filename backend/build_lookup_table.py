@@ -0,0 +1,230 @@
+"""
+HeartCare AI - Lookup Table Builder
+Offline tool: precompute calibrated risk on a quantized grid for
+HEARTCARE_INFERENCE_ENGINE=table, and report its error against the live model
+
+Usage:
+    python build_lookup_table.py --points 5 --points-for Age=14
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from encoder import CAT_FEATURES, NUM_FEATURES, FastEncoder, RawFeatures
+from inference import predict
+from lookup_table import PROBABILITY_SCALE, TABLE_FORMAT_VERSION, RiskTable, metadata_path
+import model_loader
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# PatientData Field bounds; inputs outside them never reach the model
+INPUT_BOUNDS = {
+    'Age': (1, 120),
+    'BMI': (10.0, 60.0),
+    'Sleep_Hours': (0.0, 24.0),
+    'Blood_Pressure': (60, 200),
+}
+
+
+def model_folds(model):
+    """(FastEncoder, forest) per calibration fold of the notebook's model layout"""
+    folds = []
+    for fold in model.calibrated_classifiers_:
+        pipeline = fold.estimator
+        folds.append((FastEncoder.from_preprocessor(pipeline.named_steps['preprocessor']), pipeline[-1]))
+    return folds
+
+
+def split_ranges(model) -> dict:
+    """
+    Lowest and highest split threshold per numeric feature, in input units.
+
+    The forest is constant below the lowest and above the highest threshold, so
+    a grid from floor(lowest) to floor(highest) + 1 covers every distinct answer
+    and clamping inputs to it loses nothing.
+    """
+    lows = np.full(len(NUM_FEATURES), np.inf)
+    highs = np.full(len(NUM_FEATURES), -np.inf)
+    for encoder, forest in model_folds(model):
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            numeric = (tree.children_left != -1) & (tree.feature < len(NUM_FEATURES))
+            features = tree.feature[numeric]
+            raw = tree.threshold[numeric] * encoder.scale[features] + encoder.mean[features]
+            np.minimum.at(lows, features, raw)
+            np.maximum.at(highs, features, raw)
+    return {
+        feature: (float(np.floor(low)), float(np.floor(high) + 1))
+        for feature, low, high in zip(NUM_FEATURES, lows, highs)
+        if np.isfinite(low)
+    }
+
+
+def table_categories(model) -> list:
+    """Categories per CAT_FEATURES column, as seen by the first fold's one-hot encoder"""
+    encoder, _ = model_folds(model)[0]
+    return [[str(value) for value in categories] for categories in encoder.categories]
+
+
+def make_grids(ranges: dict, points: dict) -> list:
+    """Evenly spaced grid per numeric feature, clipped to the API's input bounds"""
+    grids = []
+    for feature in NUM_FEATURES:
+        low, high = ranges[feature]
+        if feature in INPUT_BOUNDS:
+            low = max(low, INPUT_BOUNDS[feature][0])
+            high = min(high, INPUT_BOUNDS[feature][1])
+        grids.append(np.linspace(low, high, points[feature]) if points[feature] > 1 else np.array([low]))
+    return grids
+
+
+def build_table(model, grids, categories, output: Path, chunk_rows: int = 200_000) -> np.ndarray:
+    """Score every grid point of every categorical combination into a .npy memmap"""
+    mesh = np.stack(np.meshgrid(*grids, indexing='ij'), axis=-1).reshape(-1, len(grids))
+    combinations = list(np.ndindex(*(len(c) for c in categories)))
+    shape = (len(combinations),) + tuple(len(g) for g in grids)
+    values = np.lib.format.open_memmap(output, mode='w+', dtype=np.uint16, shape=shape)
+
+    per_chunk = max(1, chunk_rows // len(mesh))
+    logger.info(
+        f"🧮 Scoring {len(combinations)} combinations x {len(mesh):,} grid points "
+        f"= {len(combinations) * len(mesh):,} rows"
+    )
+    start = time.perf_counter()
+    for first in range(0, len(combinations), per_chunk):
+        block = combinations[first:first + per_chunk]
+        features = RawFeatures.from_answers(
+            np.tile(mesh, (len(block), 1)),
+            [
+                [categories[j][combo[j]] for combo in block for _ in range(len(mesh))]
+                for j in range(len(categories))
+            ],
+        )
+        probability = predict(model, features).probability
+        values[first:first + len(block)] = np.rint(probability * PROBABILITY_SCALE).reshape(
+            (len(block),) + shape[1:]
+        )
+        done = first + len(block)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"   {done}/{len(combinations)} combinations, {elapsed:.0f}s elapsed, "
+            f"~{elapsed / done * (len(combinations) - done):.0f}s left"
+        )
+    values.flush()
+    return values
+
+
+def sample_inputs(grids, categories, n: int, seed: int = 0) -> RawFeatures:
+    """Random in-domain inputs, mostly off the grid, for the error report"""
+    rng = np.random.default_rng(seed)
+    num = np.empty((n, len(grids)))
+    for j, (feature, grid) in enumerate(zip(NUM_FEATURES, grids)):
+        low, high = INPUT_BOUNDS.get(feature, (grid[0] - 10, grid[-1] + 10))
+        num[:, j] = rng.uniform(low, high, n).round(1)
+        if isinstance(low, int):
+            num[:, j] = num[:, j].round()
+    cat = [list(rng.choice(values, n)) for values in categories]
+    return RawFeatures.from_answers(num, cat)
+
+
+def error_report(model, table: RiskTable, features: RawFeatures) -> dict:
+    """Probability error (percentage points) and label agreement versus the live model"""
+    expected = predict(model, features)
+    report = {"samples": len(features)}
+    for interpolation in ("nearest", "linear"):
+        table.interpolation = interpolation
+        actual = table.predict_scores(features)
+        error = np.abs(actual.probability - expected.probability) * 100
+        report[interpolation] = {
+            "max_error_pct": round(float(error.max()), 4),
+            "mean_error_pct": round(float(error.mean()), 4),
+            "p99_error_pct": round(float(np.percentile(error, 99)), 4),
+            "label_agreement": round(float(np.mean(actual.label == expected.label)), 6),
+        }
+    return report
+
+
+def parse_overrides(items, convert) -> dict:
+    """['Age=14', ...] -> {'Age': convert('14')}"""
+    overrides = {}
+    for item in items or []:
+        feature, _, value = item.partition('=')
+        if feature not in NUM_FEATURES:
+            raise SystemExit(f"Unknown numeric feature: {feature} (expected one of {NUM_FEATURES})")
+        overrides[feature] = convert(value)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the risk lookup table")
+    parser.add_argument("--model", help="Path to cardiac_arrest_model.pkl (default: the serving model)")
+    parser.add_argument("--output", default=str(Path(__file__).parent / "risk_table.npy"),
+                        help="Table file (.npy); metadata goes to the matching .json")
+    parser.add_argument("--points", type=int, default=4, help="Grid points per numeric feature")
+    parser.add_argument("--points-for", nargs="*", metavar="FEATURE=N",
+                        help="Per-feature grid points, e.g. Age=14 Blood_Pressure=8")
+    parser.add_argument("--range", nargs="*", metavar="FEATURE=LOW:HIGH",
+                        help="Grid range override (default: the model's split threshold range)")
+    parser.add_argument("--chunk-rows", type=int, default=200_000, help="Rows scored per model call")
+    parser.add_argument("--eval-samples", type=int, default=5000, help="Random inputs for the error report")
+    args = parser.parse_args()
+
+    if args.model:
+        logger.info(f"📥 Loading model from {args.model}")
+        model, model_sha256 = model_loader.deserialize(args.model), model_loader.file_sha256(args.model)
+    else:
+        loaded = model_loader.load_model()
+        model, model_sha256 = loaded.model, loaded.sha256
+
+    points = {feature: args.points for feature in NUM_FEATURES}
+    points.update(parse_overrides(args.points_for, int))
+    ranges = parse_overrides(args.range, lambda v: tuple(float(x) for x in v.split(':')))
+    try:
+        ranges = {**split_ranges(model), **ranges}
+        categories = table_categories(model)
+    except (AttributeError, KeyError, ValueError) as e:
+        raise SystemExit(f"❌ Unsupported model layout for grid detection: {e}")
+    missing = [feature for feature in NUM_FEATURES if feature not in ranges]
+    if missing:
+        raise SystemExit(f"❌ No split on {missing}; pass --range for them")
+
+    grids = make_grids(ranges, points)
+    output = Path(args.output)
+    start = time.perf_counter()
+    build_table(model, grids, categories, output, args.chunk_rows)
+    build_seconds = time.perf_counter() - start
+
+    metadata = {
+        "format": TABLE_FORMAT_VERSION,
+        "model_sha256": model_sha256,
+        "numeric": {feature: grid.tolist() for feature, grid in zip(NUM_FEATURES, grids)},
+        "categorical": dict(zip(CAT_FEATURES, categories)),
+        "classes": np.asarray(model.classes_).tolist(),
+        "build_seconds": round(build_seconds, 1),
+    }
+    with open(metadata_path(output), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    table = RiskTable.load(output)
+    metadata["error"] = error_report(model, table, sample_inputs(grids, categories, args.eval_samples))
+    with open(metadata_path(output), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    logger.info(f"✅ Table written to {output} ({table.values.nbytes / 1e6:.1f} MB) in {build_seconds:.0f}s")
+    for interpolation in ("nearest", "linear"):
+        stats = metadata["error"][interpolation]
+        logger.info(
+            f"📏 {interpolation:>7}: max {stats['max_error_pct']:.2f} pts, "
+            f"mean {stats['mean_error_pct']:.2f} pts, p99 {stats['p99_error_pct']:.2f} pts, "
+            f"label agreement {stats['label_agreement']:.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+HeartCare AI - Prediction Cache
+LRU + TTL cache of model scores keyed on the imputed feature vector
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Bounded cache from canonical feature tuples to model scores.
+
+    Eviction is least-recently-used once max_size entries are stored, and
+    entries older than ttl_s are treated as misses. The cache is bound to a
+    model fingerprint (the model file's SHA-256); binding a different
+    fingerprint empties it, so scores never outlive the model that made them.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_s: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.fingerprint = None
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def bind(self, fingerprint: str):
+        """Attach the cache to a model; clears it if the model changed"""
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                    logger.info(f"🧹 Model changed, dropping {len(self._entries)} cached predictions")
+                self._entries.clear()
+                self.fingerprint = fingerprint
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, fingerprint: str = None):
+        """Store a value; with fingerprint, only if the cache is still bound to that model"""
+        expires_at = time.monotonic() + self.ttl_s
+        with self._lock:
+            if fingerprint is not None and fingerprint != self.fingerprint:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_sha256": self.fingerprint,
+        }
@@ -0,0 +1,311 @@
+"""
+HeartCare AI - Compiled Ensemble
+Flat-array version of the calibrated Random Forest, evaluated with NumPy
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.isotonic import IsotonicRegression
+
+from encoder import FastEncoder, RawFeatures
+from inference import Prediction
+from model_loader import deserialize
+
+logger = logging.getLogger(__name__)
+
+# Max (tree, row) pairs walked at once; larger batches are split into row chunks
+MAX_TRAVERSAL_CELLS = 1_000_000
+
+# On-disk layout written by CompiledEnsemble.save()
+EXPORT_FORMAT_VERSION = 1
+EXPORT_ARRAYS = ['feature', 'threshold', 'left', 'right', 'value', 'roots', 'fold_offsets',
+                 'calib_x', 'calib_y', 'calib_offsets']
+
+
+class CompiledEnsemble:
+    """
+    CalibratedClassifierCV(Pipeline(ColumnTransformer, RandomForest)) packed into arrays.
+
+    Every tree of every fold lives in one set of node arrays (feature, threshold,
+    left, right, value). Leaves point to themselves, so all trees advance one
+    level per step and max_depth steps reach every leaf. Each fold keeps its own
+    FastEncoder (the fold's fitted scaler and one-hot categories) and its isotonic
+    calibrator as (x, y) breakpoints. Inputs are cast to float32 before the threshold test,
+    like sklearn's trees, so results match the original model.
+    """
+
+    def __init__(self, encoders, feature, threshold, left, right, value, roots, fold_offsets,
+                 max_depth, calib_x, calib_y, calib_offsets, classes):
+        self.encoders = encoders            # per fold: FastEncoder (scaler + one-hot)
+        self.feature = feature              # (n_nodes,) encoded column per node
+        self.threshold = threshold          # (n_nodes,)
+        self.left = left                    # (n_nodes,) global node index
+        self.right = right                  # (n_nodes,)
+        self.value = value                  # (n_nodes,) positive-class fraction at leaves
+        self.roots = roots                  # (n_trees,) global root node per tree
+        self.fold_offsets = fold_offsets    # (n_folds + 1,) tree index range per fold
+        self.max_depth = int(max_depth)
+        self.calib_x = calib_x              # packed isotonic breakpoints
+        self.calib_y = calib_y
+        self.calib_offsets = calib_offsets  # (n_folds + 1,)
+        self.classes_ = classes
+        self.model_sha256 = None            # source artifact, when loaded from an export
+        self.export_dir = None
+
+        self.n_folds = len(fold_offsets) - 1
+        self.n_encoded = encoders[0].n_encoded
+        self.tree_fold = np.repeat(np.arange(self.n_folds), np.diff(fold_offsets))
+        self.trees_per_fold = np.diff(fold_offsets)
+
+        # Category codes can be computed once when every fold saw the same categories
+        self._shared_categories = all(e.same_categories(encoders[0]) for e in encoders[1:])
+
+    # ----------------------------------------
+    # Compilation
+    # ----------------------------------------
+
+    @classmethod
+    def from_model(cls, model) -> 'CompiledEnsemble':
+        """Pack a fitted calibrated pipeline; raises ValueError for other layouts"""
+        start = time.perf_counter()
+        if not isinstance(model, CalibratedClassifierCV) or len(model.classes_) != 2:
+            raise ValueError("Expected a binary CalibratedClassifierCV")
+
+        encoders = []
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        calib_x, calib_y = [], []
+        fold_offsets, calib_offsets = [0], [0]
+        n_nodes = 0
+        max_depth = 0
+
+        for fold in model.calibrated_classifiers_:
+            pipeline = fold.estimator
+            preprocessor = pipeline.named_steps['preprocessor']
+            forest = pipeline[-1]
+            calibrator = fold.calibrators[0]
+            if not isinstance(forest, RandomForestClassifier) or not isinstance(calibrator, IsotonicRegression):
+                raise ValueError("Expected RandomForestClassifier folds with isotonic calibration")
+
+            encoders.append(FastEncoder.from_preprocessor(preprocessor))
+
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                node_ids = np.arange(tree.node_count)
+                is_leaf = tree.children_left == -1
+
+                counts = tree.value[:, 0, :]
+                totals = counts.sum(axis=1)
+                totals[totals == 0] = 1.0
+
+                features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+                thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+                lefts.append((np.where(is_leaf, node_ids, tree.children_left) + n_nodes).astype(np.int32))
+                rights.append((np.where(is_leaf, node_ids, tree.children_right) + n_nodes).astype(np.int32))
+                values.append(counts[:, 1] / totals)
+                roots.append(n_nodes)
+                n_nodes += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+            fold_offsets.append(len(roots))
+
+            calib_x.append(np.asarray(calibrator.X_thresholds_, dtype=np.float64))
+            calib_y.append(np.asarray(calibrator.y_thresholds_, dtype=np.float64))
+            calib_offsets.append(calib_offsets[-1] + len(calib_x[-1]))
+
+        compiled = cls(
+            encoders=encoders,
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            fold_offsets=np.array(fold_offsets, dtype=np.int64),
+            max_depth=max_depth,
+            calib_x=np.concatenate(calib_x),
+            calib_y=np.concatenate(calib_y),
+            calib_offsets=np.array(calib_offsets, dtype=np.int64),
+            classes=np.asarray(model.classes_),
+        )
+        logger.info(
+            f"⚙️ Compiled {len(roots)} trees / {n_nodes:,} nodes "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+        return compiled
+
+    # ----------------------------------------
+    # Export / memory-mapped loading
+    # ----------------------------------------
+
+    def save(self, directory, model_sha256: str = None):
+        """
+        Write every array as .npy plus a meta.json. The directory is built under a
+        temporary name and renamed into place, so concurrent exporters are safe.
+        """
+        directory = Path(directory)
+        tmp = directory.with_name(f".{directory.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name in EXPORT_ARRAYS:
+            np.save(tmp / f"{name}.npy", getattr(self, name))
+        for fold, encoder in enumerate(self.encoders):
+            np.save(tmp / f"mean_{fold}.npy", encoder.mean)
+            np.save(tmp / f"scale_{fold}.npy", encoder.scale)
+        meta = {
+            "format": EXPORT_FORMAT_VERSION,
+            "model_sha256": model_sha256,
+            "max_depth": self.max_depth,
+            "classes": self.classes_.tolist(),
+            "num_columns": self.encoders[0].num_columns,
+            "cat_columns": self.encoders[0].cat_columns,
+            "categories": [[c.tolist() for c in encoder.categories] for encoder in self.encoders],
+        }
+        with open(tmp / "meta.json", 'w') as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp, directory)
+        except OSError:
+            # Another process exported the same model first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not (directory / "meta.json").exists():
+                raise
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> 'CompiledEnsemble':
+        """
+        Open an exported ensemble. With mmap the node arrays are mapped read-only,
+        so every process serving the same export shares one copy in the page cache.
+        """
+        start = time.perf_counter()
+        directory = Path(directory)
+        with open(directory / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("format") != EXPORT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled export format: {meta.get('format')}")
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in EXPORT_ARRAYS}
+        encoders = [
+            FastEncoder(meta["num_columns"], meta["cat_columns"],
+                        np.load(directory / f"mean_{fold}.npy"), np.load(directory / f"scale_{fold}.npy"),
+                        categories)
+            for fold, categories in enumerate(meta["categories"])
+        ]
+        compiled = cls(encoders=encoders, max_depth=meta["max_depth"], classes=np.asarray(meta["classes"]),
+                       **arrays)
+        compiled.model_sha256 = meta.get("model_sha256")
+        compiled.export_dir = directory
+        logger.info(
+            f"✅ Compiled ensemble {'mapped' if mmap else 'loaded'} from {directory} "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+        return compiled
+
+    # ----------------------------------------
+    # Evaluation
+    # ----------------------------------------
+
+    def encode(self, features: RawFeatures) -> np.ndarray:
+        """Scale + one-hot for every fold: float32 array (n_folds, n_rows, n_encoded)"""
+        encoded = np.empty((self.n_folds, len(features), self.n_encoded), dtype=np.float32)
+        codes = None
+        for fold, encoder in enumerate(self.encoders):
+            if codes is None or not self._shared_categories:
+                codes = encoder.category_codes(features.codes)
+            encoded[fold] = encoder.encode_codes(features.num, codes)
+        return encoded
+
+    def raw_fold_scores(self, encoded: np.ndarray) -> np.ndarray:
+        """Uncalibrated positive-class probability per fold: (n_folds, n_rows)"""
+        n_rows = encoded.shape[1]
+        # Bound the (n_trees, rows) working arrays for large batches
+        step = max(1, MAX_TRAVERSAL_CELLS // len(self.roots))
+        if n_rows > step:
+            return np.concatenate(
+                [self.raw_fold_scores(encoded[:, i:i + step]) for i in range(0, n_rows, step)], axis=1
+            )
+
+        flat = np.ascontiguousarray(encoded).reshape(-1)
+        # Offset of (fold of tree, row) inside the flattened encoded array
+        base = (self.tree_fold[:, None] * n_rows + np.arange(n_rows)[None, :]) * self.n_encoded
+        base = base.astype(np.int32 if flat.size < 2 ** 31 else np.int64)
+
+        # np.take on int32 indices is markedly faster than fancy indexing here
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            column = np.take(self.feature, node).astype(base.dtype, copy=False)
+            column += base
+            go_left = np.take(flat, column) <= np.take(self.threshold, node)
+            node = np.where(go_left, np.take(self.left, node), np.take(self.right, node))
+
+        per_tree = np.take(self.value, node)
+        return np.add.reduceat(per_tree, self.fold_offsets[:-1], axis=0) / self.trees_per_fold[:, None]
+
+    def calibrate(self, fold_scores: np.ndarray) -> np.ndarray:
+        """Apply each fold's isotonic map: (n_folds, n_rows) -> (n_folds, n_rows)"""
+        calibrated = np.empty_like(fold_scores)
+        for fold in range(self.n_folds):
+            lo, hi = self.calib_offsets[fold], self.calib_offsets[fold + 1]
+            calibrated[fold] = np.interp(fold_scores[fold], self.calib_x[lo:hi], self.calib_y[lo:hi])
+        return calibrated
+
+    def predict_scores(self, X, timings: dict = None) -> Prediction:
+        """
+        Probability, label and raw score in one traversal (see inference.predict).
+        X is a model input DataFrame or RawFeatures (no DataFrame needed).
+        """
+        start = time.perf_counter()
+        if isinstance(X, pd.DataFrame):
+            X = RawFeatures.from_frame(X)
+        encoded = self.encode(X)
+        encode_done = time.perf_counter()
+        fold_scores = self.raw_fold_scores(encoded)
+        positive = self.calibrate(fold_scores)
+
+        proba = np.empty(positive.shape + (2,))
+        proba[..., 1] = positive
+        proba[..., 0] = 1.0 - positive
+        proba[np.isnan(proba)] = 0.5
+        proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+        mean_proba = proba.mean(axis=0)
+
+        if timings is not None:
+            timings['encode'] = encode_done - start
+            timings['model'] = time.perf_counter() - encode_done
+        return Prediction(
+            probability=mean_proba[:, 1],
+            label=self.classes_[np.argmax(mean_proba, axis=1)],
+            raw_score=fold_scores.mean(axis=0),
+        )
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        scores = self.predict_scores(X)
+        return np.column_stack([1.0 - scores.probability, scores.probability])
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.predict_scores(X).label
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.feature, self.threshold, self.left, self.right, self.value, self.calib_x, self.calib_y]
+        return sum(a.nbytes for a in arrays)
+
+
+def load_shared(model_path, model_sha256: str, export_root) -> CompiledEnsemble:
+    """
+    Memory-map the compiled export of an artifact, compiling and exporting it first
+    if no process has done so yet. Exports are keyed by the artifact's SHA-256.
+    """
+    directory = Path(export_root) / model_sha256
+    if not (directory / "meta.json").exists():
+        logger.info(f"📦 Exporting compiled ensemble to {directory}")
+        CompiledEnsemble.from_model(deserialize(model_path)).save(directory, model_sha256)
+    return CompiledEnsemble.load(directory)
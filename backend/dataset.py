@@ -0,0 +1,82 @@
+"""
+HeartCare AI - Dataset
+heart_data.csv loading and splitting as in Heart_Disease_Prediction.ipynb, plus
+the evaluation metrics reported by the offline training tools
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from encoder import CAT_FEATURES, FEATURE_NAMES, NUM_FEATURES
+
+TARGET = 'Cardiac_Arrest'
+
+# Columns the notebook drops before training (not collected by the app)
+DROP_COLUMNS = ['Follow_Up', 'Medication', 'Recovery_Status', 'Angina', 'Heart_Rate',
+                'Chest_Pain', 'ECG_Results', 'Drug_Use', 'Region']
+
+# Notebook's hold-out split
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+
+def load_dataset(path):
+    """(X, y) from a heart_data.csv export: Yes/No target mapped to 1/0, unused columns dropped"""
+    df = pd.read_csv(path)
+    df[TARGET] = df[TARGET].str.strip().str.lower().map({'yes': 1, 'no': 0})
+    if df[TARGET].isna().any():
+        raise ValueError(f"{TARGET} must be Yes/No")
+    df = df.drop(columns=[c for c in DROP_COLUMNS if c in df.columns])
+    missing = [c for c in FEATURE_NAMES if c not in df.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {missing}")
+    return df[FEATURE_NAMES], df[TARGET].astype(int)
+
+
+def synthetic_dataset(n_samples: int, seed: int = 42):
+    """(X, y) with heart_data.csv's schema from stub_model, for runs without the CSV"""
+    from stub_model import make_training_frame
+
+    X, y = make_training_frame(n_samples, seed)
+    return X.astype({feature: object for feature in CAT_FEATURES}), pd.Series(y, name=TARGET)
+
+
+def split_dataset(X, y, test_size: float = TEST_SIZE, random_state: int = RANDOM_STATE):
+    """X_train, X_test, y_train, y_test exactly as the notebook splits them"""
+    return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+
+def make_preprocessor() -> ColumnTransformer:
+    """The notebook's preprocessing: scaled numerics, one-hot categoricals (unknown -> all zeros)"""
+    return ColumnTransformer([
+        ('num', StandardScaler(), NUM_FEATURES),
+        ('cat', OneHotEncoder(handle_unknown='ignore'), CAT_FEATURES)
+    ])
+
+
+def expected_calibration_error(y, p, bins: int = 10) -> float:
+    """Mean |observed rate - mean prediction| over equal-width bins, weighted by bin size"""
+    y, p = np.asarray(y), np.asarray(p)
+    index = np.minimum((p * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in range(bins):
+        mask = index == b
+        if mask.any():
+            error += mask.mean() * abs(y[mask].mean() - p[mask].mean())
+    return float(error)
+
+
+def evaluate(y, p) -> dict:
+    """AUC, Brier score, log loss, calibration error and accuracy of P(cardiac arrest)"""
+    p = np.clip(np.asarray(p, dtype=np.float64), 0.0, 1.0)
+    return {
+        "auc": round(float(roc_auc_score(y, p)), 5),
+        "brier": round(float(brier_score_loss(y, p)), 5),
+        "log_loss": round(float(log_loss(y, np.clip(p, 1e-15, 1 - 1e-15))), 5),
+        "ece": round(expected_calibration_error(y, p), 5),
+        "accuracy": round(float(np.mean((p > 0.5) == np.asarray(y))), 5),
+    }
@@ -0,0 +1,242 @@
+"""
+HeartCare AI - Distillation
+Offline tool: train a small student (forest, gradient boosting or logistic
+regression) on the calibrated ensemble's predicted risk, compare it with the
+teacher on the notebook's hold-out split, and add it to the model store for
+HEARTCARE_MODEL_VARIANT=distilled
+
+The student is fit to the teacher's calibrated probability rather than to the
+0/1 labels, so it inherits the teacher's calibration. --augment adds extra rows
+sampled from the training marginals, labelled by the teacher only.
+
+Usage:
+    python distill.py --data heart_data.csv --student gbt
+    python distill.py --synthetic 20000 --student forest --trees 30 --augment 2
+"""
+
+import argparse
+import json
+import logging
+import pickle
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LogisticRegression
+
+import dataset
+from distilled import STUDENT_KINDS, DistilledClassifier
+from encoder import FastEncoder, RawFeatures
+from inference import predict
+import model_loader
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Student size when --trees / --max-depth are not given
+STUDENT_DEFAULTS = {
+    "forest": {"trees": 40, "max_depth": 12},
+    "gbt": {"trees": 200, "max_depth": 6},
+    "logistic": {},
+}
+
+
+def augment(X: pd.DataFrame, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """n_rows synthetic rows, each column drawn independently from X's values"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        column: X[column].to_numpy()[rng.integers(0, len(X), n_rows)] for column in X.columns
+    })
+
+
+def fit_student(kind: str, encoded: np.ndarray, target: np.ndarray, trees: int = None,
+                max_depth: int = None, seed: int = 42, n_jobs: int = -1):
+    """Fit the student on encoded rows against the teacher's P(cardiac arrest)"""
+    size = {**STUDENT_DEFAULTS[kind]}
+    size.update({k: v for k, v in (("trees", trees), ("max_depth", max_depth)) if v is not None})
+
+    if kind == "forest":
+        student = RandomForestRegressor(
+            n_estimators=size["trees"], max_depth=size["max_depth"], min_samples_leaf=5,
+            max_features=0.5, n_jobs=n_jobs, random_state=seed
+        ).fit(encoded, target)
+        # Serving calls score a handful of rows; thread fan-out costs more than it saves
+        student.n_jobs = 1
+        return student
+    if kind == "gbt":
+        student = HistGradientBoostingRegressor(
+            max_iter=size["trees"], max_depth=size["max_depth"], learning_rate=0.1, random_state=seed
+        )
+        return student.fit(encoded, target)
+
+    # Soft labels: every row appears once as class 1 weighted by p and once as class 0
+    # weighted by 1 - p, so the log loss minimized is the cross-entropy to the teacher
+    n = len(encoded)
+    student = LogisticRegression(C=1.0, max_iter=2000)
+    return student.fit(
+        np.vstack([encoded, encoded]),
+        np.concatenate([np.ones(n, dtype=int), np.zeros(n, dtype=int)]),
+        sample_weight=np.concatenate([target, 1.0 - target]),
+    )
+
+
+def tree_nodes(model):
+    """Total decision nodes of a forest/boosted model (None for linear students)"""
+    if isinstance(model, DistilledClassifier):
+        student = model.student
+        if hasattr(student, 'estimators_'):
+            return int(sum(tree.tree_.node_count for tree in student.estimators_))
+        if hasattr(student, '_predictors'):
+            return int(sum(len(p.nodes) for stage in student._predictors for p in stage))
+        return None
+    return int(sum(
+        tree.tree_.node_count
+        for fold in model.calibrated_classifiers_
+        for tree in fold.estimator[-1].estimators_
+    ))
+
+
+def artifact_bytes(model) -> int:
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def latency_ms(model, features: RawFeatures, repeats: int) -> float:
+    """Median wall time of one predict() call on features"""
+    predict(model, features)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(model, features)
+        times.append(time.perf_counter() - start)
+    return round(float(np.median(times)) * 1000, 3)
+
+
+def compare(teacher, student, X_test, y_test, repeats: int = 50) -> dict:
+    """Hold-out metrics, fidelity to the teacher, latency and size of both models"""
+    features = RawFeatures.from_frame(X_test)
+    teacher_p = predict(teacher, features).probability
+    student_p = predict(student, features).probability
+    teacher_metrics = dataset.evaluate(y_test, teacher_p)
+    student_metrics = dataset.evaluate(y_test, student_p)
+    difference = np.abs(student_p - teacher_p)
+
+    single = features.take(np.arange(1))
+    bulk = features.take(np.resize(np.arange(len(features)), 1000))
+    report = {"samples": len(features)}
+    for name, model, metrics in (("teacher", teacher, teacher_metrics), ("student", student, student_metrics)):
+        report[name] = {
+            **metrics,
+            "latency_ms_1_row": latency_ms(model, single, repeats),
+            "latency_ms_1000_rows": latency_ms(model, bulk, max(3, repeats // 10)),
+            "bytes": artifact_bytes(model),
+            "nodes": tree_nodes(model),
+        }
+    report["delta"] = {
+        metric: round(student_metrics[metric] - teacher_metrics[metric], 5) for metric in teacher_metrics
+    }
+    report["fidelity"] = {
+        "mean_abs_diff": round(float(difference.mean()), 5),
+        "max_abs_diff": round(float(difference.max()), 5),
+        "label_agreement": round(float(np.mean((student_p > 0.5) == (teacher_p > 0.5))), 5),
+    }
+    return report
+
+
+def distill(teacher, X_train, kind: str, augment_factor: float = 0.0, trees: int = None,
+            max_depth: int = None, seed: int = 42, n_jobs: int = -1, teacher_sha256: str = None):
+    """DistilledClassifier trained on the teacher's scores for X_train (plus augmented rows)"""
+    if kind not in STUDENT_KINDS:
+        raise ValueError(f"Unknown student kind {kind!r} (expected one of {STUDENT_KINDS})")
+    X = X_train.reset_index(drop=True)
+    if augment_factor > 0:
+        X = pd.concat([X, augment(X, int(len(X) * augment_factor), seed)], ignore_index=True)
+
+    start = time.perf_counter()
+    features = RawFeatures.from_frame(X)
+    target = predict(teacher, features).probability
+    labelled = time.perf_counter()
+
+    preprocessor = dataset.make_preprocessor().fit(X_train)
+    encoded = FastEncoder.from_preprocessor(preprocessor).encode(features)
+    student = fit_student(kind, encoded, target, trees, max_depth, seed, n_jobs)
+    logger.info(
+        f"🎓 {kind} student fit on {len(X):,} rows: teacher scoring {labelled - start:.1f}s, "
+        f"training {time.perf_counter() - labelled:.1f}s"
+    )
+    return DistilledClassifier(preprocessor, student, kind, teacher.classes_, teacher_sha256)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="heart_data.csv (split 80/20 with random_state=42 as in the notebook)")
+    source.add_argument("--synthetic", type=int, metavar="N", help="Use N synthetic rows instead of a CSV")
+    parser.add_argument("--teacher", help="Path to cardiac_arrest_model.pkl (default: the full serving model)")
+    parser.add_argument("--student", choices=STUDENT_KINDS, default="gbt")
+    parser.add_argument("--trees", type=int, help="Trees (forest) or boosting iterations (gbt)")
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--augment", type=float, default=0.0,
+                        help="Extra teacher-labelled rows, as a multiple of the training set")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=str(Path(__file__).parent / "distilled_model.pkl"),
+                        help="Student artifact; the report goes to the matching .json")
+    parser.add_argument("--no-ingest", action="store_true",
+                        help="Do not add the student to the model store as the distilled variant")
+    args = parser.parse_args()
+
+    if args.teacher:
+        logger.info(f"📥 Loading teacher from {args.teacher}")
+        teacher, teacher_sha256 = model_loader.deserialize(args.teacher), model_loader.file_sha256(args.teacher)
+    else:
+        loaded = model_loader.load_model(variant="full")
+        teacher, teacher_sha256 = loaded.model, loaded.sha256
+
+    try:
+        X, y = dataset.load_dataset(args.data) if args.data else dataset.synthetic_dataset(args.synthetic, args.seed)
+    except (ValueError, FileNotFoundError) as e:
+        raise SystemExit(f"❌ {e}")
+    X_train, X_test, _, y_test = dataset.split_dataset(X, y)
+
+    start = time.perf_counter()
+    student = distill(teacher, X_train, args.student, args.augment, args.trees, args.max_depth,
+                      args.seed, teacher_sha256=teacher_sha256)
+    distill_seconds = time.perf_counter() - start
+
+    output = Path(args.output)
+    joblib.dump(student, output)
+    report = {
+        "student": args.student,
+        "teacher_sha256": teacher_sha256,
+        "student_sha256": model_loader.file_sha256(output),
+        "train_rows": len(X_train),
+        "augment": args.augment,
+        "distill_seconds": round(distill_seconds, 1),
+        **compare(teacher, student, X_test, y_test),
+    }
+    with open(output.with_suffix(".json"), 'w') as f:
+        json.dump(report, f, indent=2)
+    if not args.no_ingest:
+        model_loader.default_store().ingest(output, model_loader.ref_name("distilled"), report["student_sha256"])
+
+    teacher_report, student_report = report["teacher"], report["student"]
+    logger.info(f"✅ Student written to {output} ({student_report['bytes'] / 1e6:.2f} MB)")
+    for metric in ("auc", "brier", "ece"):
+        logger.info(
+            f"📏 {metric:>5}: teacher {teacher_report[metric]:.4f}, student {student_report[metric]:.4f} "
+            f"({report['delta'][metric]:+.4f})"
+        )
+    logger.info(
+        f"⚡ latency 1 row: {teacher_report['latency_ms_1_row']:.2f} -> {student_report['latency_ms_1_row']:.2f} ms, "
+        f"1000 rows: {teacher_report['latency_ms_1000_rows']:.1f} -> {student_report['latency_ms_1000_rows']:.1f} ms"
+    )
+    logger.info(
+        f"🎯 fidelity: mean |Δp| {report['fidelity']['mean_abs_diff']:.4f}, "
+        f"label agreement {report['fidelity']['label_agreement']:.2%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
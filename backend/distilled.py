@@ -0,0 +1,75 @@
+"""
+HeartCare AI - Distilled Model
+Small student model trained to reproduce the calibrated ensemble's risk,
+served through the same inference interface (see distill.py)
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from encoder import FastEncoder, RawFeatures
+from inference import Prediction
+
+STUDENT_KINDS = ("forest", "gbt", "logistic")
+
+
+class DistilledClassifier:
+    """
+    preprocessor (fitted ColumnTransformer) + student predicting P(cardiac arrest).
+
+    Regressor students (forest, gbt) are fit to the teacher's calibrated
+    probability directly; the logistic student's predict_proba is used as-is.
+    Inference encodes with FastEncoder, so no DataFrame is built per request.
+    Looks like a binary classifier to sklearn-style callers (predict_proba,
+    predict, classes_) and provides predict_scores() for inference.predict.
+    """
+
+    def __init__(self, preprocessor, student, kind: str, classes, teacher_sha256: str = None):
+        if kind not in STUDENT_KINDS:
+            raise ValueError(f"Unknown student kind {kind!r}")
+        self.preprocessor = preprocessor
+        self.student = student
+        self.kind = kind
+        self.classes_ = np.asarray(classes)
+        self.teacher_sha256 = teacher_sha256
+        self._encoder = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_encoder'] = None
+        return state
+
+    @property
+    def encoder(self) -> FastEncoder:
+        if self._encoder is None:
+            self._encoder = FastEncoder.from_preprocessor(self.preprocessor)
+        return self._encoder
+
+    def positive_proba(self, encoded: np.ndarray) -> np.ndarray:
+        if self.kind == "logistic":
+            return self.student.predict_proba(encoded)[:, 1]
+        return np.clip(self.student.predict(encoded), 0.0, 1.0)
+
+    def predict_scores(self, X, timings: dict = None) -> Prediction:
+        start = time.perf_counter()
+        features = X if isinstance(X, RawFeatures) else RawFeatures.from_frame(X)
+        encoded = self.encoder.encode(features)
+        encoded_at = time.perf_counter()
+        positive = self.positive_proba(encoded)
+        if timings is not None:
+            timings['encode'] = encoded_at - start
+            timings['model'] = time.perf_counter() - encoded_at
+        return Prediction(
+            probability=positive,
+            label=self.classes_[(positive > 0.5).astype(int)],
+            raw_score=positive,
+        )
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        positive = self.predict_scores(X).probability
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.predict_scores(X).label
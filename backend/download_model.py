@@ -1,28 +1,25 @@
 """
-Script to download the trained model from Hugging Face Hub
-Run this once before starting the backend server
+Script to download the trained model from Hugging Face Hub into the local model store
+Run this once before starting the backend server (later starts then need no network)
 """
 
-from huggingface_hub import hf_hub_download
-from pathlib import Path
 import logging
 
+from model_loader import default_store, download_from_hub
+from settings import settings
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def download_model():
-    """Download model from Hugging Face Hub to backend directory"""
+    """Download model from Hugging Face Hub into the content-addressed model store"""
     try:
         logger.info("Downloading model from Hugging Face Hub...")
         
-        # Download to current directory
-        model_path = hf_hub_download(
-            repo_id="ZainShahHere/cardiac_arrest_model",
-            filename="cardiac_arrest_model.pkl",
-            local_dir=Path(__file__).parent,
-            local_dir_use_symlinks=False
-        )
+        store = default_store()
+        sha256 = store.ingest(download_from_hub(), settings.model_name)
+        model_path = store.object_path(sha256)
         
         logger.info(f"✅ Model downloaded successfully to: {model_path}")
         return model_path
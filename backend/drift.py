@@ -0,0 +1,310 @@
+"""
+HeartCare AI - Drift Monitor
+Streaming input and score histograms compared with a reference profile of the training data
+
+The reference profile is built offline from heart_data.csv: quantile bin edges
+and proportions for the six numerics, answer proportions for the nine
+categoricals and, if a model is given, the raw and adjusted risk the API would
+report for (a sample of) the training rows. The API loads it at startup and
+folds every scored row into fixed-size histograms; GET /drift reports PSI and
+(binned) KS per feature against the reference.
+
+Usage:
+    python drift.py --data ../heart_data.csv
+    python drift.py --data ../heart_data.csv --model trained_model.pkl --score-rows 50000
+    python drift.py --data ../heart_data.csv --no-scores
+"""
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from encoder import (
+    ANSWERS, CAT_FEATURES, CAT_FIELDS, INPUT_FIELDS, NUM_FEATURES, NUM_FIELDS, RawFeatures, encode_column,
+)
+import risk
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DRIFT_FORMAT_VERSION = 1
+
+# Population stability index bands (the usual 0.1 / 0.25 rule of thumb)
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Proportions are floored here so empty bins do not make PSI infinite
+PSI_EPSILON = 1e-4
+
+# Raw and adjusted risk are binned in percent on a fixed grid
+SCORE_FIELDS = ["raw_risk", "adjusted_risk"]
+SCORE_EDGES = np.linspace(0.0, 100.0, 21)
+
+# Rows buffered before they are folded into the histograms
+BUFFER_ROWS = 256
+
+
+def psi(actual: np.ndarray, expected: np.ndarray) -> float:
+    """Population stability index of two proportion vectors over the same bins"""
+    actual = np.maximum(actual, PSI_EPSILON)
+    expected = np.maximum(expected, PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(actual: np.ndarray, expected: np.ndarray) -> float:
+    """Largest CDF gap at the bin edges (a lower bound of the exact KS statistic)"""
+    return float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected)), initial=0.0))
+
+
+def drift_status(value: float) -> str:
+    if value >= PSI_SIGNIFICANT:
+        return "significant"
+    return "moderate" if value >= PSI_MODERATE else "stable"
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Counts per bin; edges are the inner boundaries, so len(edges) + 1 bins"""
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+
+def proportions(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum()
+    return counts / total if total else np.zeros(len(counts))
+
+
+def quantile_edges(values: np.ndarray, bins: int) -> np.ndarray:
+    """Inner bin edges at the reference quantiles (ties merged, so integer features may get fewer bins)"""
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+
+
+def frame_vectors(X) -> np.ndarray:
+    """(n, 15) INPUT_FIELDS vectors (numerics + answer codes) from a heart_data.csv frame"""
+    return np.column_stack(
+        [X[NUM_FEATURES].to_numpy(dtype=np.float64)]
+        + [encode_column(field, X[feature].astype(str).tolist()) for field, feature in zip(CAT_FIELDS, CAT_FEATURES)]
+    ).astype(np.float64)
+
+
+def score_vectors(model, vectors: np.ndarray) -> tuple:
+    """(raw risk %, adjusted risk %) exactly as /predict reports them"""
+    from inference import predict
+
+    scores = predict(model, RawFeatures.from_vectors(vectors))
+    adjusted = risk.adjust_risk(scores.probability * 100, risk.vector_columns(vectors))
+    return scores.probability * 100, np.round(adjusted)
+
+
+def build_reference(X, bins: int = 20, model=None, model_sha256: str = None, score_rows: int = 20000,
+                    seed: int = 0) -> dict:
+    """
+    Reference profile of a heart_data.csv frame. Numerics get up to `bins`
+    quantile bins; answers outside ANSWERS (should the CSV have any) are not
+    counted. With a model, score_rows sampled rows are scored for the risk
+    histograms.
+    """
+    vectors = frame_vectors(X)
+    profile = {"format": DRIFT_FORMAT_VERSION, "rows": len(vectors), "numeric": {}, "categorical": {}, "scores": None}
+    for j, field in enumerate(NUM_FIELDS):
+        edges = quantile_edges(vectors[:, j], bins)
+        profile["numeric"][field] = {
+            "edges": edges.tolist(),
+            "proportions": proportions(bin_counts(vectors[:, j], edges)).tolist(),
+            "mean": float(vectors[:, j].mean()),
+        }
+    for j, field in enumerate(CAT_FIELDS, len(NUM_FIELDS)):
+        counts = np.bincount(vectors[:, j][vectors[:, j] > 0].astype(int), minlength=len(ANSWERS[field]))
+        profile["categorical"][field] = dict(zip(ANSWERS[field][1:], proportions(counts[1:]).tolist()))
+
+    if model is not None:
+        if len(vectors) > score_rows:
+            vectors = vectors[np.random.default_rng(seed).choice(len(vectors), score_rows, replace=False)]
+        # Rows with answers outside ANSWERS cannot be scored like API requests
+        vectors = vectors[(vectors[:, len(NUM_FIELDS):] >= 0).all(axis=1)]
+        profile["scores"] = {"model_sha256": model_sha256, "rows": len(vectors), "edges": SCORE_EDGES[1:-1].tolist()}
+        for field, values in zip(SCORE_FIELDS, score_vectors(model, vectors)):
+            profile["scores"][field] = {
+                "proportions": proportions(bin_counts(values, SCORE_EDGES[1:-1])).tolist(),
+                "mean": float(values.mean()),
+            }
+    return profile
+
+
+def save_reference(profile: dict, path):
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(profile, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_reference(path) -> dict:
+    """Read a profile written by this script; ValueError if it is from an incompatible version"""
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get("format") != DRIFT_FORMAT_VERSION:
+        raise ValueError(f"{path} has format {profile.get('format')}, expected {DRIFT_FORMAT_VERSION}; rebuild it")
+    return profile
+
+
+class DriftMonitor:
+    """
+    Fixed-memory histograms of live inputs and scores.
+
+    record() copies the scored rows into a preallocated buffer; every
+    BUFFER_ROWS rows the buffer is folded into per-feature bin counts with one
+    searchsorted/bincount per column. Counts are kept for the current and the
+    previous window of `window` rows, and statistics are computed on both
+    together, so they always describe the last one to two windows of traffic.
+    Everything is only touched from the event loop thread, so nothing is locked.
+    Numerics and scores get PSI and binned KS; answers get PSI over the answered
+    rows plus the "I don't know" rate (the training data has no unknowns).
+    """
+
+    def __init__(self, reference: dict, window: int = 10000, buffer_rows: int = BUFFER_ROWS):
+        self.reference = reference
+        self.window = window
+        # Per column: inner bin edges, or None for answer codes (counted as they are)
+        self.edges = [np.array(reference["numeric"][field]["edges"]) for field in NUM_FIELDS] + [None] * len(CAT_FIELDS)
+        self.expected = [np.array(reference["numeric"][field]["proportions"]) for field in NUM_FIELDS]
+        self.expected += [
+            np.array([0.0] + list(reference["categorical"][field].values())) for field in CAT_FIELDS
+        ]
+        scores = reference.get("scores")
+        if scores is not None:
+            self.edges += [np.array(scores["edges"])] * len(SCORE_FIELDS)
+            self.expected += [np.array(scores[field]["proportions"]) for field in SCORE_FIELDS]
+        self.sizes = [len(expected) for expected in self.expected]
+        # Bin counts of every column side by side: [previous, current]
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+        self.counts = np.zeros((2, self.offsets[-1]), dtype=np.int64)
+        self.window_rows = np.zeros(2, dtype=np.int64)
+        self.rows_seen = 0
+        self.buffer = np.empty((buffer_rows, len(INPUT_FIELDS) + len(SCORE_FIELDS)))
+        self.buffered = 0
+
+    @property
+    def has_scores(self) -> bool:
+        return len(self.expected) > len(INPUT_FIELDS)
+
+    def record(self, vectors: np.ndarray, raw_risk, adjusted_risk):
+        """Add scored rows: patient_vectors() output plus raw and adjusted risk in percent"""
+        n = len(vectors)
+        self.rows_seen += n
+        if n >= len(self.buffer):
+            self._fold(np.column_stack([vectors, raw_risk, adjusted_risk]))
+            return
+        if self.buffered + n > len(self.buffer):
+            self.flush()
+        rows = self.buffer[self.buffered:self.buffered + n]
+        rows[:, :len(INPUT_FIELDS)] = vectors
+        rows[:, -2] = raw_risk
+        rows[:, -1] = adjusted_risk
+        self.buffered += n
+        if self.buffered == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        """Fold buffered rows into the histograms"""
+        if self.buffered:
+            rows, self.buffered = self.buffer[:self.buffered], 0
+            self._fold(rows)
+
+    def _fold(self, rows: np.ndarray):
+        if self.window_rows[1] >= self.window:
+            self.counts[0], self.window_rows[0] = self.counts[1], self.window_rows[1]
+            self.counts[1], self.window_rows[1] = 0, 0
+        current = self.counts[1]
+        for j, edges in enumerate(self.edges):
+            start, size = self.offsets[j], self.sizes[j]
+            if edges is None:
+                counts = np.bincount(rows[:, j].astype(np.intp), minlength=size)
+            else:
+                counts = bin_counts(rows[:, j], edges)
+            current[start:start + size] += counts
+        self.window_rows[1] += len(rows)
+
+    def reset_scores(self):
+        """Forget the score histograms (after the serving model changed)"""
+        self.flush()
+        for j in range(len(INPUT_FIELDS), len(self.expected)):
+            self.counts[:, self.offsets[j]:self.offsets[j + 1]] = 0
+
+    def report(self) -> dict:
+        """PSI, KS and drift status per feature over the current and previous window"""
+        self.flush()
+        counts = self.counts.sum(axis=0)
+        rows = int(self.window_rows.sum())
+        result = {"rows_seen": self.rows_seen, "window_rows": rows, "features": {}, "scores": None}
+
+        def column(j):
+            return counts[self.offsets[j]:self.offsets[j + 1]]
+
+        for j, field in enumerate(NUM_FIELDS):
+            actual = proportions(column(j))
+            result["features"][field] = self._stats(actual, self.expected[j], rows, ks=True)
+        for j, field in enumerate(CAT_FIELDS, len(NUM_FIELDS)):
+            answered = column(j)[1:]
+            stats = self._stats(proportions(answered), self.expected[j][1:], int(answered.sum()))
+            stats["unknown_rate"] = round(float(column(j)[0] / rows), 4) if rows else None
+            result["features"][field] = stats
+        if self.has_scores:
+            score_rows = int(column(len(INPUT_FIELDS)).sum())
+            result["scores"] = {
+                field: self._stats(proportions(column(j)), self.expected[j], score_rows, ks=True)
+                for j, field in enumerate(SCORE_FIELDS, len(INPUT_FIELDS))
+            }
+        drifting = [field for field, stats in result["features"].items() if stats["status"] == "significant"]
+        result["drifting_features"] = drifting
+        return result
+
+    @staticmethod
+    def _stats(actual: np.ndarray, expected: np.ndarray, rows: int, ks: bool = False) -> dict:
+        if not rows:
+            return {"rows": 0, "psi": None, "status": "no data"}
+        value = psi(actual, expected)
+        stats = {"rows": rows, "psi": round(value, 4)}
+        if ks:
+            stats["ks"] = round(binned_ks(actual, expected), 4)
+        stats["status"] = drift_status(value)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="heart_data.csv (local file)")
+    parser.add_argument("--output", default=str(Path(__file__).parent / "drift_reference.json"))
+    parser.add_argument("--bins", type=int, default=20, help="Quantile bins per numeric feature")
+    parser.add_argument("--model", help="Model for the score reference (default: the serving model)")
+    parser.add_argument("--no-scores", action="store_true", help="Profile the inputs only")
+    parser.add_argument("--score-rows", type=int, default=20000, help="Training rows scored for the score reference")
+    args = parser.parse_args()
+
+    from dataset import load_dataset
+    import model_loader
+
+    try:
+        X, _ = load_dataset(args.data)
+    except (FileNotFoundError, ValueError) as e:
+        raise SystemExit(f"❌ {e}")
+    model = model_sha256 = None
+    if not args.no_scores:
+        if args.model:
+            model, model_sha256 = model_loader.deserialize(args.model), model_loader.file_sha256(args.model)
+        else:
+            loaded = model_loader.load_model()
+            model, model_sha256 = loaded.model, loaded.sha256
+
+    profile = build_reference(X, args.bins, model, model_sha256, args.score_rows)
+    save_reference(profile, args.output)
+    logger.info(f"✅ Reference profile of {profile['rows']} rows written to {args.output}")
+    for field in NUM_FIELDS:
+        logger.info(f"📏 {field}: {len(profile['numeric'][field]['edges']) + 1} bins")
+    if profile["scores"] is not None:
+        logger.info(f"🎯 Scores from {profile['scores']['rows']} rows on {model_sha256[:12]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+HeartCare AI - Fast Encoder
+Maps patients straight to the model's encoded feature matrix, without DataFrames
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+# Feature order (must match training data)
+NUM_FEATURES = ['Age', 'BMI', 'Cholesterol_Level', 'Sleep_Hours', 'Blood_Pressure', 'Blood_Sugar']
+CAT_FEATURES = [
+    'Gender', 'Smoker', 'Diabetes', 'Hypertension', 'Physical_Activity',
+    'Diet', 'Family_History', 'Stress_Level', 'Alcohol_Consumption'
+]
+FEATURE_NAMES = NUM_FEATURES + CAT_FEATURES
+
+# PatientData fields in NUM_FEATURES order
+NUM_FIELDS = ['age', 'bmi', 'cholesterol_level', 'sleep_hours', 'blood_pressure', 'blood_sugar']
+
+# (PatientData field, imputation default) in CAT_FEATURES order
+CAT_IMPUTATION = [
+    ('gender', 'Male'),
+    ('smoker', 'No'),
+    ('diabetes', 'No'),
+    ('hypertension', 'No'),
+    ('physical_activity', 'Moderate'),
+    ('diet', 'Healthy'),
+    ('family_history', 'No'),
+    ('stress_level', 'Moderate'),
+    ('alcohol_consumption', 'No'),
+]
+
+UNKNOWN = "I don't know"
+
+# Categorical PatientData fields in CAT_FEATURES order
+CAT_FIELDS = [field for field, _ in CAT_IMPUTATION]
+
+# PatientData field names in FEATURE_NAMES order
+INPUT_FIELDS = NUM_FIELDS + CAT_FIELDS
+
+# Accepted answers per categorical field. An answer's position is its integer
+# code; code 0 is "I don't know", which never reaches the model (imputation
+# replaces it with the CAT_IMPUTATION default)
+ANSWERS = {
+    'gender': (UNKNOWN, 'Male', 'Female'),
+    'smoker': (UNKNOWN, 'Yes', 'No'),
+    'diabetes': (UNKNOWN, 'Yes', 'No'),
+    'hypertension': (UNKNOWN, 'Yes', 'No'),
+    'physical_activity': (UNKNOWN, 'High', 'Moderate', 'Low'),
+    'diet': (UNKNOWN, 'Healthy', 'Unhealthy'),
+    'family_history': (UNKNOWN, 'Yes', 'No'),
+    'stress_level': (UNKNOWN, 'High', 'Moderate', 'Low'),
+    'alcohol_consumption': (UNKNOWN, 'Yes', 'No'),
+}
+UNKNOWN_CODE = 0
+# Code of a DataFrame/CSV value that is not an accepted answer (encodes as all zeros)
+INVALID_CODE = -1
+
+ANSWER_CODES = {field: {answer: code for code, answer in enumerate(answers)} for field, answers in ANSWERS.items()}
+IMPUTED_CODES = np.array([ANSWER_CODES[field][default] for field, default in CAT_IMPUTATION], dtype=np.int8)
+_CAT_COLUMNS = np.arange(len(CAT_FIELDS))
+_MAX_CODES = max(len(answers) for answers in ANSWERS.values())
+
+
+def answer_code(field: str, answer: str) -> int:
+    """Integer code of one categorical answer; ValueError if it is not accepted"""
+    try:
+        return ANSWER_CODES[field][answer]
+    except KeyError:
+        raise ValueError(f"{field} must be one of {list(ANSWERS[field])}, got {answer!r}")
+
+
+def encode_column(field: str, answers) -> np.ndarray:
+    """Answer strings of one field -> int8 codes (INVALID_CODE for values that are not accepted)"""
+    lookup = ANSWER_CODES[field]
+    return np.array([lookup.get(answer, INVALID_CODE) for answer in answers], dtype=np.int8)
+
+
+def encode_answers(cat) -> np.ndarray:
+    """Answer strings (9 columns, CAT_FEATURES order) -> (n, 9) int8 codes"""
+    n_rows = len(cat[0]) if len(cat) else 0
+    codes = np.empty((n_rows, len(CAT_FIELDS)), dtype=np.int8)
+    for j, (field, answers) in enumerate(zip(CAT_FIELDS, cat)):
+        codes[:, j] = encode_column(field, answers)
+    return codes
+
+
+def impute(codes: np.ndarray) -> np.ndarray:
+    """Replace "I don't know" codes by the CAT_IMPUTATION defaults"""
+    return np.where(codes == UNKNOWN_CODE, IMPUTED_CODES, codes).astype(np.int8)
+
+
+def code_remap(lookups) -> np.ndarray:
+    """
+    (9, max codes + 1) array from answer code to the answer's position in each
+    column's category list (lookups: per column {category: position}), -1 where
+    a category list lacks the answer. The extra last column maps INVALID_CODE.
+    """
+    remap = np.full((len(CAT_FIELDS), _MAX_CODES + 1), -1, dtype=np.int64)
+    for j, (field, lookup) in enumerate(zip(CAT_FIELDS, lookups)):
+        for code, answer in enumerate(ANSWERS[field]):
+            remap[j, code] = lookup.get(answer, -1)
+    return remap
+
+
+# (field, answer lookup or None for numerics) in INPUT_FIELDS order
+_VECTOR_FIELDS = [(field, None) for field in NUM_FIELDS] + [(field, ANSWER_CODES[field]) for field in CAT_FIELDS]
+
+
+def fields_vector(values: dict) -> np.ndarray:
+    """
+    (15,) float64 in INPUT_FIELDS order from validated field values: the numerics,
+    then the raw answer codes. KeyError if an answer is not accepted.
+    """
+    return np.array(
+        [values[field] if lookup is None else lookup[values[field]] for field, lookup in _VECTOR_FIELDS],
+        dtype=np.float64
+    )
+
+
+def patient_vector(patient) -> np.ndarray:
+    """fields_vector() of a patient object (PatientData computes it once during validation)"""
+    vector = getattr(patient, 'feature_vector', None)
+    if vector is not None:
+        return vector
+    values = {field: getattr(patient, field) for field in INPUT_FIELDS}
+    for field in CAT_FIELDS:
+        answer_code(field, values[field])  # a readable error for answers that are not accepted
+    return fields_vector(values)
+
+
+def patient_vectors(patients) -> np.ndarray:
+    """(n, 15) float64, one patient_vector per row"""
+    vectors = np.empty((len(patients), len(INPUT_FIELDS)))
+    for i, patient in enumerate(patients):
+        vectors[i] = patient_vector(patient)
+    return vectors
+
+
+@dataclass
+class RawFeatures:
+    """Model inputs before encoding: numerics plus imputed answer codes"""
+    num: np.ndarray        # (n, 6) float64, NUM_FEATURES order
+    codes: np.ndarray      # (n, 9) int8 answer codes (see ANSWERS), CAT_FEATURES order
+
+    def __len__(self):
+        return len(self.num)
+
+    @classmethod
+    def from_vectors(cls, vectors: np.ndarray) -> 'RawFeatures':
+        """Split patient_vectors() output and impute its answers"""
+        n_num = len(NUM_FIELDS)
+        return cls(num=np.ascontiguousarray(vectors[:, :n_num]), codes=impute(vectors[:, n_num:].astype(np.int8)))
+
+    @classmethod
+    def from_patients(cls, patients) -> 'RawFeatures':
+        """Extract and impute features from PatientData objects"""
+        return cls.from_vectors(patient_vectors(patients))
+
+    @classmethod
+    def from_answers(cls, num, cat) -> 'RawFeatures':
+        """Numerics plus answer strings (9 columns); "I don't know" is imputed"""
+        return cls(num=np.asarray(num, dtype=np.float64), codes=impute(encode_answers(cat)))
+
+    @classmethod
+    def from_frame(cls, X: pd.DataFrame) -> 'RawFeatures':
+        """Wrap a model input DataFrame (already imputed)"""
+        return cls.from_answers(X[NUM_FEATURES].to_numpy(dtype=np.float64), [X[feature].tolist() for feature in CAT_FEATURES])
+
+    @property
+    def cat(self) -> List[list]:
+        """Answer strings per column ("" for INVALID_CODE)"""
+        return [
+            np.array(ANSWERS[field] + ("",), dtype=object)[self.codes[:, j]].tolist()
+            for j, field in enumerate(CAT_FIELDS)
+        ]
+
+    def take(self, rows) -> 'RawFeatures':
+        """Subset of rows (list of indices)"""
+        return RawFeatures(num=self.num[rows], codes=self.codes[rows])
+
+    def keys(self) -> list:
+        """Canonical hashable key per row: numerics as floats + imputed answer codes"""
+        return [
+            tuple(num_row) + tuple(code_row)
+            for num_row, code_row in zip(self.num.tolist(), self.codes.tolist())
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame in training column order, for models that need one"""
+        frame = dict(zip(NUM_FEATURES, self.num.T))
+        frame.update(zip(CAT_FEATURES, self.cat))
+        return pd.DataFrame(frame, columns=FEATURE_NAMES)
+
+
+class FastEncoder:
+    """
+    A fitted ColumnTransformer([StandardScaler, OneHotEncoder]) as plain arrays.
+
+    Output matches preprocessor.transform(): scaled numerics followed by one
+    one-hot block per categorical column; unknown categories encode as zeros
+    (handle_unknown='ignore').
+    """
+
+    def __init__(self, num_columns, cat_columns, mean, scale, categories):
+        self.num_columns = list(num_columns)
+        self.cat_columns = list(cat_columns)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.categories = [np.asarray(c) for c in categories]
+        self.lookups = [{value: index for index, value in enumerate(c)} for c in self.categories]
+        self.code_map = code_remap(self.lookups)
+        self.offsets = len(self.num_columns) + np.concatenate(
+            [[0], np.cumsum([len(c) for c in self.categories])[:-1]]
+        ).astype(np.int64)
+        self.n_encoded = len(self.num_columns) + sum(len(c) for c in self.categories)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor) -> 'FastEncoder':
+        """Read means, scales and categories off a fitted ColumnTransformer"""
+        num_columns, cat_columns = [], []
+        mean = scale = None
+        categories = []
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == 'drop' or len(columns) == 0:
+                continue
+            if isinstance(transformer, StandardScaler) and not num_columns and not cat_columns:
+                num_columns = list(columns)
+                n = len(columns)
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(n)
+                scale = transformer.scale_ if transformer.with_std else np.ones(n)
+            elif isinstance(transformer, OneHotEncoder) and num_columns and not cat_columns:
+                if transformer.drop is not None or transformer.handle_unknown != 'ignore':
+                    raise ValueError("Only OneHotEncoder(drop=None, handle_unknown='ignore') is supported")
+                cat_columns = list(columns)
+                categories = transformer.categories_
+            else:
+                raise ValueError(f"Unsupported preprocessing step: {name}")
+        if not num_columns or not cat_columns:
+            raise ValueError("Expected a StandardScaler block followed by a OneHotEncoder block")
+        if (num_columns, cat_columns) != (NUM_FEATURES, CAT_FEATURES):
+            raise ValueError("Preprocessor columns do not match the serving feature order")
+        return cls(num_columns, cat_columns, mean, scale, categories)
+
+    def collapse_matrix(self) -> np.ndarray:
+        """(n_encoded, 15) 0/1 matrix summing encoded columns back into their input feature"""
+        matrix = np.zeros((self.n_encoded, len(self.num_columns) + len(self.cat_columns)))
+        n_num = len(self.num_columns)
+        matrix[np.arange(n_num), np.arange(n_num)] = 1.0
+        for j, categories in enumerate(self.categories):
+            matrix[self.offsets[j]:self.offsets[j] + len(categories), n_num + j] = 1.0
+        return matrix
+
+    def same_categories(self, other: 'FastEncoder') -> bool:
+        return self.lookups == other.lookups
+
+    def category_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Answer codes -> one-hot index per column: (n, 9) int64, -1 for categories the model has not seen"""
+        return self.code_map[_CAT_COLUMNS, codes]
+
+    def encode_codes(self, num: np.ndarray, codes: np.ndarray, dtype=np.float64) -> np.ndarray:
+        """Scale numerics and scatter one-hot ones: (n, n_encoded)"""
+        n_rows = len(num)
+        encoded = np.zeros((n_rows, self.n_encoded), dtype=dtype)
+        encoded[:, :len(self.num_columns)] = (num - self.mean) / self.scale
+        rows, columns = np.nonzero(codes >= 0)
+        encoded[rows, self.offsets[columns] + codes[rows, columns]] = 1.0
+        return encoded
+
+    def encode(self, features: RawFeatures, dtype=np.float64) -> np.ndarray:
+        return self.encode_codes(features.num, self.category_codes(features.codes), dtype)
+
+    def encode_patients(self, patients, dtype=np.float64) -> np.ndarray:
+        """PatientData objects -> encoded matrix, same as preprocessor.transform()"""
+        return self.encode(RawFeatures.from_patients(patients), dtype)
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """Drop-in for preprocessor.transform() on a model input DataFrame"""
+        return self.encode(RawFeatures.from_frame(X))
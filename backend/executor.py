@@ -0,0 +1,153 @@
+"""
+HeartCare AI - Inference Executor
+Runs CPU-bound model calls on a worker pool so they never block the event loop
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from model_loader import deserialize
+
+logger = logging.getLogger(__name__)
+
+# Model held by each process-pool worker (loaded once by the pool initializer)
+_worker_model = None
+
+
+def load_and_prepare(model_path: str, prepare=None):
+    """Deserialize the model artifact and optionally convert it (e.g. compile it)"""
+    model = deserialize(model_path)
+    return prepare(model) if prepare is not None else model
+
+
+def _init_worker(load_worker_model):
+    """Process-pool initializer: build the worker's model once"""
+    global _worker_model
+    _worker_model = load_worker_model()
+
+
+def _call_with_worker_model(fn, args):
+    """Process-pool entry point: fn(model, *args) with the worker's own model"""
+    return fn(_worker_model, *args)
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the number of pending jobs has reached max_pending"""
+
+
+class InferenceExecutor:
+    """
+    Bounded worker pool for model calls.
+
+    kind="thread" shares the already-loaded model with the pool threads.
+    kind="process" starts workers that each load the model from model_path,
+    which sidesteps the GIL at the cost of one model copy per worker.
+    At most max_pending jobs may be running or queued; beyond that run()
+    raises ExecutorSaturated so the API can answer with backpressure.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 2, max_pending: int = 32,
+                 timeout_s: float = 30.0):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_s = timeout_s
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._model = None
+        self._pool = None
+
+    def start(self, model, load_worker_model=None):
+        """
+        Create the pool. Process workers call load_worker_model() (a picklable
+        zero-argument callable, e.g. functools.partial(load_and_prepare, path))
+        in their initializer, so they serve the same engine as the parent.
+        """
+        self._model = model
+        self._pool = self._create_pool(load_worker_model)
+        logger.info(f"⚙️ Inference executor started ({self.kind}, {self.workers} workers, max {self.max_pending} pending)")
+
+    def _create_pool(self, load_worker_model):
+        if self.kind == "process":
+            if load_worker_model is None:
+                raise ValueError("Process executor needs a worker model loader")
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(load_worker_model,)
+            )
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+    async def replace(self, model, load_worker_model=None, warmup=None, on_swap=None):
+        """
+        Serve a new model without a gap. A fresh pool is started and, with
+        warmup=(fn, args), every worker runs fn(model, *args) once, while the old
+        pool keeps serving. The swap (plus on_swap(), if given) is then a single
+        step on the event loop: later run() calls go to the new model, and jobs
+        already on the old pool finish there before it is shut down.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._create_pool(load_worker_model)
+        try:
+            if warmup is not None:
+                fn, args = warmup
+                if self.kind == "process":
+                    jobs = [loop.run_in_executor(pool, _call_with_worker_model, fn, args) for _ in range(self.workers)]
+                else:
+                    jobs = [loop.run_in_executor(pool, fn, model, *args) for _ in range(self.workers)]
+                await asyncio.gather(*jobs)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        old_pool, self._pool, self._model = self._pool, pool, model
+        if on_swap is not None:
+            on_swap()
+        if old_pool is not None:
+            await asyncio.to_thread(old_pool.shutdown, wait=True)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn, *args):
+        """Run fn(model, *args) on the pool; raises ExecutorSaturated when full"""
+        # pending is only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self.pending} inference jobs pending")
+
+        loop = asyncio.get_running_loop()
+        if self.kind == "process":
+            future = loop.run_in_executor(self._pool, _call_with_worker_model, fn, args)
+        else:
+            future = loop.run_in_executor(self._pool, fn, self._model, *args)
+
+        # The slot is released when the job really finishes, not when the caller
+        # gives up waiting, so timed-out jobs still count against max_pending
+        self.pending += 1
+        future.add_done_callback(self._job_done)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout_s)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def _job_done(self, future):
+        self.pending -= 1
+        self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,79 @@
+"""
+HeartCare AI - Explanations
+Per-patient SHAP values from TreeExplainer over the calibrated ensemble's forests,
+collapsed from one-hot columns back to the 15 input features
+"""
+
+import logging
+import time
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import RandomForestClassifier
+
+from encoder import INPUT_FIELDS, FastEncoder, RawFeatures
+
+try:
+    import shap
+except ImportError:  # optional dependency: /explain is disabled without it
+    shap = None
+
+logger = logging.getLogger(__name__)
+
+
+class ExplanationUnavailable(Exception):
+    """shap is not installed, or the loaded model has no forests to explain"""
+
+
+class EnsembleExplainer:
+    """
+    SHAP values for the uncalibrated ensemble score (raw_score in inference.Prediction).
+
+    Each calibration fold's forest gets its own shap.TreeExplainer, built once
+    (tree_path_dependent: the background expectation comes from the training
+    cover stored in the trees, so no background data is needed at request time).
+    SHAP values are linear in the model, so averaging the folds' values explains
+    the fold-averaged forest probability. The isotonic calibration on top is
+    monotone but not additive, so calibrated probabilities are not decomposed.
+    """
+
+    def __init__(self, folds):
+        self.folds = folds  # [(FastEncoder, TreeExplainer, collapse matrix)]
+        self.base_value = float(np.mean([positive_class(explainer.expected_value) for _, explainer, _ in folds]))
+
+    @classmethod
+    def from_model(cls, model) -> 'EnsembleExplainer':
+        if shap is None:
+            raise ExplanationUnavailable("shap is not installed (pip install shap)")
+        if not isinstance(model, CalibratedClassifierCV) or len(model.classes_) != 2:
+            raise ExplanationUnavailable("Explanations need the binary CalibratedClassifierCV model")
+
+        start = time.perf_counter()
+        folds = []
+        for fold in model.calibrated_classifiers_:
+            pipeline = fold.estimator
+            forest = pipeline[-1]
+            if not isinstance(forest, RandomForestClassifier):
+                raise ExplanationUnavailable("Explanations need RandomForestClassifier folds")
+            encoder = FastEncoder.from_preprocessor(pipeline.named_steps['preprocessor'])
+            folds.append((encoder, shap.TreeExplainer(forest), encoder.collapse_matrix()))
+        logger.info(f"🔎 SHAP explainers ready for {len(folds)} folds in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return cls(folds)
+
+    def explain(self, features: RawFeatures) -> np.ndarray:
+        """Contributions to the raw score per input feature: (n, 15), rows sum to raw_score - base_value"""
+        contributions = np.zeros((len(features), len(INPUT_FIELDS)))
+        for encoder, explainer, collapse in self.folds:
+            values = explainer.shap_values(encoder.encode(features), check_additivity=False)
+            contributions += positive_class(values) @ collapse
+        return contributions / len(self.folds)
+
+
+def positive_class(values):
+    """Class-1 slice of shap output (list per class, (..., 2) array, or already 1-D)"""
+    if isinstance(values, list):
+        return np.asarray(values[1])
+    values = np.asarray(values)
+    if values.ndim == 3 or (values.ndim == 1 and values.shape == (2,)):
+        return values[..., 1]
+    return values
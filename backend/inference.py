@@ -0,0 +1,146 @@
+"""
+HeartCare AI - Inference
+Single-pass scoring for the calibrated Random Forest ensemble
+"""
+
+import time
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.pipeline import Pipeline
+
+from encoder import FastEncoder, RawFeatures
+
+# Per model: each fold's FastEncoder, or None when a fold's pipeline is not supported
+_fold_encoders = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class Prediction:
+    """Scores for N rows, produced by one walk over the ensemble"""
+    probability: np.ndarray  # calibrated P(cardiac arrest), shape (n,)
+    label: np.ndarray        # predicted class, shape (n,)
+    raw_score: np.ndarray    # uncalibrated P(cardiac arrest) averaged over folds, shape (n,)
+
+    def __len__(self):
+        return len(self.probability)
+
+    def __getitem__(self, rows) -> 'Prediction':
+        """Row subset (index with a slice or array to keep the arrays 1-D)"""
+        return Prediction(self.probability[rows], self.label[rows], self.raw_score[rows])
+
+
+def predict(model, X, timings: dict = None) -> Prediction:
+    """
+    Score X once and return probability, label and raw score together.
+
+    Calling predict_proba() and then predict() on a CalibratedClassifierCV walks
+    every tree of every fold twice. Here each fold's forest runs once, its output
+    is kept as the raw score, and the isotonic calibrators are applied to it the
+    same way sklearn does, so probability and label match predict_proba/predict.
+
+    Alternative engines (e.g. compiled_model.CompiledEnsemble) provide their own
+    predict_scores(X) and are used as-is. X may be a DataFrame or RawFeatures.
+    RawFeatures go straight from answer codes to each fold's encoded matrix
+    (FastEncoder, same values as the fold's ColumnTransformer); other sklearn
+    models get them converted to a DataFrame.
+
+    If timings is given, the seconds spent encoding the input ('encode') and
+    evaluating the model ('model') are stored in it.
+    """
+    if hasattr(model, 'predict_scores'):
+        return model.predict_scores(X, timings=timings)
+    start = time.perf_counter()
+    single_pass = isinstance(model, CalibratedClassifierCV) and _supports_single_pass(model)
+    encoders = fold_encoders(model) if single_pass and isinstance(X, RawFeatures) else None
+    if encoders is not None:
+        X = [encoder.encode(X) for encoder in encoders]
+    elif isinstance(X, RawFeatures):
+        X = X.to_frame()
+    encoded = time.perf_counter()
+
+    if single_pass:
+        scores = _predict_calibrated(model, X, encoders is not None)
+    else:
+        proba = model.predict_proba(X)
+        positive = proba[:, -1]
+        scores = Prediction(
+            probability=positive,
+            label=model.classes_[np.argmax(proba, axis=1)],
+            raw_score=positive,
+        )
+    if timings is not None:
+        timings['encode'] = encoded - start
+        timings['model'] = time.perf_counter() - encoded
+    return scores
+
+
+def predict_timed(model, X):
+    """predict() plus its per-stage durations in seconds, for callers on another thread or process"""
+    timings = {}
+    return predict(model, X, timings), timings
+
+
+def _supports_single_pass(model) -> bool:
+    """Binary classifiers whose folds expose estimator + calibrators"""
+    return len(model.classes_) == 2 and all(
+        hasattr(cc, 'estimator') and hasattr(cc, 'calibrators')
+        for cc in model.calibrated_classifiers_
+    )
+
+
+def fold_encoders(model):
+    """FastEncoder of each calibration fold's preprocessor (built once per model), or None if unsupported"""
+    try:
+        return _fold_encoders[model]
+    except KeyError:
+        pass
+    encoders = []
+    for fold in model.calibrated_classifiers_:
+        pipeline = fold.estimator
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            encoders = None
+            break
+        try:
+            encoders.append(FastEncoder.from_preprocessor(pipeline[0]))
+        except (ValueError, AttributeError):
+            encoders = None
+            break
+    _fold_encoders[model] = encoders
+    return encoders
+
+
+def _predict_calibrated(model, X, pre_encoded: bool = False) -> Prediction:
+    """
+    Mirror CalibratedClassifierCV.predict_proba for the binary case, keeping raw scores.
+    With pre_encoded, X is a list of encoded matrices, one per fold, for the folds' classifiers.
+    """
+    folds = model.calibrated_classifiers_
+    n_rows = len(X[0]) if pre_encoded else len(X)
+    mean_proba = np.zeros((n_rows, 2))
+    raw_score = np.zeros(n_rows)
+
+    for i, fold in enumerate(folds):
+        if pre_encoded:
+            scores = fold.estimator[-1].predict_proba(X[i])[:, 1]
+        else:
+            scores = fold.estimator.predict_proba(X)[:, 1]
+        raw_score += scores
+
+        proba = np.empty((n_rows, 2))
+        proba[:, 1] = fold.calibrators[0].predict(scores)
+        proba[:, 0] = 1.0 - proba[:, 1]
+        proba[np.isnan(proba)] = 0.5
+        proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+        mean_proba += proba
+
+    mean_proba /= len(folds)
+    raw_score /= len(folds)
+
+    return Prediction(
+        probability=mean_proba[:, 1],
+        label=model.classes_[np.argmax(mean_proba, axis=1)],
+        raw_score=raw_score,
+    )
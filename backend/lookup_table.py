@@ -0,0 +1,142 @@
+"""
+HeartCare AI - Risk Lookup Table
+Precomputed calibrated risk on a quantized input grid, answered by index lookup
+"""
+
+import itertools
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from encoder import CAT_FEATURES, NUM_FEATURES, RawFeatures, code_remap
+from inference import Prediction
+
+logger = logging.getLogger(__name__)
+
+# Probabilities are stored as uint16 fractions of this value
+PROBABILITY_SCALE = 65535
+
+TABLE_FORMAT_VERSION = 1
+
+
+def metadata_path(table_path) -> Path:
+    """JSON sidecar stored next to the .npy table"""
+    return Path(table_path).with_suffix('.json')
+
+
+class RiskTable:
+    """
+    Calibrated P(cardiac arrest) for every categorical combination on a numeric grid.
+
+    values has shape (n_combinations, *grid sizes) in NUM_FEATURES order, with the
+    categorical combination as a mixed-radix index over CAT_FEATURES. Numeric inputs
+    are clamped to the grid, which is exact when the grid spans the model's split
+    thresholds (the trees are constant beyond them). Between grid points the table
+    answers with the nearest point or with multilinear interpolation.
+    """
+
+    def __init__(self, values, grids, categories, classes, interpolation: str = "linear",
+                 metadata: dict = None):
+        if interpolation not in ("linear", "nearest"):
+            raise ValueError(f"Unknown interpolation: {interpolation}")
+        self.values = values                  # uint16 array (may be a read-only memmap)
+        self.grids = [np.asarray(g, dtype=np.float64) for g in grids]
+        self.categories = [list(c) for c in categories]
+        self.classes_ = np.asarray(classes)
+        self.interpolation = interpolation
+        self.metadata = metadata or {}
+
+        self.lookups = [{value: index for index, value in enumerate(c)} for c in self.categories]
+        self.code_map = code_remap(self.lookups)
+        sizes = [len(c) for c in self.categories]
+        self.strides = np.array([int(np.prod(sizes[j + 1:])) for j in range(len(sizes))], dtype=np.int64)
+        self.n_combinations = int(np.prod(sizes))
+
+    @classmethod
+    def load(cls, path, interpolation: str = "linear", mmap: bool = True) -> 'RiskTable':
+        """Open a table written by build_lookup_table.py (memory-mapped read-only by default)"""
+        path = Path(path)
+        with open(metadata_path(path)) as f:
+            metadata = json.load(f)
+        if metadata.get("format") != TABLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported lookup table format: {metadata.get('format')}")
+        values = np.load(path, mmap_mode='r' if mmap else None)
+        table = cls(
+            values=values,
+            grids=[metadata["numeric"][feature] for feature in NUM_FEATURES],
+            categories=[metadata["categorical"][feature] for feature in CAT_FEATURES],
+            classes=metadata["classes"],
+            interpolation=interpolation,
+            metadata=metadata,
+        )
+        logger.info(
+            f"✅ Lookup table loaded: {values.shape[0]} combinations x "
+            f"{'x'.join(str(len(g)) for g in table.grids)} grid ({values.nbytes / 1e6:.1f} MB)"
+        )
+        return table
+
+    def combination_index(self, codes) -> np.ndarray:
+        """Answer codes (n, 9) -> table row; raises ValueError for categories the table lacks"""
+        positions = self.code_map[np.arange(len(CAT_FEATURES)), codes]
+        missing = np.argwhere(positions < 0)
+        if len(missing):
+            row, column = missing[0]
+            raise ValueError(f"{CAT_FEATURES[column]} answer code {int(codes[row, column])} is not in the lookup table")
+        return positions @ self.strides
+
+    def probability(self, features: RawFeatures) -> np.ndarray:
+        combination = self.combination_index(features.codes)
+        lower, fraction = [], []
+        for j, grid in enumerate(self.grids):
+            x = np.clip(features.num[:, j], grid[0], grid[-1])
+            if len(grid) == 1:
+                lower.append(np.zeros(len(x), dtype=np.int64))
+                fraction.append(np.zeros(len(x)))
+                continue
+            i = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, len(grid) - 2)
+            lower.append(i)
+            fraction.append((x - grid[i]) / (grid[i + 1] - grid[i]))
+
+        if self.interpolation == "nearest":
+            positions = [i + (f >= 0.5) for i, f in zip(lower, fraction)]
+            return self.values[(combination, *positions)] / PROBABILITY_SCALE
+
+        # Multilinear: weighted sum over the 2^6 corners of the enclosing cell
+        probability = np.zeros(len(combination))
+        for corner in itertools.product((0, 1), repeat=len(self.grids)):
+            weight = np.ones(len(combination))
+            positions = []
+            for step, i, f, grid in zip(corner, lower, fraction, self.grids):
+                weight *= f if step else 1.0 - f
+                positions.append(np.minimum(i + step, len(grid) - 1))
+            probability += weight * self.values[(combination, *positions)]
+        return probability / PROBABILITY_SCALE
+
+    def predict_scores(self, X, timings: dict = None) -> Prediction:
+        """
+        Probability and label by table lookup (see inference.predict). The table
+        only stores calibrated probabilities, so raw_score repeats the probability.
+        """
+        start = time.perf_counter()
+        if isinstance(X, pd.DataFrame):
+            X = RawFeatures.from_frame(X)
+        probability = self.probability(X)
+        if timings is not None:
+            timings['model'] = time.perf_counter() - start
+        return Prediction(
+            probability=probability,
+            label=self.classes_[(probability > 0.5).astype(np.int64)],
+            raw_score=probability,
+        )
+
+    def predict_proba(self, X) -> np.ndarray:
+        probability = self.predict_scores(X).probability
+        return np.column_stack([1.0 - probability, probability])
+
+    def predict(self, X) -> np.ndarray:
+        return self.predict_scores(X).label
+
@@ -3,17 +3,46 @@ HeartCare AI - FastAPI Backend
 Lightweight API for cardiac arrest risk prediction
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
-from typing import Optional
-import joblib
-import pandas as pd
+from fastapi.responses import FileResponse, PlainTextResponse
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError, model_validator
+from typing import Any, Dict, List, Literal, Optional
+from dataclasses import dataclass
+from contextlib import contextmanager
+import numpy as np
 from pathlib import Path
+import asyncio
+import functools
+import json
 import logging
 import os
+import time
+
+from audit import AuditLog
+from batcher import MicroBatcher
+from cache import PredictionCache
+from compiled_model import CompiledEnsemble, load_shared
+from drift import DriftMonitor, load_reference
+from encoder import IMPUTED_CODES, INPUT_FIELDS, RawFeatures, fields_vector, patient_vectors
+from executor import ExecutorSaturated, InferenceExecutor, load_and_prepare
+from explain import EnsembleExplainer, ExplanationUnavailable
+import importance
+from inference import Prediction, predict_timed
+from lookup_table import RiskTable
+from metrics import (
+    ERRORS, MODEL_LOAD_SECONDS, MODEL_RELOADS, MODEL_SECONDS, REGISTRY, REJECTIONS, REQUEST_SECONDS, REQUESTS,
+    STAGE_SECONDS
+)
+import model_loader
+from ndjson import DuplexStreamingResponse, iter_lines
+from profiler import StackSampler
+from registry import ModelRegistry, version_label
+import risk
+from settings import settings
+from shadow import ShadowScorer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,64 +70,381 @@ os.environ['HUGGINGFACE_HUB_CACHE'] = '/tmp/huggingface/hub'
 
 # Load model at startup
 model = None
+model_path = None
+model_info = {}
+# Version label of the serving model in logs and metrics (v<N>, or its hash prefix)
+serving_version = None
+
+# Worker pool for model calls (started once the model is loaded)
+inference_executor = InferenceExecutor(
+    kind=settings.executor_kind,
+    workers=settings.executor_workers,
+    max_pending=settings.executor_max_pending,
+    timeout_s=settings.executor_timeout_s
+)
+
+# Exact-result cache of model scores, keyed on the imputed feature vector
+prediction_cache = PredictionCache(
+    max_size=settings.cache_max_size,
+    ttl_s=settings.cache_ttl_s
+) if settings.cache_enabled else None
+
+# Global feature importance of the loaded model (read or computed once at startup)
+feature_importance = None
+
+# SHAP explainer over the model's forests (built at startup when shap is installed)
+explainer = None
+explainer_error = None
+
+# SHAP calls get their own bounded thread pool: the explainers live in this process
+# even when model calls go to process workers. A full queue is answered like /predict's.
+explain_executor = InferenceExecutor(
+    kind="thread",
+    workers=settings.executor_workers,
+    max_pending=settings.explain_max_pending,
+    timeout_s=settings.executor_timeout_s
+)
+
+# Explanations are cached under the same keys as predictions
+explanation_cache = PredictionCache(
+    max_size=settings.explain_cache_size,
+    ttl_s=settings.cache_ttl_s
+) if settings.cache_enabled else None
+
+# Hot reload: background task polling the registry refs, the candidate being
+# shadow-scored, and artifacts that failed to load (not retried until restart)
+registry_watcher = None
+shadow = None
+failed_loads = set()
+
+# Live input/score histograms against the training data profile (see drift.py)
+drift_monitor = None
+
+# Batched, append-only record of every scored prediction (see audit.py)
+audit_log = AuditLog(
+    Path(__file__).parent / settings.audit_path,
+    max_queue=settings.audit_max_queue,
+    batch_size=settings.audit_batch_size,
+    flush_interval_s=settings.audit_flush_interval_s,
+    overflow=settings.audit_overflow
+) if settings.audit_enabled else None
+
+# Upper bound on rows accepted by /predict/batch in one request
+MAX_BATCH_SIZE = 10000
+
+
+@dataclass
+class ServingModel:
+    """One artifact plus everything derived from it, built off the event loop before it serves"""
+    model: object
+    path: Path
+    sha256: str
+    info: dict
+    serving_model: object      # what the executor runs: the model, or its compiled/table engine
+    load_worker_model: object  # rebuilds serving_model in process-executor workers
+    feature_importance: Optional[dict] = None
+    explainer: object = None
+    explainer_error: Optional[str] = None
+
+
+def prepare_model(ref: str = None, extras: bool = True) -> ServingModel:
+    """
+    Load the configured model (or the artifact a store ref points to) for the
+    configured engine; with extras, also its feature importance and explainer.
+    Blocking, so callers run it in a thread.
+    """
+    engine = settings.inference_engine
+    if settings.model_variant != "full" and engine != "sklearn":
+        # The compiled engine and the lookup table are built from the full ensemble
+        logger.warning(f"⚠️ The {engine} engine needs the full model; serving the {settings.model_variant} model as-is")
+        engine = "sklearn"
+
+    if engine == "compiled" and settings.compiled_mmap:
+        # Shared serving mode: this process never unpickles the forest, it maps
+        # the exported node arrays that every worker process shares
+        timings = {}
+        path, sha256, source = model_loader.resolve_model(None, timings, ref=ref)
+        export_root = model_loader.default_store().root / "compiled"
+        loaded_model = load_shared(path, sha256, export_root)
+    else:
+        loaded = model_loader.load_model(ref=ref)
+        loaded_model, path, sha256, source, timings = (
+            loaded.model, loaded.path, loaded.sha256, loaded.source, loaded.timings_ms
+        )
+    info = {
+        "sha256": sha256, "source": source, "variant": settings.model_variant,
+        "version": ModelRegistry().version_of(sha256), "load_ms": timings
+    }
+
+    # Optionally serve the flat-array compiled ensemble or the precomputed
+    # lookup table instead of sklearn; process workers rebuild the same engine
+    serving_model = loaded_model
+    load_worker_model = functools.partial(load_and_prepare, path)
+    if engine == "compiled" and settings.compiled_mmap:
+        load_worker_model = functools.partial(CompiledEnsemble.load, loaded_model.export_dir)
+    elif engine == "compiled":
+        serving_model = CompiledEnsemble.from_model(loaded_model)
+        load_worker_model = functools.partial(load_and_prepare, path, CompiledEnsemble.from_model)
+    elif engine == "table":
+        table_path = Path(__file__).parent / settings.table_path
+        serving_model = RiskTable.load(table_path, settings.table_interpolation)
+        load_worker_model = functools.partial(RiskTable.load, table_path, settings.table_interpolation)
+        if serving_model.metadata.get("model_sha256") != sha256:
+            logger.warning("⚠️ Lookup table was built from a different model file; rebuild it with build_lookup_table.py")
+
+    prepared = ServingModel(
+        model=loaded_model, path=path, sha256=sha256, info=info,
+        serving_model=serving_model, load_worker_model=load_worker_model
+    )
+    if extras:
+        prepared.feature_importance = compute_feature_importance(loaded_model, path, sha256)
+        if settings.explain_enabled:
+            prepared.explainer, prepared.explainer_error = build_explainer(loaded_model)
+    return prepared
+
+
+def activate_model(prepared: ServingModel):
+    """Make a prepared model the one every request sees (a single synchronous step)"""
+    global model, model_path, model_info, serving_version, feature_importance, explainer, explainer_error
+    model, model_path, model_info = prepared.model, prepared.path, prepared.info
+    serving_version = version_label(model_info["version"], model_info["sha256"])
+    feature_importance = prepared.feature_importance
+    explainer, explainer_error = prepared.explainer, prepared.explainer_error
+
+    for phase, ms in model_info["load_ms"].items():
+        MODEL_LOAD_SECONDS.set(ms / 1000, phase=phase)
+
+    # Cached scores belong to this exact model file
+    if prediction_cache is not None:
+        prediction_cache.bind(prepared.sha256)
+    if explanation_cache is not None:
+        explanation_cache.bind(prepared.sha256)
+    # Score histograms describe one model; input histograms carry over
+    if drift_monitor is not None:
+        drift_monitor.reset_scores()
+
 
 @app.on_event("startup")
 async def load_model():
-    """Load the trained model from Hugging Face"""
-    global model
+    """Load the trained model (local store first, Hugging Face only if enabled), then watch the registry"""
+    global registry_watcher, drift_monitor
     try:
-        logger.info("📥 Loading model from Hugging Face: ZainShahHere/cardiac_arrest_model")
-        
-        # Import after setting environment variables
-        from huggingface_hub import hf_hub_download
-        
-        # Download model from your Hugging Face repository
-        # This will use the /tmp cache we configured above
-        model_path = hf_hub_download(
-            repo_id="ZainShahHere/cardiac_arrest_model",
-            filename="cardiac_arrest_model.pkl",
-            repo_type="model"
-        )
-        
-        logger.info(f"✅ Model downloaded to: {model_path}")
-        model = joblib.load(model_path)
-        logger.info("✅ Model successfully loaded from Hugging Face!")
+        prepared = await asyncio.to_thread(prepare_model)
+        activate_model(prepared)
+        inference_executor.start(prepared.serving_model, prepared.load_worker_model)
+        explain_executor.start(None)
         
     except Exception as e:
         logger.error(f"❌ Failed to load model: {e}")
         logger.error(f"❌ Error type: {type(e).__name__}")
         import traceback
         logger.error(f"❌ Full traceback:\n{traceback.format_exc()}")
-        raise RuntimeError(f"Could not load model from HuggingFace: {str(e)}")
+        raise RuntimeError(f"Could not load model: {str(e)}")
+
+    drift_monitor = await asyncio.to_thread(load_drift_monitor)
+    if audit_log is not None:
+        audit_log.start()
+    if settings.model_path:
+        logger.info("ℹ️ HEARTCARE_MODEL_PATH is set, registry hot reload is off")
+    elif settings.registry_poll_s > 0:
+        registry_watcher = asyncio.create_task(watch_registry())
+
+
+def compute_feature_importance(source, model_path, model_sha256: str):
+    """Importances persisted next to the artifact in the store; computed on first load only"""
+    root = model_loader.default_store().root / "importance"
+    # The shared compiled engine has no forests in memory; the artifact is read only if needed
+    source_model = source if not isinstance(source, CompiledEnsemble) else None
+    try:
+        return importance.load_or_compute(model_path, model_sha256, root, source_model)
+    except ValueError as e:
+        logger.warning(f"⚠️ Feature importance unavailable: {e}")
+        return None
+
+
+def build_explainer(source):
+    """(SHAP explainers, None), or (None, reason) if they cannot be built"""
+    try:
+        return EnsembleExplainer.from_model(source), None
+    except ExplanationUnavailable as e:
+        logger.info(f"ℹ️ Explanations disabled: {e}")
+        return None, str(e)
+
+
+def load_drift_monitor():
+    """DriftMonitor over the reference profile, or None if drift monitoring is off or has no profile"""
+    if not settings.drift_enabled:
+        return None
+    path = Path(__file__).parent / settings.drift_reference_path
+    if not path.exists():
+        logger.info(f"ℹ️ No drift reference at {path.name}; build one with drift.py to enable /drift")
+        return None
+    try:
+        monitor = DriftMonitor(load_reference(path), settings.drift_window)
+    except (ValueError, KeyError) as e:
+        logger.warning(f"⚠️ Drift monitoring disabled: {e}")
+        return None
+    logger.info(f"📐 Drift monitoring against {path.name} ({monitor.reference['rows']} reference rows)")
+    return monitor
+
+
+def warmup_features(rows: int = 8) -> RawFeatures:
+    """Typical patients (mid-range numerics, imputation defaults) run through a new model before it serves"""
+    num = np.column_stack([
+        np.linspace(25, 80, rows), np.full(rows, 25.0), np.full(rows, 190.0),
+        np.full(rows, 7.0), np.full(rows, 125.0), np.full(rows, 95.0)
+    ])
+    return RawFeatures(num=num, codes=np.tile(IMPUTED_CODES, (rows, 1)))
+
+
+async def reload_model() -> bool:
+    """Load the model the serving ref now points to, warm it on a new pool and swap it in"""
+    start = time.perf_counter()
+    previous = serving_version
+    prepared = await asyncio.to_thread(prepare_model)
+    if prepared.sha256 == model_info.get("sha256"):
+        return False
+    # Requests keep being served by the old model until the swap; jobs already
+    # running on it finish before its pool is shut down
+    await inference_executor.replace(
+        prepared.serving_model, prepared.load_worker_model,
+        warmup=(predict_timed, (warmup_features(),)),
+        on_swap=functools.partial(activate_model, prepared)
+    )
+    MODEL_RELOADS.inc(result="swapped")
+    logger.info(f"🔄 Now serving {serving_version} (was {previous}), loaded and warmed in {time.perf_counter() - start:.1f}s")
+    return True
+
+
+async def sync_shadow(registry: ModelRegistry):
+    """Start, replace or stop shadow scoring to match the registry's candidate ref"""
+    global shadow
+    candidate_sha256 = None
+    if settings.shadow_sample_rate > 0:
+        candidate_sha256 = await asyncio.to_thread(registry.store.read_ref, registry.candidate_ref)
+        if candidate_sha256 in (model_info.get("sha256"), *failed_loads):
+            candidate_sha256 = None
+    if candidate_sha256 == (shadow.sha256 if shadow is not None else None):
+        return
+
+    if shadow is not None:
+        previous, shadow = shadow, None
+        await previous.stop()
+    if candidate_sha256 is None:
+        return
+    try:
+        prepared = await asyncio.to_thread(prepare_model, registry.candidate_ref, False)
+    except Exception:
+        failed_loads.add(candidate_sha256)
+        raise
+    # A lookup table would answer for the candidate exactly as for the serving model
+    candidate = prepared.model if settings.inference_engine == "table" else prepared.serving_model
+    shadow = ShadowScorer(
+        candidate, version_label(prepared.info["version"], prepared.sha256), prepared.sha256,
+        settings.shadow_sample_rate, settings.shadow_max_pending, settings.executor_timeout_s,
+        settings.shadow_log_every
+    )
+    logger.info(f"🌓 Shadow scoring {shadow.version} on {settings.shadow_sample_rate:.0%} of model calls")
+
+
+async def sync_registry():
+    """One poll: hot-swap a newly promoted serving model, then sync the shadow candidate"""
+    registry = ModelRegistry()
+    serving_sha256 = await asyncio.to_thread(registry.store.read_ref, registry.name)
+    if serving_sha256 is not None and serving_sha256 != model_info.get("sha256") and serving_sha256 not in failed_loads:
+        try:
+            await reload_model()
+        except Exception as e:
+            failed_loads.add(serving_sha256)
+            MODEL_RELOADS.inc(result="failed")
+            logger.error(f"❌ Hot reload of {serving_sha256[:12]} failed, still serving {serving_version}: {e}")
+    await sync_shadow(registry)
+
+
+async def watch_registry():
+    """Poll the store refs every HEARTCARE_REGISTRY_POLL_S seconds"""
+    logger.info(f"👀 Watching {model_loader.ref_name()} for new versions every {settings.registry_poll_s:g}s")
+    while True:
+        try:
+            await sync_registry()
+        except Exception as e:
+            logger.error(f"❌ Registry sync failed: {e}")
+        await asyncio.sleep(settings.registry_poll_s)
+
+
+@app.on_event("shutdown")
+async def stop_executor():
+    """Stop the registry watcher, shadow scoring, the request batcher and the inference pool; flush the audit log"""
+    global registry_watcher, shadow
+    if registry_watcher is not None:
+        registry_watcher.cancel()
+        registry_watcher = None
+    if shadow is not None:
+        await shadow.stop()
+        shadow = None
+    if request_batcher is not None:
+        await request_batcher.stop()
+    inference_executor.shutdown()
+    explain_executor.shutdown()
+    if audit_log is not None:
+        await audit_log.stop()
 
 
 # ============================================
 # DATA MODELS
 # ============================================
 
+YesNo = Literal["Yes", "No", "I don't know"]
+Level = Literal["High", "Moderate", "Low", "I don't know"]
+
+
 class PatientData(BaseModel):
-    """15 input features for prediction"""
+    """
+    15 input features for prediction
+    Categorical answers must be one of encoder.ANSWERS (anything else is a 422);
+    validation also turns the patient into its numeric feature vector, so later
+    stages work on integer answer codes instead of strings
+    """
     # Personal (3)
     age: int = Field(..., ge=1, le=120)
-    gender: str
+    gender: Literal["Male", "Female", "I don't know"]
     bmi: float = Field(..., ge=10.0, le=60.0)
     
     # Lifestyle (6)
-    smoker: str
-    physical_activity: str
-    diet: str
-    family_history: str
-    stress_level: str
-    alcohol_consumption: str
+    smoker: YesNo
+    physical_activity: Level
+    diet: Literal["Healthy", "Unhealthy", "I don't know"]
+    family_history: YesNo
+    stress_level: Level
+    alcohol_consumption: YesNo
     
     # Clinical (6)
-    diabetes: str
-    hypertension: str
+    diabetes: YesNo
+    hypertension: YesNo
     cholesterol_level: float = 180
     sleep_hours: float = Field(..., ge=0.0, le=24.0)
     blood_pressure: int = Field(..., ge=60, le=200)
     blood_sugar: float = 90
 
+    _vector: Optional[np.ndarray] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def encode_features(self) -> 'PatientData':
+        self._vector = fields_vector(self.__dict__)
+        return self
+
+    @property
+    def feature_vector(self) -> Optional[np.ndarray]:
+        """Numerics then raw answer codes, in encoder.INPUT_FIELDS order"""
+        return self._vector
+
+
+class Explanation(BaseModel):
+    """SHAP decomposition of the uncalibrated model score (0-1) over the 15 inputs"""
+    base_value: float
+    raw_score: float
+    contributions: Dict[str, float]  # input field -> contribution, largest effect first
+
 
 class PredictionResponse(BaseModel):
     """Prediction output"""
@@ -108,111 +454,340 @@ class PredictionResponse(BaseModel):
     confidence: float
     message: str
     recommendations: list
+    explanation: Optional[Explanation] = None
+
+
+class ExplainRequest(BaseModel):
+    """Patients to explain in one call"""
+    patients: List[PatientData] = Field(..., min_length=1, max_length=settings.explain_max_batch)
+
+
+class ExplainResponse(BaseModel):
+    """Explanations in request order"""
+    explanations: List[Explanation]
+
+
+class BatchPredictionRequest(BaseModel):
+    """Batch input: rows are validated one by one so a bad row cannot fail the batch"""
+    patients: List[Dict[str, Any]] = Field(..., max_length=MAX_BATCH_SIZE)
+
+
+class BatchPredictionItem(BaseModel):
+    """Per-row batch output: either a result or an error"""
+    index: int
+    result: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+
+class BatchPredictionResponse(BaseModel):
+    """Batch prediction output"""
+    results: List[BatchPredictionItem]
+    succeeded: int
+    failed: int
 
 
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
 
-def impute_categorical(value: str, default: str = 'No') -> str:
-    """Replace 'I don't know' with default value"""
-    return default if value == "I don't know" else value
-
-
 def adjust_risk(predicted_risk, patient_data):
     """
     Balanced risk adjustment that respects model output while considering key factors.
-    Strategy: Start with model, then apply small corrections based on critical factors.
+    Strategy: Start with model, then apply small corrections based on critical factors
+    (see risk.py for the rules; this is the one-patient form).
     
     predicted_risk: float (0-100) - raw model output (PRIMARY source of truth)
     patient_data: PatientData object with all health information
     """
-    
-    # Count the 6 MOST CRITICAL risk factors
-    critical_count = 0
-    if patient_data.family_history == "Yes": critical_count += 1
-    if patient_data.diabetes == "Yes": critical_count += 1
-    if patient_data.hypertension == "Yes": critical_count += 1
-    if patient_data.smoker == "Yes": critical_count += 1
-    if patient_data.age >= 65: critical_count += 1
-    if patient_data.cholesterol_level >= 240: critical_count += 1
-    
-    # Count protective factors (good health indicators)
-    protective_count = 0
-    if patient_data.age < 40: protective_count += 1
-    if patient_data.physical_activity == "High": protective_count += 1
-    if patient_data.diet == "Healthy": protective_count += 1
-    if patient_data.smoker == "No": protective_count += 1
-    if patient_data.bmi < 25: protective_count += 1
-    if patient_data.stress_level == "Low": protective_count += 1
-    
-    # Calculate adjustment factor (subtle, not aggressive)
-    # Range: 0.8 to 1.2 (only ±20% max adjustment)
-    adjustment_factor = 1.0
-    
-    # If many critical factors BUT model says low risk → slight increase
-    if critical_count >= 4 and predicted_risk < 50:
-        adjustment_factor = 1.15  # Boost by 15%
-    elif critical_count >= 3 and predicted_risk < 40:
-        adjustment_factor = 1.10  # Boost by 10%
-    
-    # If many protective factors BUT model says high risk → slight decrease
-    elif protective_count >= 5 and predicted_risk > 60:
-        adjustment_factor = 0.85  # Reduce by 15%
-    elif protective_count >= 4 and predicted_risk > 50:
-        adjustment_factor = 0.90  # Reduce by 10%
-    
-    # If mixed signals (some critical + some protective) → trust model more
-    elif critical_count >= 2 and protective_count >= 3:
-        adjustment_factor = 1.0  # No adjustment, trust model
-    
-    # Apply adjustment
-    adjusted_risk = predicted_risk * adjustment_factor
-    
-    # Safety bounds: never go below 10% or above 95%
-    # (even perfect health has some risk, even worst health isn't 100%)
-    adjusted_risk = min(max(adjusted_risk, 10), 95)
-    
-    return adjusted_risk
+    return float(risk.adjust_risk([predicted_risk], risk.patient_columns([patient_data]))[0])
 
 def risk_level(adjusted_risk):
-    if adjusted_risk >= 70:
-        return "High"
-    elif adjusted_risk >= 40:
-        return "Moderate"
-    else:
-        return "Low"
+    return str(risk.risk_levels([adjusted_risk])[0])
+
 
 def get_risk_message(risk_pct: int, patient: PatientData) -> tuple:
     """Generate personalized message and recommendations"""
-    recommendations = []
-    if risk_pct < 40:
-        message = "🎉 Great news! Your heart health looks good. Keep up the healthy lifestyle!"
-        recommendations.append("✓ Continue your current healthy habits")
-        recommendations.append("✓ Annual health checkups recommended")
-    elif risk_pct < 70:
-        message = "⚠️ Moderate risk detected. Some lifestyle improvements may help."
-        recommendations.append("⚕️ Schedule a medical checkup soon")
-        recommendations.append("📊 Monitor blood pressure and cholesterol regularly")
-        recommendations.append("🏃 Increase physical activity to 30+ mins daily")
-    else:
-        message = "🚨 High risk detected. Please consult a healthcare professional immediately."
-        recommendations.append("🚨 URGENT: Schedule medical consultation ASAP")
-        recommendations.append("💊 Take prescribed medications regularly")
-        recommendations.append("⚠️ Monitor symptoms: chest pain, shortness of breath")
-    if patient.smoker == "Yes":
-        recommendations.append("🚭 Quit smoking - critical for heart health")
-    if patient.physical_activity == "Low":
-        recommendations.append("🏃‍♂️ Start with 15-min daily walks")
-    if patient.diet == "Unhealthy":
-        recommendations.append("🥗 Focus on fruits, vegetables, whole grains")
-    if patient.stress_level == "High":
-        recommendations.append("🧘 Practice stress management techniques")
-    if patient.bmi >= 30:
-        recommendations.append("⚖️ Weight management can reduce risk significantly")
-    if patient.sleep_hours < 6:
-        recommendations.append("😴 Aim for 7-9 hours of sleep nightly")
-    return message, recommendations
+    return risk.API_RECOMMENDATIONS.message(risk_pct, patient)
+
+
+# ============================================
+# BATCH HELPERS
+# ============================================
+
+@contextmanager
+def backpressure():
+    """Turn a full inference queue into 429/503 + Retry-After, and a timed-out model call into 503"""
+    try:
+        yield
+    except ExecutorSaturated:
+        REJECTIONS.inc(reason="saturated")
+        raise HTTPException(
+            status_code=settings.executor_reject_status,
+            detail="Inference queue is full, please retry shortly",
+            headers={"Retry-After": str(settings.executor_retry_after_s)}
+        )
+    except asyncio.TimeoutError:
+        REJECTIONS.inc(reason="timeout")
+        raise HTTPException(status_code=503, detail="Inference timed out")
+
+
+async def run_model(features: RawFeatures):
+    """Run single-pass inference on the worker pool, turning saturation into backpressure"""
+    version = serving_version
+    with backpressure():
+        scores, timings = await inference_executor.run(predict_timed, features)
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    model_seconds = sum(timings.values())
+    MODEL_SECONDS.observe(model_seconds, version=version, role="serving")
+    if shadow is not None:
+        # Sampled calls are re-scored on the candidate in the background
+        shadow.offer(features, scores, model_seconds, version)
+    return scores
+
+
+async def score_features(features: RawFeatures, model_call=run_model) -> Prediction:
+    """Score rows through the prediction cache; only unseen feature vectors reach model_call"""
+    if prediction_cache is None:
+        return await model_call(features)
+
+    keys = features.keys()
+    cached = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, value in enumerate(cached) if value is None]
+    if missing:
+        # A hot reload during the model call rebinds the cache; these scores are then not kept
+        fingerprint = prediction_cache.fingerprint
+        fresh = await model_call(features if len(missing) == len(keys) else features.take(missing))
+        for j, i in enumerate(missing):
+            cached[i] = (float(fresh.probability[j]), fresh.label[j], float(fresh.raw_score[j]))
+            prediction_cache.put(keys[i], cached[i], fingerprint)
+
+    probability, label, raw_score = zip(*cached)
+    return Prediction(
+        probability=np.array(probability),
+        label=np.array(label),
+        raw_score=np.array(raw_score)
+    )
+
+
+def serving_model_ref() -> tuple:
+    """
+    (version label, sha256) of the model serving right now, for the audit log.
+    Read it right before scoring: a hot reload swaps the model and these globals
+    in one step, and a model call is submitted to the pool without yielding first.
+    """
+    return serving_version, model_info.get("sha256")
+
+
+async def score_coalesced(patients: List[PatientData]) -> list:
+    """Score one micro-batch of single-patient /predict requests: (row, serving_model_ref()) per patient"""
+    model_ref = serving_model_ref()
+    scores = await run_model(RawFeatures.from_patients(patients))
+    return [(scores[i:i + 1], model_ref) for i in range(len(scores))]
+
+
+# Opt-in request coalescer for /predict, bounded like the executor it feeds
+request_batcher = MicroBatcher(
+    score_coalesced,
+    max_batch_size=settings.batching_max_batch_size,
+    max_wait_ms=settings.batching_max_wait_ms,
+    max_concurrent=settings.executor_workers,
+    max_queue=settings.executor_max_pending,
+    timeout_s=settings.executor_timeout_s
+) if settings.batching_enabled else None
+
+
+async def submit_coalesced(patient: PatientData) -> tuple:
+    """Score one /predict patient through the micro-batcher, with the executor's backpressure: (scores, model ref)"""
+    with backpressure():
+        return (await request_batcher.submit(patient))[0]
+
+
+async def score_patients(patients: List[PatientData], route: str,
+                         received_at: float = None) -> List[PredictionResponse]:
+    """
+    Score N patients with a single pass over the ensemble on one columnar frame
+    (route and received_at, the request's perf_counter() arrival, go to the audit log)
+    """
+    received_at = received_at if received_at is not None else time.perf_counter()
+    with STAGE_SECONDS.time(stage="imputation"):
+        vectors = patient_vectors(patients)
+        columns = risk.vector_columns(vectors)
+        features = RawFeatures.from_vectors(vectors)
+
+    model_ref = serving_model_ref()
+    scores = await score_features(features)
+
+    timings = {}
+    assessments = risk.assess(scores, columns, timings=timings)
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    await record_predictions(route, model_ref, vectors, scores, assessments, received_at)
+    return [PredictionResponse(**assessment) for assessment in assessments]
+
+
+async def score_isolated(patients: List[PatientData], route: str, received_at: float = None) -> list:
+    """score_patients, falling back to row-by-row scoring so one bad row cannot sink the rest"""
+    try:
+        return await score_patients(patients, route, received_at)
+    except HTTPException:
+        raise
+    except Exception as e:
+        ERRORS.inc(route=route, type=type(e).__name__)
+        logger.warning(f"⚠️ Batch scoring failed ({e}), isolating rows")
+        scored = []
+        for patient in patients:
+            try:
+                scored.append((await score_patients([patient], route, received_at))[0])
+            except HTTPException:
+                raise
+            except Exception as row_error:
+                scored.append(row_error)
+        return scored
+
+
+def run_explainer(_model, current: EnsembleExplainer, features: RawFeatures) -> np.ndarray:
+    """explain_executor job (the pool's model slot is unused: the explainer is passed in)"""
+    return current.explain(features)
+
+
+async def explain_features(features: RawFeatures) -> List[Explanation]:
+    """SHAP explanations through the explanation cache; only unseen feature vectors are explained"""
+    # The explainer of the model serving when the request arrived, even if a hot reload swaps it meanwhile
+    current = explainer
+    if current is None:
+        raise HTTPException(status_code=501, detail=f"Explanations are unavailable: {explainer_error}")
+
+    keys = features.keys()
+    cached = [explanation_cache.get(key) if explanation_cache is not None else None for key in keys]
+    missing = [i for i, value in enumerate(cached) if value is None]
+    if missing:
+        fingerprint = explanation_cache.fingerprint if explanation_cache is not None else None
+        # TreeExplainer runs in native code and releases the GIL, so a thread pool suffices
+        with backpressure(), STAGE_SECONDS.time(stage="explain"):
+            contributions = await explain_executor.run(
+                run_explainer, current, features if len(missing) == len(keys) else features.take(missing)
+            )
+        for j, i in enumerate(missing):
+            order = np.argsort(-np.abs(contributions[j]), kind="stable")
+            cached[i] = Explanation(
+                base_value=round(current.base_value, 4),
+                raw_score=round(current.base_value + float(contributions[j].sum()), 4),
+                contributions={INPUT_FIELDS[k]: round(float(contributions[j, k]), 4) for k in order}
+            )
+            if explanation_cache is not None:
+                explanation_cache.put(keys[i], cached[i], fingerprint)
+    return cached
+
+
+async def record_predictions(route: str, model_ref: tuple, vectors: np.ndarray, scores: Prediction,
+                             assessments: List[dict], received_at: float):
+    """
+    Fold scored rows into the drift histograms and queue them for the audit log
+    (raw and adjusted risk in percent, as reported), tagged with model_ref, the
+    serving_model_ref() of the model that scored them
+    """
+    raw_risk = scores.probability * 100
+    adjusted_risk = [assessment["risk_percentage"] for assessment in assessments]
+    if drift_monitor is not None:
+        drift_monitor.record(vectors, raw_risk, adjusted_risk)
+    if audit_log is not None:
+        await audit_log.record(
+            route, *model_ref, vectors, raw_risk, adjusted_risk,
+            latency_ms=(time.perf_counter() - received_at) * 1000
+        )
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into one readable line"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" if item['loc'] else item['msg']
+        for item in error.errors()
+    )
+
+
+# ============================================
+# INSTRUMENTATION
+# ============================================
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """
+    Request counts and latency per route; optional per-request stack profile.
+    A request that raises is counted with status 500. The profile covers the
+    whole response, including a streamed body: sampling stops, and the file
+    named in X-Profile-File is written, once the last chunk has been sent.
+    """
+    start = time.perf_counter()
+    request.state.received_at = start
+
+    sampler = None
+    if settings.profiling_enabled and request.headers.get("x-profile"):
+        sampler = StackSampler(settings.profiling_interval_ms / 1000)
+        sampler.__enter__()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    except BaseException:
+        if sampler is not None:
+            sampler.__exit__(None, None, None)
+        raise
+    finally:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUESTS.inc(route=route, method=request.method, status=status)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=route)
+
+    if sampler is not None:
+        label = f"{request.method} {route}"
+        profile_path = sampler.output_path(Path(__file__).parent / settings.profiling_dir, label)
+        response.headers["X-Profile-File"] = profile_path.name
+        response.body_iterator = profiled_body(response.body_iterator, sampler, profile_path, label)
+    return response
+
+
+async def profiled_body(body, sampler: StackSampler, path: Path, label: str):
+    """Pass the response body through, then stop the sampler and write its profile"""
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        sampler.__exit__(None, None, None)
+        sampler.dump(path, label)
+
+
+def collect_component_stats():
+    """Executor, cache and batcher counters as scrape-time samples"""
+    samples = []
+    executor = inference_executor.stats()
+    for key in ("pending", "max_pending"):
+        samples.append((f"heartcare_executor_{key}", f"Inference executor {key}", "gauge", executor[key]))
+    for key in ("completed", "rejected", "timed_out"):
+        samples.append((f"heartcare_executor_{key}_total", f"Inference executor jobs {key}", "counter", executor[key]))
+    if prediction_cache is not None:
+        cache = prediction_cache.stats()
+        samples.append(("heartcare_cache_size", "Cached predictions", "gauge", cache["size"]))
+        for key in ("hits", "misses", "evictions", "expirations"):
+            samples.append((f"heartcare_cache_{key}_total", f"Prediction cache {key}", "counter", cache[key]))
+    if explanation_cache is not None:
+        cache = explanation_cache.stats()
+        samples.append(("heartcare_explain_cache_size", "Cached explanations", "gauge", cache["size"]))
+        for key in ("hits", "misses"):
+            samples.append((f"heartcare_explain_cache_{key}_total", f"Explanation cache {key}", "counter", cache[key]))
+    if drift_monitor is not None:
+        samples.append(("heartcare_drift_rows_total", "Rows folded into the drift histograms", "counter",
+                        drift_monitor.rows_seen))
+    if request_batcher is not None:
+        batching = request_batcher.stats()
+        samples.append(("heartcare_batcher_queued", "Rows waiting for a micro-batch", "gauge", batching["queued"]))
+        for key in ("batches", "rows"):
+            samples.append((f"heartcare_batcher_{key}_total", f"Micro-batcher {key} scored", "counter", batching[key]))
+        for key in ("rejected", "timed_out"):
+            samples.append((f"heartcare_batcher_{key}_total", f"Micro-batcher rows {key}", "counter", batching[key]))
+    return samples
+
+
+REGISTRY.add_collector(collect_component_stats)
 
 
 # ============================================
@@ -239,79 +814,242 @@ async def health():
         "status": "healthy",
         "message": "HeartCare AI API is running!",
         "version": "2.0.0",
-        "model_loaded": model is not None
+        "model_loaded": model is not None,
+        "model": model_info,
+        "inference_engine": settings.inference_engine,
+        "executor": inference_executor.stats(),
+        "batching": request_batcher.stats() if request_batcher is not None else {"enabled": False},
+        "cache": prediction_cache.stats() if prediction_cache is not None else {"enabled": False},
+        "registry": {
+            "watching": registry_watcher is not None,
+            "poll_s": settings.registry_poll_s,
+            "failed_loads": sorted(sha256[:12] for sha256 in failed_loads)
+        },
+        "shadow": shadow.stats() if shadow is not None else {"enabled": False},
+        "drift": {"enabled": drift_monitor is not None, "rows_seen": drift_monitor.rows_seen if drift_monitor else 0},
+        "audit": audit_log.stats() if audit_log is not None else {"enabled": False},
+        "explanations": {
+            "available": explainer is not None,
+            "reason": explainer_error,
+            "executor": explain_executor.stats(),
+            "cache": explanation_cache.stats() if explanation_cache is not None else {"enabled": False}
+        }
     }
 
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict_risk(patient: PatientData):
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, stage, error and component metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/feature-importance")
+async def get_feature_importance():
+    """
+    📊 Global feature importance
+    Mean decrease in impurity of the 15 inputs, precomputed when the model was loaded
+    """
+    if feature_importance is None:
+        raise HTTPException(status_code=503, detail="Feature importance not available")
+    return feature_importance
+
+
+@app.get("/drift")
+async def get_drift():
+    """
+    📐 Input and score drift
+    PSI and binned KS of each input and of raw/adjusted risk over the last one to
+    two windows of scored rows, against the training data profile from drift.py
+    """
+    if drift_monitor is None:
+        raise HTTPException(status_code=503, detail="Drift monitoring is off or has no reference profile")
+    report = drift_monitor.report()
+    scores_reference = drift_monitor.reference.get("scores")
+    report["reference"] = {
+        "rows": drift_monitor.reference["rows"],
+        "window": drift_monitor.window,
+        "scores_model": scores_reference["model_sha256"][:12] if scores_reference else None,
+        # Score drift is only meaningful against the model the reference was scored on
+        "scores_model_is_serving": (
+            scores_reference is not None and scores_reference["model_sha256"] == model_info.get("sha256")
+        ),
+    }
+    return report
+
+
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_none=True)
+async def predict_risk(patient: PatientData, request: Request, explain: bool = False):
     """
     🔮 Main prediction endpoint
     Takes 15 health features and returns risk assessment
+    (?explain=true adds the SHAP explanation of the model score)
     """
+    # Body parsing + PatientData validation happened between the middleware and here
+    received_at = getattr(request.state, "received_at", None)
+    if received_at is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - received_at, stage="validation")
+
     try:
         if model is None:
+            REJECTIONS.inc(reason="model_not_loaded")
             raise HTTPException(status_code=503, detail="Model not loaded")
         
-        # Prepare features in correct order (must match training data)
-        num_features = [
-            patient.age,
-            patient.bmi,
-            patient.cholesterol_level,
-            patient.sleep_hours,
-            patient.blood_pressure,
-            patient.blood_sugar
-        ]
-        
-        cat_features = [
-            impute_categorical(patient.gender, 'Male'),
-            impute_categorical(patient.smoker, 'No'),
-            impute_categorical(patient.diabetes, 'No'),
-            impute_categorical(patient.hypertension, 'No'),
-            impute_categorical(patient.physical_activity, 'Moderate'),
-            impute_categorical(patient.diet, 'Healthy'),
-            impute_categorical(patient.family_history, 'No'),
-            impute_categorical(patient.stress_level, 'Moderate'),
-            impute_categorical(patient.alcohol_consumption, 'No')
-        ]
-        
-        # Create DataFrame
-        feature_names = [
-            'Age', 'BMI', 'Cholesterol_Level', 'Sleep_Hours', 'Blood_Pressure', 'Blood_Sugar',
-            'Gender', 'Smoker', 'Diabetes', 'Hypertension', 'Physical_Activity',
-            'Diet', 'Family_History', 'Stress_Level', 'Alcohol_Consumption'
-        ]
-        input_df = pd.DataFrame([num_features + cat_features], columns=feature_names)
-        
-
-        # Predict
-        risk_prob = model.predict_proba(input_df)[0][1]
-        raw_risk_percentage = float(risk_prob * 100)
-        prediction = model.predict(input_df)[0]
+        with STAGE_SECONDS.time(stage="imputation"):
+            vectors = patient_vectors([patient])
+            features = RawFeatures.from_vectors(vectors)
 
-        # Adjust risk based on comprehensive health profile
-        adjusted_risk = adjust_risk(raw_risk_percentage, patient)
-        risk_category = risk_level(adjusted_risk)
+        # Predict on the worker pool (one pass over the ensemble gives probability and label)
+        # Repeated inputs are answered from the prediction cache
+        model_ref = serving_model_ref()
+        model_call = run_model
+        if request_batcher is not None:
+            # Coalesce with concurrent requests into one model call (scored by whichever
+            # model serves when the batch is dispatched)
+            async def model_call(features):
+                nonlocal model_ref
+                scores, model_ref = await submit_coalesced(patient)
+                return scores
+        scores = await score_features(features, model_call)
 
-        # Get personalized recommendations
-        message, recommendations = get_risk_message(int(adjusted_risk), patient)
+        # Adjust risk based on comprehensive health profile, then add personalized
+        # recommendations (the same code as /predict/batch and the Streamlit app)
+        timings = {}
+        assessment = risk.assess(scores, risk.vector_columns(vectors), timings=timings)[0]
+        for stage, seconds in timings.items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+        await record_predictions(
+            "/predict", model_ref, vectors, scores, [assessment],
+            received_at if received_at is not None else time.perf_counter()
+        )
 
-        logger.info(f"✅ Prediction: {adjusted_risk:.1f}% risk (adjusted from {raw_risk_percentage:.1f}%)")
+        explanation = (await explain_features(features))[0] if explain else None
 
-        return PredictionResponse(
-            risk_percentage=int(round(adjusted_risk)),
-            risk_category=f"{risk_category} Risk",
-            prediction=int(prediction),
-            confidence=round(float(risk_prob), 3),
-            message=message,
-            recommendations=recommendations
+        logger.info(
+            f"✅ Prediction: {assessment['risk_percentage']}% risk "
+            f"(adjusted from {scores.probability[0] * 100:.1f}%)"
         )
+        return PredictionResponse(**assessment, explanation=explanation)
         
+    except HTTPException:
+        raise
     except Exception as e:
+        ERRORS.inc(route="/predict", type=type(e).__name__)
         logger.error(f"❌ Prediction error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest, http_request: Request):
+    """
+    📦 Batch prediction endpoint
+    Validates each row independently, scores all valid rows with one model call,
+    and reports per-row errors without failing the whole batch
+    """
+    if model is None:
+        REJECTIONS.inc(reason="model_not_loaded")
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    items: List[Optional[BatchPredictionItem]] = [None] * len(request.patients)
+    patients, indices = [], []
+    for index, raw in enumerate(request.patients):
+        try:
+            patients.append(PatientData.model_validate(raw))
+            indices.append(index)
+        except ValidationError as e:
+            items[index] = BatchPredictionItem(index=index, error=format_validation_error(e))
+
+    if patients:
+        scored = await score_isolated(patients, "/predict/batch", getattr(http_request.state, "received_at", None))
+        for index, result in zip(indices, scored):
+            if isinstance(result, Exception):
+                items[index] = BatchPredictionItem(index=index, error=str(result))
+            else:
+                items[index] = BatchPredictionItem(index=index, result=result)
+
+    failed = sum(1 for item in items if item.error is not None)
+    logger.info(f"✅ Batch prediction: {len(items) - failed} scored, {failed} failed")
+
+    return BatchPredictionResponse(results=items, succeeded=len(items) - failed, failed=failed)
+
+
+@app.post("/explain", response_model=ExplainResponse)
+async def explain(request: ExplainRequest):
+    """
+    🔎 Explanation endpoint
+    SHAP contributions of each input to the model's (uncalibrated) risk score,
+    for up to HEARTCARE_EXPLAIN_MAX_BATCH patients per call
+    """
+    if model is None:
+        REJECTIONS.inc(reason="model_not_loaded")
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    with STAGE_SECONDS.time(stage="imputation"):
+        features = RawFeatures.from_patients(request.patients)
+    return ExplainResponse(explanations=await explain_features(features))
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    🌊 Streaming prediction endpoint
+    Reads newline-delimited PatientData records and streams one NDJSON result per
+    line back as soon as its chunk is scored, so neither side is ever buffered whole.
+    Each output line is {"line": n, "result": {...}} or {"line": n, "error": "..."};
+    the last one is {"done": true, "succeeded": ..., "failed": ...}.
+    """
+    if model is None:
+        REJECTIONS.inc(reason="model_not_loaded")
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    async def results():
+        counts = {"succeeded": 0, "failed": 0}
+
+        async def score_lines(lines):
+            """lines: [(line number, PatientData or error string)] -> NDJSON in input order"""
+            patients = [entry for _, entry in lines if isinstance(entry, PatientData)]
+            scored = []
+            if patients:
+                try:
+                    scored = await score_isolated(patients, "/predict/stream")
+                except HTTPException as e:
+                    # Headers are already sent: report backpressure on the affected lines
+                    scored = [e.detail] * len(patients)
+            scored = iter(scored)
+            output = []
+            for line_number, entry in lines:
+                result = next(scored) if isinstance(entry, PatientData) else entry
+                if isinstance(result, PredictionResponse):
+                    counts["succeeded"] += 1
+                    output.append(json.dumps({"line": line_number, "result": result.model_dump()}))
+                else:
+                    counts["failed"] += 1
+                    output.append(json.dumps({"line": line_number, "error": str(result)}))
+            return "\n".join(output) + "\n"
+
+        lines = []
+        try:
+            async for line_number, line in iter_lines(request.stream(), settings.stream_max_line_bytes):
+                if line is None:
+                    lines.append((line_number, f"Line longer than {settings.stream_max_line_bytes} bytes"))
+                else:
+                    try:
+                        lines.append((line_number, PatientData.model_validate_json(line)))
+                    except ValidationError as e:
+                        lines.append((line_number, format_validation_error(e)))
+                if len(lines) >= settings.stream_chunk_size:
+                    yield await score_lines(lines)
+                    lines = []
+            if lines:
+                yield await score_lines(lines)
+        except ClientDisconnect:
+            logger.warning(f"⚠️ Stream client disconnected after {counts['succeeded'] + counts['failed']} lines")
+            return
+
+        logger.info(f"✅ Stream prediction: {counts['succeeded']} scored, {counts['failed']} failed")
+        yield json.dumps({"done": True, **counts}) + "\n"
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+
 if __name__ == "__main__":
     import uvicorn
     # Run the API server
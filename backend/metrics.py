@@ -0,0 +1,200 @@
+"""
+HeartCare AI - Metrics
+Minimal Prometheus-style counters, gauges and histograms rendered as text for /metrics
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Stage latencies span ~10 µs (message generation) to seconds (full forest on a batch)
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        """(suffix, labels, value) triples"""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key)), value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observations (seconds by default)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+class Registry:
+    """Metrics plus collector callbacks that snapshot other components at scrape time"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """collect() returns [(name, help, kind, value)] read when /metrics is scraped"""
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for name, help, kind, value in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ============================================
+# HEARTCARE METRICS
+# ============================================
+
+REQUESTS = REGISTRY.register(Counter(
+    "heartcare_requests_total", "HTTP requests by route and status code", ["route", "method", "status"]
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "heartcare_request_seconds", "End-to-end HTTP request latency", ["route"]
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "heartcare_stage_seconds",
+    "Latency of each prediction stage (validation, imputation, encode, model, adjust_risk, messages, explain)",
+    ["stage"]
+))
+ERRORS = REGISTRY.register(Counter(
+    "heartcare_errors_total", "Failed predictions by route and error type", ["route", "type"]
+))
+REJECTIONS = REGISTRY.register(Counter(
+    "heartcare_rejections_total", "Requests turned away with 503/429 by reason", ["reason"]
+))
+MODEL_LOAD_SECONDS = REGISTRY.register(Gauge(
+    "heartcare_model_load_seconds", "Time spent in each loading phase of the serving model (startup or hot reload)", ["phase"]
+))
+MODEL_SECONDS = REGISTRY.register(Histogram(
+    "heartcare_model_seconds", "Encode + model time per model call by model version and role (serving, shadow)",
+    ["version", "role"]
+))
+MODEL_RELOADS = REGISTRY.register(Counter(
+    "heartcare_model_reloads_total", "Hot reloads of the serving model by result (swapped, failed)", ["result"]
+))
+SHADOW_ROWS = REGISTRY.register(Counter(
+    "heartcare_shadow_rows_total", "Rows scored on the shadow candidate", ["version"]
+))
+SHADOW_DISAGREEMENTS = REGISTRY.register(Counter(
+    "heartcare_shadow_disagreements_total", "Shadow rows whose label differs from the serving model's", ["version"]
+))
+SHADOW_DELTA = REGISTRY.register(Histogram(
+    "heartcare_shadow_abs_delta", "Per-row |candidate - serving| calibrated probability", ["version"],
+    buckets=(0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+))
+SHADOW_DROPPED = REGISTRY.register(Counter(
+    "heartcare_shadow_dropped_total", "Sampled model calls not shadow-scored by reason (saturated, error)", ["reason"]
+))
+AUDIT_ROWS = REGISTRY.register(Counter(
+    "heartcare_audit_rows_total", "Predictions sent to the audit log by result (written, dropped, failed)", ["result"]
+))
+AUDIT_FLUSH_SECONDS = REGISTRY.register(Histogram(
+    "heartcare_audit_flush_seconds", "Time to write one batch of queued predictions to the audit log"
+))
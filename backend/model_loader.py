@@ -0,0 +1,201 @@
+"""
+HeartCare AI - Model Loader
+One code path for finding, verifying and deserializing cardiac_arrest_model.pkl
+
+Resolution order:
+    1. HEARTCARE_MODEL_PATH, if set (a local file, used as-is)
+    2. The local content-addressed store: <store>/refs/<name> holds a SHA-256,
+       <store>/objects/<sha256>.pkl the artifact (hash-verified before use)
+    3. backend/cardiac_arrest_model.pkl (download_model.py's output), ingested into the store
+    4. The Hugging Face Hub, only if HEARTCARE_MODEL_HUB_ENABLED; the download is ingested
+       into the store so the next start needs no network
+
+With HEARTCARE_MODEL_VARIANT=distilled the store ref is <name>_distilled (written by
+distill.py) and steps 3 and 4 do not apply: there is no published distilled artifact.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import joblib
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parent
+LEGACY_MODEL_PATH = BACKEND_DIR / "cardiac_arrest_model.pkl"
+
+
+@dataclass
+class LoadedModel:
+    """A deserialized model plus where it came from"""
+    model: object
+    path: Path
+    sha256: str
+    source: str                                   # "path", "store", "local" or "hub"
+    timings_ms: dict = field(default_factory=dict)
+
+
+class ModelStore:
+    """Content-addressed artifact store: objects/<sha256>.pkl plus named refs"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.refs = self.root / "refs"
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects / f"{sha256}.pkl"
+
+    def read_ref(self, name: str):
+        """SHA-256 a ref points to, or None"""
+        ref = self.refs / name
+        if not ref.exists():
+            return None
+        return ref.read_text().strip() or None
+
+    def write_ref(self, name: str, sha256: str):
+        self.refs.mkdir(parents=True, exist_ok=True)
+        tmp = self.refs / f".{name}.tmp"
+        tmp.write_text(sha256 + "\n")
+        os.replace(tmp, self.refs / name)
+
+    def ingest(self, source, name: str = None, sha256: str = None) -> str:
+        """Copy (or hard-link) a file into the store, optionally pointing a ref at it"""
+        source = Path(source)
+        sha256 = sha256 or file_sha256(source)
+        target = self.object_path(sha256)
+        if not target.exists():
+            self.objects.mkdir(parents=True, exist_ok=True)
+            tmp = self.objects / f".{sha256}.tmp"
+            try:
+                os.link(source.resolve(), tmp)
+            except OSError:
+                shutil.copyfile(source, tmp)
+            os.replace(tmp, target)
+            logger.info(f"📦 Stored {source.name} as {sha256[:12]}")
+        if name:
+            self.write_ref(name, sha256)
+        return sha256
+
+    def resolve(self, name: str, verify: bool = True):
+        """(path, sha256) for a ref, or None if missing or corrupt"""
+        sha256 = self.read_ref(name)
+        if sha256 is None:
+            return None
+        path = self.object_path(sha256)
+        if not path.exists():
+            logger.warning(f"⚠️ Model store ref {name} points to missing object {sha256[:12]}")
+            return None
+        if verify and file_sha256(path) != sha256:
+            logger.error(f"❌ Model store object {sha256[:12]} failed hash verification, ignoring it")
+            return None
+        return path, sha256
+
+
+def file_sha256(path, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a model file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_store() -> ModelStore:
+    return ModelStore(BACKEND_DIR / settings.model_store_dir)
+
+
+def download_from_hub(cache_dir: str = None) -> Path:
+    """Fetch the artifact from the configured Hugging Face repository"""
+    from huggingface_hub import hf_hub_download
+
+    return Path(hf_hub_download(
+        repo_id=settings.model_hub_repo,
+        filename=settings.model_hub_filename,
+        repo_type="model",
+        cache_dir=cache_dir
+    ))
+
+
+def deserialize(path, mmap: bool = None):
+    """
+    joblib.load the artifact. With mmap, numpy arrays in an uncompressed joblib
+    pickle are memory-mapped read-only instead of read into fresh buffers.
+    """
+    mmap = settings.model_mmap if mmap is None else mmap
+    return joblib.load(path, mmap_mode='r' if mmap else None)
+
+
+def ref_name(variant: str = None) -> str:
+    """Store ref of a model variant ("full" or "distilled"; default: HEARTCARE_MODEL_VARIANT)"""
+    variant = variant or settings.model_variant
+    return settings.model_name if variant == "full" else f"{settings.model_name}_{variant}"
+
+
+def resolve_model(store: ModelStore = None, timings: dict = None, variant: str = None, ref: str = None):
+    """
+    Find the artifact on disk (downloading only if allowed): (path, sha256, source).
+    ref resolves that store ref instead (e.g. the registry's candidate), with no fallbacks.
+    """
+    store = store or default_store()
+    timings = {} if timings is None else timings
+    variant = variant or settings.model_variant
+    name = ref or ref_name(variant)
+
+    def timed(phase, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[phase] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    if settings.model_path and ref is None:
+        path = Path(settings.model_path)
+        return path, timed("hash", file_sha256, path), "path"
+
+    resolved = timed("verify", store.resolve, name, settings.model_verify_hash)
+    if resolved is not None:
+        return (*resolved, "store")
+
+    if ref is not None:
+        raise FileNotFoundError(f"Store ref {ref} is not set in {store.root}")
+    if variant != "full":
+        raise FileNotFoundError(
+            f"No {variant} model in {store.root} (run distill.py to build it)"
+        )
+
+    if LEGACY_MODEL_PATH.exists():
+        sha256 = timed("ingest", store.ingest, LEGACY_MODEL_PATH, name)
+        return store.object_path(sha256), sha256, "local"
+
+    if not settings.model_hub_enabled:
+        raise FileNotFoundError(
+            f"No model in {store.root} and hub download is disabled "
+            "(run download_model.py or set HEARTCARE_MODEL_PATH)"
+        )
+    logger.info(f"📥 Downloading model from Hugging Face: {settings.model_hub_repo}")
+    downloaded = timed("download", download_from_hub)
+    sha256 = timed("ingest", store.ingest, downloaded, name)
+    return store.object_path(sha256), sha256, "hub"
+
+
+def load_model(store: ModelStore = None, mmap: bool = None, variant: str = None, ref: str = None) -> LoadedModel:
+    """Resolve, verify and deserialize the model, logging the time spent in each phase"""
+    timings = {}
+    start = time.perf_counter()
+    path, sha256, source = resolve_model(store, timings, variant, ref)
+
+    phase_start = time.perf_counter()
+    model = deserialize(path, mmap)
+    timings["deserialize"] = round((time.perf_counter() - phase_start) * 1000, 1)
+    timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+
+    phases = ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in timings.items())
+    logger.info(f"✅ Model {sha256[:12]} loaded from {source} ({path}): {phases}")
+    return LoadedModel(model=model, path=path, sha256=sha256, source=source, timings_ms=timings)
@@ -0,0 +1,68 @@
+"""
+HeartCare AI - NDJSON Streaming
+Incremental line splitting for newline-delimited JSON request bodies, and a
+streaming response that can keep reading the request body while it writes
+"""
+
+from typing import AsyncIterator, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator may still be reading the request body.
+
+    StreamingResponse normally watches receive() for a client disconnect while
+    it streams, which would swallow the request body messages the generator is
+    waiting for. Here receive() is left to request.stream(); a client that goes
+    away surfaces there as ClientDisconnect, or as a failed send.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Yield (line number, line) for each non-blank line of a byte stream, as
+    soon as its newline has arrived. At most max_line_bytes of one line are
+    buffered: a longer line is yielded as (line number, None) and the rest of
+    it is discarded, so memory stays bounded whatever the client sends.
+    Line numbers are 1-based and count blank lines.
+    """
+    buffer = b""
+    line_number = 0
+    discarding = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            if discarding:
+                discarding = False
+            else:
+                line = buffer + chunk[start:end]
+                if len(line) > max_line_bytes:
+                    yield line_number, None
+                elif line.strip():
+                    yield line_number, line
+            buffer = b""
+            start = end + 1
+
+        if not discarding:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                yield line_number + 1, None
+                buffer = b""
+                discarding = True
+
+    # Last line without a trailing newline
+    if not discarding and buffer.strip():
+        yield line_number + 1, buffer
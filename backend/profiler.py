@@ -0,0 +1,76 @@
+"""
+HeartCare AI - Sampling Profiler
+Header-triggered per-request stack sampling, dumped as collapsed stacks for flame graphs
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of every thread in this process at a fixed interval.
+
+    Sampling all threads (not just the caller) captures the event loop and the
+    inference pool threads together, which cProfile on the request coroutine would
+    miss. Work done in process-pool workers is not visible. Concurrent requests
+    show up in the same profile, so profile on a quiet instance when possible.
+    """
+
+    def __init__(self, interval_s: float = 0.001):
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed_s = time.perf_counter() - self._start
+
+    @staticmethod
+    def output_path(directory, label: str) -> Path:
+        """Timestamped .folded file for label in directory (known before sampling ends)"""
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+        return Path(directory) / f"{time.strftime('%Y%m%d-%H%M%S')}_{safe_label}_{int(time.time() * 1000) % 1000:03d}.folded"
+
+    def dump(self, path, label: str) -> Path:
+        """Write 'frame;frame;frame count' lines (flamegraph.pl / speedscope format)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(f"🔬 Profile of {label}: {self.samples} samples over {self.elapsed_s * 1000:.0f} ms -> {path}")
+        return path
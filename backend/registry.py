@@ -0,0 +1,203 @@
+"""
+HeartCare AI - Model Registry
+Numbered versions of the serving model on top of the content-addressed store
+
+Each published artifact becomes version N of a store ref (the index lives in
+<store>/registry/<ref>.json; the artifact itself in objects/<sha256>.pkl).
+Promoting a version moves the serving ref <ref>, which a running API picks up
+without a restart (see HEARTCARE_REGISTRY_POLL_S). Marking a version as the
+candidate points <ref>.candidate at it; with HEARTCARE_SHADOW_SAMPLE_RATE > 0
+the API also scores a sample of live traffic on it, off the request path.
+
+Usage:
+    python registry.py publish trained_model.pkl --note "retrain 2026-10" --candidate
+    python registry.py list
+    python registry.py promote 3
+    python registry.py candidate --clear
+    python registry.py rollback
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import model_loader
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+
+def version_label(version, sha256: str) -> str:
+    """Short name of a model in logs and metric labels: v<N>, or the hash prefix if unregistered"""
+    return f"v{version}" if version is not None else sha256[:12]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ModelRegistry:
+    """Versions of one store ref; promoting a version repoints the ref"""
+
+    def __init__(self, store: model_loader.ModelStore = None, name: str = None):
+        self.store = store or model_loader.default_store()
+        self.name = name or model_loader.ref_name()
+        self.index_path = self.store.root / "registry" / f"{self.name}.json"
+
+    @property
+    def candidate_ref(self) -> str:
+        return f"{self.name}.candidate"
+
+    def _read(self) -> dict:
+        if not self.index_path.exists():
+            return {"format": INDEX_FORMAT_VERSION, "versions": [], "promotions": []}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _write(self, index: dict):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def versions(self) -> list:
+        return self._read()["versions"]
+
+    def get(self, version: int) -> dict:
+        for entry in self.versions():
+            if entry["version"] == version:
+                return entry
+        raise ValueError(f"{self.name} has no version {version}")
+
+    def version_of(self, sha256: str):
+        """Version number of an artifact hash, or None if it was never published"""
+        for entry in self.versions():
+            if entry["sha256"] == sha256:
+                return entry["version"]
+        return None
+
+    def publish(self, path, note: str = "") -> dict:
+        """Add an artifact to the store as the next version (an already published file keeps its number)"""
+        path = Path(path)
+        sha256 = self.store.ingest(path)
+        index = self._read()
+        for entry in index["versions"]:
+            if entry["sha256"] == sha256:
+                return entry
+        entry = {
+            "version": max((e["version"] for e in index["versions"]), default=0) + 1,
+            "sha256": sha256,
+            "source": path.name,
+            "bytes": path.stat().st_size,
+            "created_at": _now(),
+            "note": note,
+        }
+        index["versions"].append(entry)
+        self._write(index)
+        logger.info(f"📦 Published {path.name} as {self.name} v{entry['version']} ({sha256[:12]})")
+        return entry
+
+    def serving(self):
+        """(version or None, sha256) the serving ref points to, or None"""
+        sha256 = self.store.read_ref(self.name)
+        return (self.version_of(sha256), sha256) if sha256 else None
+
+    def candidate(self):
+        """(version or None, sha256) the candidate ref points to, or None"""
+        sha256 = self.store.read_ref(self.candidate_ref)
+        return (self.version_of(sha256), sha256) if sha256 else None
+
+    def promote(self, version: int) -> dict:
+        """Serve a version; clears the candidate if it was this version"""
+        entry = self.get(version)
+        if not self.store.object_path(entry["sha256"]).exists():
+            raise FileNotFoundError(f"Object {entry['sha256'][:12]} of v{version} is missing from {self.store.root}")
+        self.store.write_ref(self.name, entry["sha256"])
+        index = self._read()
+        index["promotions"].append({"version": version, "at": _now()})
+        self._write(index)
+        if self.store.read_ref(self.candidate_ref) == entry["sha256"]:
+            self.set_candidate(None)
+        logger.info(f"🚀 {self.name} now serves v{version} ({entry['sha256'][:12]})")
+        return entry
+
+    def rollback(self) -> dict:
+        """Promote the version that served before the current one"""
+        serving = self.serving()
+        current = serving[0] if serving else None
+        for promotion in reversed(self._read()["promotions"]):
+            if promotion["version"] != current:
+                return self.promote(promotion["version"])
+        raise ValueError(f"{self.name} has no earlier promoted version to roll back to")
+
+    def set_candidate(self, version):
+        """Shadow-score a version (None clears the candidate)"""
+        if version is None:
+            (self.store.refs / self.candidate_ref).unlink(missing_ok=True)
+            logger.info(f"🧹 {self.name} has no candidate")
+            return None
+        entry = self.get(version)
+        self.store.write_ref(self.candidate_ref, entry["sha256"])
+        logger.info(f"🌓 {self.name} v{version} is the shadow candidate")
+        return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", help="Store ref (default: the configured model name and variant)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish = commands.add_parser("publish", help="Add an artifact as the next version")
+    publish.add_argument("path")
+    publish.add_argument("--note", default="")
+    target = publish.add_mutually_exclusive_group()
+    target.add_argument("--promote", action="store_true", help="Serve it right away")
+    target.add_argument("--candidate", action="store_true", help="Shadow-score it before promoting")
+    commands.add_parser("list", help="Versions, marking the serving and candidate ones")
+    promote = commands.add_parser("promote", help="Serve a version")
+    promote.add_argument("version", type=int)
+    candidate = commands.add_parser("candidate", help="Set or clear the shadow candidate")
+    candidate.add_argument("version", type=int, nargs="?")
+    candidate.add_argument("--clear", action="store_true")
+    commands.add_parser("rollback", help="Serve the previously promoted version again")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(name=args.name)
+    try:
+        if args.command == "publish":
+            entry = registry.publish(args.path, args.note)
+            if args.promote:
+                registry.promote(entry["version"])
+            elif args.candidate:
+                registry.set_candidate(entry["version"])
+        elif args.command == "promote":
+            registry.promote(args.version)
+        elif args.command == "candidate":
+            if args.clear == (args.version is not None):
+                raise ValueError("Give either a version or --clear")
+            registry.set_candidate(None if args.clear else args.version)
+        elif args.command == "rollback":
+            registry.rollback()
+    except (ValueError, FileNotFoundError) as e:
+        raise SystemExit(f"❌ {e}")
+
+    serving, candidate = registry.serving(), registry.candidate()
+    for entry in registry.versions():
+        marks = [
+            mark for mark, ref in (("serving", serving), ("candidate", candidate))
+            if ref is not None and ref[1] == entry["sha256"]
+        ]
+        print(
+            f"v{entry['version']:<4} {entry['sha256'][:12]}  {entry['created_at']}  "
+            f"{entry['bytes'] / 1e6:>8.1f} MB  {entry['source']}"
+            f"{'  [' + ', '.join(marks) + ']' if marks else ''}{'  ' + entry['note'] if entry['note'] else ''}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+HeartCare AI - Risk Rules
+Risk adjustment, risk categories and recommendations for N patients at once, with NumPy
+"""
+
+import bisect
+import operator
+import time
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+from encoder import ANSWERS, INPUT_FIELDS, answer_code, encode_column
+
+
+def coded(rules) -> list:
+    """Rules with categorical answers replaced by their integer codes, which is what the columns hold"""
+    return [
+        (field, compare, answer_code(field, value) if field in ANSWERS else value, *rest)
+        for field, compare, value, *rest in rules
+    ]
+
+
+# Risk factors counted by adjust_risk: (field, comparison, value)
+# The comparisons work on scalars and on NumPy arrays alike.
+CRITICAL_FACTORS = coded([
+    ('family_history', operator.eq, "Yes"),
+    ('diabetes', operator.eq, "Yes"),
+    ('hypertension', operator.eq, "Yes"),
+    ('smoker', operator.eq, "Yes"),
+    ('age', operator.ge, 65),
+    ('cholesterol_level', operator.ge, 240),
+])
+PROTECTIVE_FACTORS = coded([
+    ('age', operator.lt, 40),
+    ('physical_activity', operator.eq, "High"),
+    ('diet', operator.eq, "Healthy"),
+    ('smoker', operator.eq, "No"),
+    ('bmi', operator.lt, 25),
+    ('stress_level', operator.eq, "Low"),
+])
+
+# Adjustment rules, first match wins: (min critical, min protective, risk comparison, risk %, factor)
+# Range: 0.85 to 1.15, so the model output stays the primary source of truth
+ADJUSTMENT_RULES = [
+    (4, 0, operator.lt, 50, 1.15),   # many critical factors but model says low risk -> boost 15%
+    (3, 0, operator.lt, 40, 1.10),   # boost 10%
+    (0, 5, operator.gt, 60, 0.85),   # many protective factors but model says high risk -> reduce 15%
+    (0, 4, operator.gt, 50, 0.90),   # reduce 10%
+]
+
+# Safety bounds: even perfect health has some risk, even worst health isn't 100%
+MIN_RISK, MAX_RISK = 10, 95
+
+# Risk category thresholds (risk % at or above each bound)
+RISK_LEVELS = [(70, "High"), (40, "Moderate")]
+DEFAULT_RISK_LEVEL = "Low"
+
+
+def factor_counts(columns: Dict[str, np.ndarray]):
+    """(critical_count, protective_count) int arrays"""
+    critical = sum(np.asarray(compare(columns[field], value), dtype=np.int64)
+                   for field, compare, value in CRITICAL_FACTORS)
+    protective = sum(np.asarray(compare(columns[field], value), dtype=np.int64)
+                     for field, compare, value in PROTECTIVE_FACTORS)
+    return critical, protective
+
+
+def adjustment_factors(predicted_risk: np.ndarray, critical: np.ndarray, protective: np.ndarray) -> np.ndarray:
+    """Multiplier per patient from the first matching ADJUSTMENT_RULES entry (1.0 if none)"""
+    return np.select(
+        [
+            (critical >= min_critical) & (protective >= min_protective) & compare(predicted_risk, threshold)
+            for min_critical, min_protective, compare, threshold, _ in ADJUSTMENT_RULES
+        ],
+        [factor for *_, factor in ADJUSTMENT_RULES],
+        default=1.0,
+    )
+
+
+def adjust_risk(predicted_risk: np.ndarray, columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Model risk % adjusted for critical/protective factors and clamped to [10, 95]"""
+    predicted_risk = np.asarray(predicted_risk, dtype=np.float64)
+    critical, protective = factor_counts(columns)
+    factors = adjustment_factors(predicted_risk, critical, protective)
+    return np.clip(predicted_risk * factors, MIN_RISK, MAX_RISK)
+
+
+def risk_levels(adjusted_risk: np.ndarray) -> np.ndarray:
+    """"High" / "Moderate" / "Low" per patient"""
+    adjusted_risk = np.asarray(adjusted_risk)
+    return np.select([adjusted_risk >= bound for bound, _ in RISK_LEVELS],
+                     [level for _, level in RISK_LEVELS], default=DEFAULT_RISK_LEVEL)
+
+
+class RecommendationTable:
+    """
+    Risk tier messages plus rule-based recommendations.
+
+    tiers: [(upper bound on risk % or None, message, base recommendations)], ascending.
+    rules: [(field, comparison, value, recommendation)]; rule i sets bit i of a
+    patient's bitmask, and (tier, bitmask) pairs expand to message + list.
+    Categorical values are given as answers and compared as codes.
+    """
+
+    def __init__(self, tiers, rules):
+        if len(rules) > 64:
+            raise ValueError("At most 64 recommendation rules fit in a bitmask")
+        self.tiers = tiers
+        self.rules = coded(rules)
+        self.bounds = [bound for bound, _, _ in tiers if bound is not None]
+        self.fields = sorted({field for field, _, _, _ in rules})
+        self._expand = lru_cache(maxsize=4096)(self._expand_uncached)
+
+    def tier_indices(self, risk_pct: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.bounds, risk_pct, side='right')
+
+    def bitmasks(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """uint64 per patient, bit i set when rule i applies"""
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        masks = np.zeros(n_rows, dtype=np.uint64)
+        for bit, (field, compare, value, _) in enumerate(self.rules):
+            masks |= np.asarray(compare(columns[field], value), dtype=np.uint64) << np.uint64(bit)
+        return masks
+
+    def _expand_uncached(self, tier: int, mask: int) -> tuple:
+        _, message, base = self.tiers[tier]
+        texts = tuple(base) + tuple(text for bit, (*_, text) in enumerate(self.rules) if mask >> bit & 1)
+        return message, texts
+
+    def messages(self, risk_pct: np.ndarray, columns: Dict[str, np.ndarray]) -> List[tuple]:
+        """(message, recommendations) per patient"""
+        tiers = self.tier_indices(risk_pct)
+        masks = self.bitmasks(columns)
+        results = []
+        for tier, mask in zip(tiers.tolist(), masks.tolist()):
+            message, texts = self._expand(tier, mask)
+            results.append((message, list(texts)))
+        return results
+
+    def message(self, risk_pct, patient) -> tuple:
+        """Scalar form for one patient object"""
+        tier = bisect.bisect_right(self.bounds, risk_pct)
+        columns = patient_columns([patient], self.fields)
+        mask = 0
+        for bit, (field, compare, value, _) in enumerate(self.rules):
+            if compare(columns[field][0], value):
+                mask |= 1 << bit
+        message, texts = self._expand(tier, mask)
+        return message, list(texts)
+
+
+# /predict messages (backend/main.py)
+API_RECOMMENDATIONS = RecommendationTable(
+    tiers=[
+        (40, "🎉 Great news! Your heart health looks good. Keep up the healthy lifestyle!", [
+            "✓ Continue your current healthy habits",
+            "✓ Annual health checkups recommended",
+        ]),
+        (70, "⚠️ Moderate risk detected. Some lifestyle improvements may help.", [
+            "⚕️ Schedule a medical checkup soon",
+            "📊 Monitor blood pressure and cholesterol regularly",
+            "🏃 Increase physical activity to 30+ mins daily",
+        ]),
+        (None, "🚨 High risk detected. Please consult a healthcare professional immediately.", [
+            "🚨 URGENT: Schedule medical consultation ASAP",
+            "💊 Take prescribed medications regularly",
+            "⚠️ Monitor symptoms: chest pain, shortness of breath",
+        ]),
+    ],
+    rules=[
+        ('smoker', operator.eq, "Yes", "🚭 Quit smoking - critical for heart health"),
+        ('physical_activity', operator.eq, "Low", "🏃‍♂️ Start with 15-min daily walks"),
+        ('diet', operator.eq, "Unhealthy", "🥗 Focus on fruits, vegetables, whole grains"),
+        ('stress_level', operator.eq, "High", "🧘 Practice stress management techniques"),
+        ('bmi', operator.ge, 30, "⚖️ Weight management can reduce risk significantly"),
+        ('sleep_hours', operator.lt, 6, "😴 Aim for 7-9 hours of sleep nightly"),
+    ],
+)
+
+# utils.get_risk_message messages
+UTILS_RECOMMENDATIONS = RecommendationTable(
+    tiers=[
+        (20, "🎉 Great news! Your heart health looks good. Keep up the healthy lifestyle!", [
+            "Continue your current healthy habits",
+            "Regular exercise and balanced diet are key",
+            "Annual health checkups recommended",
+        ]),
+        (50, "⚠️ Moderate risk detected. Some lifestyle improvements may help reduce your risk.", [
+            "Consider scheduling a medical checkup",
+            "Monitor your blood pressure and cholesterol regularly",
+            "Increase physical activity to 30+ mins daily",
+        ]),
+        (None, "🚨 High risk detected. Please consult a healthcare professional soon.", [
+            "⚕️ URGENT: Schedule a medical consultation immediately",
+            "Monitor symptoms like chest pain, shortness of breath",
+            "Avoid strenuous activities until cleared by doctor",
+            "Take prescribed medications regularly",
+        ]),
+    ],
+    rules=[
+        ('smoker', operator.eq, "Yes", "🚭 Quit smoking - it's the single best thing for your heart"),
+        ('physical_activity', operator.eq, "Low", "🏃‍♂️ Start with 15-minute daily walks, gradually increase"),
+        ('diet', operator.eq, "Unhealthy", "🥗 Focus on fruits, vegetables, whole grains, and lean proteins"),
+        ('stress_level', operator.eq, "High", "🧘‍♀️ Practice stress management: meditation, yoga, or deep breathing"),
+        ('bmi', operator.ge, 30, "⚖️ Weight management through diet and exercise can reduce risk"),
+        ('sleep_hours', operator.lt, 6, "😴 Aim for 7-9 hours of quality sleep per night"),
+        ('alcohol_consumption', operator.eq, "Yes", "🍷 Limit alcohol consumption to moderate levels"),
+        ('hypertension', operator.eq, "Yes", "💊 Keep blood pressure under control with medication and lifestyle"),
+        ('diabetes', operator.eq, "Yes", "🩸 Manage blood sugar levels through diet, exercise, and medication"),
+        ('cholesterol_level', operator.gt, 240, "📊 High cholesterol - discuss statin therapy with your doctor"),
+    ],
+)
+
+# Every PatientData field the rules above read
+RISK_FIELDS = sorted(
+    {field for field, _, _ in CRITICAL_FACTORS + PROTECTIVE_FACTORS}
+    | set(API_RECOMMENDATIONS.fields) | set(UTILS_RECOMMENDATIONS.fields)
+)
+
+
+def patient_columns(patients, fields=RISK_FIELDS) -> Dict[str, np.ndarray]:
+    """Transpose patient objects into one NumPy array per field, answers as codes (see encoder.ANSWERS)"""
+    return {
+        field: encode_column(field, [getattr(p, field) for p in patients]) if field in ANSWERS
+        else np.array([getattr(p, field) for p in patients])
+        for field in fields
+    }
+
+
+def vector_columns(vectors: np.ndarray, fields=RISK_FIELDS) -> Dict[str, np.ndarray]:
+    """patient_columns() from encoder.patient_vectors() output, without touching the patients again"""
+    return {field: vectors[:, INPUT_FIELDS.index(field)] for field in fields}
+
+
+def assess(scores, columns: Dict[str, np.ndarray], recommendations: RecommendationTable = API_RECOMMENDATIONS,
+           timings: dict = None) -> List[dict]:
+    """
+    /predict's response fields per patient from model scores (inference.Prediction)
+    and patient_columns(). Shared by the API and the Streamlit app. If timings is
+    given, the seconds spent adjusting risk ('adjust_risk') and building messages
+    ('messages') are stored in it.
+    """
+    start = time.perf_counter()
+    adjusted_risk = adjust_risk(scores.probability * 100, columns)
+    categories = risk_levels(adjusted_risk)
+    adjusted_at = time.perf_counter()
+    messages = recommendations.messages(adjusted_risk.astype(int), columns)
+    if timings is not None:
+        timings['adjust_risk'] = adjusted_at - start
+        timings['messages'] = time.perf_counter() - adjusted_at
+
+    return [
+        {
+            "risk_percentage": int(round(adjusted)),
+            "risk_category": f"{category} Risk",
+            "prediction": int(prediction),
+            "confidence": round(float(probability), 3),
+            "message": message,
+            "recommendations": texts,
+        }
+        for adjusted, category, prediction, probability, (message, texts)
+        in zip(adjusted_risk.tolist(), categories, scores.label, scores.probability, messages)
+    ]
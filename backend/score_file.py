@@ -0,0 +1,325 @@
+"""
+HeartCare AI - Bulk Scoring
+Offline tool: score a CSV/Parquet export in the heart_data.csv schema in chunks,
+on a process pool, writing results as it goes and resuming after interruption
+
+Each chunk goes through the same steps as /predict: "I don't know" or blank
+categoricals are imputed with the API's defaults for the model, and the raw answers
+drive risk.adjust_risk; answers outside the API's choices match no rule and no
+category. Finished chunks are written to <output>.parts/ and only
+merged into <output> once every chunk is done, so rerunning the same command
+after a crash skips the chunks that are already on disk.
+
+Usage:
+    python score_file.py clinic_export.csv --output clinic_scored.csv --workers 4
+    python score_file.py clinic_export.parquet --output clinic_scored.parquet --messages
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from encoder import CAT_FEATURES, FEATURE_NAMES, NUM_FEATURES, UNKNOWN, RawFeatures, encode_answers, impute
+from executor import _call_with_worker_model, _init_worker, load_and_prepare
+from inference import predict
+import model_loader
+import risk
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+# Columns added to every input row
+RESULT_COLUMNS = ["raw_risk_percentage", "risk_percentage", "risk_category", "prediction", "confidence", "error"]
+MESSAGE_COLUMNS = ["message", "recommendations"]
+
+MANIFEST = "_manifest.json"
+
+
+def file_format(path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported file type {suffix!r} (expected .csv or .parquet)")
+    return FORMATS[suffix]
+
+
+def read_chunks(path, chunk_rows: int, skip_chunks: int = 0):
+    """Yield (index, DataFrame) chunks of chunk_rows rows, starting at chunk skip_chunks"""
+    if file_format(path) == "csv":
+        reader = pd.read_csv(path, chunksize=chunk_rows, keep_default_na=False, na_values=[""])
+        # Skipped chunks are parsed and dropped: skipping line numbers would
+        # miscount rows around blank lines, which the reader leaves out of chunks
+        for index, chunk in enumerate(reader):
+            if index >= skip_chunks:
+                yield index, chunk
+    else:
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        if parquet.metadata.num_rows == 0:
+            # No batches to iterate: one empty chunk still gives the output its columns
+            if skip_chunks == 0:
+                yield 0, parquet.schema_arrow.empty_table().to_pandas()
+            return
+        for index, batch in enumerate(parquet.iter_batches(batch_size=chunk_rows)):
+            if index >= skip_chunks:
+                yield index, batch.to_pandas()
+
+
+def write_part(frame: pd.DataFrame, path: Path, fmt: str):
+    """Write one chunk's results atomically, so a part on disk is always complete"""
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "csv":
+        frame.to_csv(tmp, index=False)
+    else:
+        frame.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def merge_parts(parts, output: Path, fmt: str):
+    """Concatenate part files into output one part at a time"""
+    tmp = output.with_name(output.name + ".tmp")
+    if fmt == "csv":
+        with open(tmp, "wb") as out:
+            for i, part in enumerate(parts):
+                with open(part, "rb") as f:
+                    header = f.readline()
+                    if i == 0:
+                        out.write(header)
+                    shutil.copyfileobj(f, out)
+    else:
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in parts:
+                table = pq.read_table(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema)
+                # Columns that are all-null in one chunk are inferred as null type
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp, output)
+
+
+def score_chunk(model, chunk: pd.DataFrame, messages: bool = False) -> pd.DataFrame:
+    """
+    Score one chunk: input columns plus RESULT_COLUMNS (and MESSAGE_COLUMNS).
+
+    Rows with a missing or non-numeric numeric feature are not scored; their
+    reason is put in the error column and their score columns are left empty.
+    """
+    missing = [feature for feature in FEATURE_NAMES if feature not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing columns: {missing}")
+
+    n_rows = len(chunk)
+    num = np.column_stack([
+        pd.to_numeric(chunk[feature], errors="coerce").to_numpy(dtype=np.float64) for feature in NUM_FEATURES
+    ]).reshape(n_rows, len(NUM_FEATURES))
+    invalid = ~np.isfinite(num)
+    errors = np.array([
+        "invalid " + ", ".join(np.asarray(NUM_FEATURES)[row]) if row.any() else None for row in invalid
+    ], dtype=object)
+    valid = np.flatnonzero(~invalid.any(axis=1))
+
+    # Raw answers (blank counts as "I don't know") feed the risk rules, imputed ones the model
+    answers = encode_answers([
+        chunk[feature].astype(object).where(chunk[feature].notna(), UNKNOWN).astype(str).to_numpy()[valid]
+        for feature in CAT_FEATURES
+    ])
+    features = RawFeatures(num=num[valid], codes=impute(answers))
+    # PatientData field names are the lower-cased feature names
+    by_field = {feature.lower(): num[valid, j] for j, feature in enumerate(NUM_FEATURES)}
+    by_field.update((feature.lower(), answers[:, j]) for j, feature in enumerate(CAT_FEATURES))
+    columns = {field: by_field[field] for field in risk.RISK_FIELDS}
+
+    result = chunk.reset_index(drop=True)
+    raw_risk = np.full(n_rows, np.nan)
+    adjusted = np.full(n_rows, np.nan)
+    confidence = np.full(n_rows, np.nan)
+    prediction = pd.array([None] * n_rows, dtype="Int64")
+    category = np.full(n_rows, None, dtype=object)
+    texts = np.full((n_rows, len(MESSAGE_COLUMNS)), None, dtype=object)
+
+    if len(valid):
+        scores = predict(model, features)
+        raw_risk[valid] = scores.probability * 100
+        adjusted[valid] = risk.adjust_risk(raw_risk[valid], columns)
+        confidence[valid] = np.round(scores.probability, 3)
+        prediction[valid] = scores.label.astype(np.int64)
+        category[valid] = np.char.add(risk.risk_levels(adjusted[valid]).astype(str), " Risk")
+        if messages:
+            for row, (message, recommendations) in zip(
+                valid, risk.API_RECOMMENDATIONS.messages(adjusted[valid].astype(int), columns)
+            ):
+                texts[row] = (message, " | ".join(recommendations))
+
+    result["raw_risk_percentage"] = np.round(raw_risk, 1)
+    result["risk_percentage"] = pd.array(
+        [None if np.isnan(value) else int(round(value)) for value in adjusted], dtype="Int64"
+    )
+    result["risk_category"] = category
+    result["prediction"] = prediction
+    result["confidence"] = confidence
+    result["error"] = errors
+    if messages:
+        for j, name in enumerate(MESSAGE_COLUMNS):
+            result[name] = texts[:, j]
+    return result
+
+
+def input_fingerprint(path) -> dict:
+    stat = Path(path).stat()
+    return {"input": str(Path(path).resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def prepare_parts(parts_dir: Path, manifest: dict, restart: bool) -> set:
+    """Create or reuse the parts directory; returns the chunk indices already done"""
+    manifest_path = parts_dir / MANIFEST
+    if parts_dir.exists() and not restart:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        if previous != manifest:
+            changed = sorted(key for key in manifest if previous.get(key) != manifest[key])
+            raise SystemExit(
+                f"❌ {parts_dir} belongs to a different run (changed: {', '.join(changed)}); pass --restart to discard it"
+            )
+        done = {int(part.name.split("-")[1].split(".")[0]) for part in parts_dir.glob("part-*") if part.suffix != ".tmp"}
+        logger.info(f"♻️ Resuming: {len(done)} chunks already scored in {parts_dir}")
+        return done
+
+    if parts_dir.exists():
+        shutil.rmtree(parts_dir)
+    parts_dir.mkdir(parents=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return set()
+
+
+def score_file(input_path, output_path, model_path=None, workers: int = None, chunk_rows: int = 50_000,
+               messages: bool = False, engine: str = "sklearn", restart: bool = False,
+               keep_parts: bool = False) -> dict:
+    """
+    Score input_path into output_path; see the module docstring.
+
+    workers=0 scores in this process (no pool). Returns a summary dict.
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    in_format, out_format = file_format(input_path), file_format(output_path)
+    workers = os.cpu_count() if workers is None else workers
+
+    if model_path is None:
+        model_path, model_sha256, _ = model_loader.resolve_model()
+    else:
+        model_sha256 = model_loader.file_sha256(model_path)
+
+    parts_dir = output_path.with_name(output_path.name + ".parts")
+    manifest = {
+        **input_fingerprint(input_path),
+        "chunk_rows": chunk_rows,
+        "model_sha256": model_sha256,
+        "engine": engine,
+        "messages": messages,
+        "output_format": out_format,
+    }
+    done = prepare_parts(parts_dir, manifest, restart)
+    skip = 0
+    while skip in done:
+        skip += 1
+
+    prepare = None
+    if engine == "compiled":
+        from compiled_model import CompiledEnsemble
+        prepare = CompiledEnsemble.from_model
+    load_worker_model = functools.partial(load_and_prepare, str(model_path), prepare)
+
+    def part_path(index):
+        return parts_dir / f"part-{index:06d}.{out_format}"
+
+    start = time.perf_counter()
+    rows = chunks = 0
+
+    def finish(index, frame):
+        nonlocal rows, chunks
+        write_part(frame, part_path(index), out_format)
+        rows += len(frame)
+        chunks += 1
+        logger.info(f"✅ Chunk {index}: {len(frame)} rows ({rows / (time.perf_counter() - start):,.0f} rows/s)")
+
+    pending_chunks = (
+        (index, chunk) for index, chunk in read_chunks(input_path, chunk_rows, skip) if index not in done
+    )
+    if workers == 0:
+        model = load_worker_model()
+        for index, chunk in pending_chunks:
+            finish(index, score_chunk(model, chunk, messages))
+    else:
+        # At most 2 chunks per worker are read ahead, which bounds memory use
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(load_worker_model,)) as pool:
+            in_flight = deque()
+            for index, chunk in pending_chunks:
+                in_flight.append((index, pool.submit(_call_with_worker_model, score_chunk, (chunk, messages))))
+                if len(in_flight) >= 2 * workers:
+                    finish(in_flight[0][0], in_flight.popleft()[1].result())
+            while in_flight:
+                finish(in_flight[0][0], in_flight.popleft()[1].result())
+
+    parts = sorted(parts_dir.glob(f"part-*.{out_format}"))
+    n_chunks = len(parts)
+    merge_parts(parts, output_path, out_format)
+    if not keep_parts:
+        shutil.rmtree(parts_dir)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "output": str(output_path),
+        "chunks": n_chunks,
+        "chunks_scored": chunks,
+        "chunks_resumed": n_chunks - chunks,
+        "rows_scored": rows,
+        "seconds": round(elapsed, 1),
+        "input_format": in_format,
+    }
+    logger.info(f"💾 {output_path}: {chunks} chunks scored, {n_chunks - chunks} resumed, {rows} rows in {elapsed:.1f}s")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or Parquet file with the heart_data.csv feature columns")
+    parser.add_argument("--output", required=True, help="Result file (.csv or .parquet)")
+    parser.add_argument("--model", help="Path to cardiac_arrest_model.pkl (default: the serving model)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Scoring processes (0: in-process)")
+    parser.add_argument("--chunk-rows", type=int, default=50_000, help="Rows per chunk")
+    parser.add_argument("--engine", choices=["sklearn", "compiled"], default="sklearn")
+    parser.add_argument("--messages", action="store_true", help="Add message and recommendations columns")
+    parser.add_argument("--restart", action="store_true", help="Discard a previous partial run")
+    parser.add_argument("--keep-parts", action="store_true", help="Keep <output>.parts/ after merging")
+    args = parser.parse_args()
+
+    try:
+        score_file(
+            args.input, args.output, model_path=args.model, workers=args.workers, chunk_rows=args.chunk_rows,
+            messages=args.messages, engine=args.engine, restart=args.restart, keep_parts=args.keep_parts
+        )
+    except (ValueError, FileNotFoundError) as e:
+        raise SystemExit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+HeartCare AI - Settings
+Runtime configuration, read from HEARTCARE_* environment variables or a .env file
+"""
+
+from typing import Literal, Optional
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Backend settings (e.g. HEARTCARE_EXECUTOR_WORKERS=4)"""
+    model_config = SettingsConfigDict(
+        env_prefix="HEARTCARE_",
+        env_file=".env",
+        extra="ignore",
+        protected_namespaces=(),
+    )
+
+    # Model artifact (see model_loader.py for the resolution order)
+    model_path: Optional[str] = None  # explicit local file, bypasses the store
+    model_store_dir: str = "model_store"  # content-addressed store, relative to backend/
+    model_name: str = "cardiac_arrest_model"
+    # "distilled" serves the student model built by distill.py (ref <model_name>_distilled)
+    model_variant: Literal["full", "distilled"] = "full"
+    model_verify_hash: bool = True
+    model_mmap: bool = True
+    model_hub_enabled: bool = True
+    model_hub_repo: str = "ZainShahHere/cardiac_arrest_model"
+    model_hub_filename: str = "cardiac_arrest_model.pkl"
+
+    # Hot reload (see registry.py): the serving ref is polled and a newly promoted
+    # version is loaded, warmed and swapped in; 0 disables it, as does model_path
+    registry_poll_s: float = Field(10.0, ge=0)
+    # Shadow scoring: this fraction of model calls is also scored on the registry's
+    # candidate version, off the request path (0 = off)
+    shadow_sample_rate: float = Field(0.0, ge=0, le=1)
+    shadow_max_pending: int = Field(4, ge=1)  # queued shadow calls before samples are dropped
+    shadow_log_every: int = Field(100, ge=1)  # shadow calls between summary log lines
+
+    # Inference engine: sklearn model as loaded, the flat-array compiled ensemble,
+    # or the precomputed lookup table (see build_lookup_table.py)
+    inference_engine: Literal["sklearn", "compiled", "table"] = "sklearn"
+    compiled_mmap: bool = False  # export the compiled arrays once and memory-map them in every process
+    table_path: str = "risk_table.npy"  # relative to backend/
+    table_interpolation: Literal["linear", "nearest"] = "linear"
+
+    # Inference executor: model calls run here instead of on the event loop
+    executor_kind: Literal["thread", "process"] = "thread"
+    executor_workers: int = Field(2, ge=1)
+    executor_max_pending: int = Field(32, ge=1)  # running + queued jobs before rejecting
+    executor_timeout_s: float = Field(30.0, gt=0)
+    executor_reject_status: Literal[429, 503] = 503
+    executor_retry_after_s: int = Field(1, ge=0)
+
+    # Micro-batching: coalesce concurrent /predict calls into one model call
+    batching_enabled: bool = False
+    batching_max_batch_size: int = Field(32, ge=1)
+    batching_max_wait_ms: float = Field(5.0, ge=0)
+
+    # /predict/stream: NDJSON lines are scored stream_chunk_size at a time
+    stream_chunk_size: int = Field(256, ge=1)
+    stream_max_line_bytes: int = Field(65536, ge=1024)
+
+    # SHAP explanations (/explain, /predict?explain=true); needs the optional shap package
+    explain_enabled: bool = True
+    explain_max_batch: int = Field(100, ge=1)
+    explain_cache_size: int = Field(1000, ge=1)
+    explain_max_pending: int = Field(8, ge=1)  # running + queued SHAP calls before rejecting
+
+    # Drift monitor: scored inputs and risks are histogrammed against the training
+    # data profile built by drift.py (off if the file is missing); see GET /drift
+    drift_enabled: bool = True
+    drift_reference_path: str = "drift_reference.json"  # relative to backend/
+    drift_window: int = Field(10000, ge=1)  # rows per window; /drift covers the last one to two
+
+    # Audit log (see audit.py): every scored prediction is queued in memory and
+    # written in batches to an append-only SQLite file off the request path
+    audit_enabled: bool = False
+    audit_path: str = "audit.db"  # relative to backend/
+    audit_max_queue: int = Field(10000, ge=1)  # queued rows before the overflow policy applies
+    audit_batch_size: int = Field(500, ge=1)  # queued rows that trigger a write before the interval
+    audit_flush_interval_s: float = Field(1.0, gt=0)
+    # Full queue: "drop" new rows (counted), or "block" requests until the writer catches up
+    audit_overflow: Literal["drop", "block"] = "drop"
+
+    # Sampling profiler: requests sent with an "X-Profile: 1" header are profiled
+    # and dumped as collapsed stacks to profiling_dir (relative to backend/)
+    profiling_enabled: bool = False
+    profiling_interval_ms: float = Field(1.0, gt=0)
+    profiling_dir: str = "profiles"
+
+    # Prediction cache: LRU + TTL, cleared whenever the model file hash changes
+    cache_enabled: bool = True
+    cache_max_size: int = Field(10000, ge=1)
+    cache_ttl_s: float = Field(3600.0, gt=0)
+
+
+settings = Settings()
@@ -0,0 +1,143 @@
+"""
+HeartCare AI - Shadow Scoring
+Scores a sampled fraction of live model calls on a candidate model, off the request path
+"""
+
+import asyncio
+import logging
+import random
+
+import numpy as np
+
+from executor import InferenceExecutor
+from inference import Prediction, predict_timed
+from metrics import MODEL_SECONDS, SHADOW_DELTA, SHADOW_DISAGREEMENTS, SHADOW_DROPPED, SHADOW_ROWS
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowScorer:
+    """
+    A candidate model scored next to the serving one.
+
+    offer() is called after a serving model call returns. With probability
+    sample_rate it schedules the same rows on the candidate's own one-thread
+    pool and returns at once, so the response never waits for the candidate.
+    If max_pending shadow jobs are already scheduled (counted from offer(), so
+    a burst of calls before any job has started is bounded too), the sample is
+    dropped so a slow candidate cannot build up a backlog. Per-row |Δp|, label
+    disagreements and both models' encode + model time are recorded under the
+    candidate's version label, and a summary is logged every log_every calls.
+    """
+
+    def __init__(self, model, version: str, sha256: str, sample_rate: float, max_pending: int = 4,
+                 timeout_s: float = 30.0, log_every: int = 100, seed: int = None):
+        self.version = version
+        self.sha256 = sha256
+        self.sample_rate = sample_rate
+        self.log_every = log_every
+        self.max_pending = max_pending
+        self.executor = InferenceExecutor(kind="thread", workers=1, max_pending=max_pending, timeout_s=timeout_s)
+        self.executor.start(model)
+        self.serving_version = None
+        self.calls = 0
+        self.rows = 0
+        self.disagreements = 0
+        self.dropped = 0
+        self.errors = 0
+        self.abs_delta_sum = 0.0
+        self.abs_delta_max = 0.0
+        self.serving_seconds = 0.0
+        self.shadow_seconds = 0.0
+        self._random = random.Random(seed)
+        self._tasks = set()
+        self.scheduled = 0
+
+    def offer(self, features, serving: Prediction, serving_seconds: float, serving_version: str) -> bool:
+        """Maybe shadow-score rows the serving model just scored; True if a job was scheduled"""
+        if self._random.random() >= self.sample_rate:
+            return False
+        # scheduled is only touched from the event loop thread, as pending in InferenceExecutor.run.
+        # A task reaches the executor only once it runs, so executor.pending would lag behind.
+        if self.scheduled >= self.max_pending:
+            self.dropped += 1
+            SHADOW_DROPPED.inc(reason="saturated")
+            return False
+        task = asyncio.get_running_loop().create_task(
+            self._score(features, serving, serving_seconds, serving_version)
+        )
+        self.scheduled += 1
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return True
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        self.scheduled -= 1
+
+    async def _score(self, features, serving: Prediction, serving_seconds: float, serving_version: str):
+        try:
+            scores, timings = await self.executor.run(predict_timed, features)
+        except Exception as e:
+            self.errors += 1
+            SHADOW_DROPPED.inc(reason="error")
+            logger.warning(f"⚠️ Shadow scoring on {self.version} failed: {e!r}")
+            return
+
+        shadow_seconds = sum(timings.values())
+        delta = np.abs(scores.probability - serving.probability)
+        disagreements = int(np.count_nonzero(scores.label != serving.label))
+        self.serving_version = serving_version
+        self.calls += 1
+        self.rows += len(delta)
+        self.disagreements += disagreements
+        self.abs_delta_sum += float(delta.sum())
+        self.abs_delta_max = max(self.abs_delta_max, float(delta.max(initial=0.0)))
+        self.serving_seconds += serving_seconds
+        self.shadow_seconds += shadow_seconds
+
+        MODEL_SECONDS.observe(shadow_seconds, version=self.version, role="shadow")
+        SHADOW_ROWS.inc(len(delta), version=self.version)
+        SHADOW_DISAGREEMENTS.inc(disagreements, version=self.version)
+        for value in delta.tolist():
+            SHADOW_DELTA.observe(value, version=self.version)
+        if self.calls % self.log_every == 0:
+            self.log_summary()
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "sha256": self.sha256,
+            "serving_version": self.serving_version,
+            "sample_rate": self.sample_rate,
+            "calls": self.calls,
+            "rows": self.rows,
+            "mean_abs_delta": round(self.abs_delta_sum / self.rows, 6) if self.rows else None,
+            "max_abs_delta": round(self.abs_delta_max, 6),
+            "label_disagreement": round(self.disagreements / self.rows, 6) if self.rows else None,
+            "serving_ms_per_call": round(self.serving_seconds / self.calls * 1000, 3) if self.calls else None,
+            "shadow_ms_per_call": round(self.shadow_seconds / self.calls * 1000, 3) if self.calls else None,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "pending": self.scheduled,
+        }
+
+    def log_summary(self):
+        stats = self.stats()
+        if not stats["rows"]:
+            return
+        logger.info(
+            f"🌓 Shadow {self.version} vs {stats['serving_version']}: {stats['rows']} rows in {stats['calls']} calls, "
+            f"mean |Δp| {stats['mean_abs_delta']:.4f} (max {stats['max_abs_delta']:.4f}), "
+            f"labels differ on {stats['label_disagreement']:.2%}, "
+            f"{stats['serving_ms_per_call']:.2f} -> {stats['shadow_ms_per_call']:.2f} ms per call, "
+            f"{self.dropped} dropped"
+        )
+
+    async def stop(self):
+        """Cancel queued shadow jobs, stop the pool and log the final summary"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.to_thread(self.executor.shutdown)
+        self.log_summary()
@@ -0,0 +1,118 @@
+"""
+HeartCare AI - Stub Model
+Synthetic stand-in for cardiac_arrest_model.pkl, for benchmarks and tests
+that must run without the Hugging Face artifact
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from dataset import make_preprocessor
+from encoder import CAT_FEATURES, NUM_FEATURES
+
+# Value ranges and categories of heart_data.csv (see the notebook's describe() output)
+NUM_RANGES = {
+    'Age': (15, 80),
+    'BMI': (15.0, 40.0),
+    'Cholesterol_Level': (100.0, 300.0),
+    'Sleep_Hours': (3, 10),
+    'Blood_Pressure': (90, 180),
+    'Blood_Sugar': (70.0, 200.0),
+}
+CATEGORIES = {
+    'Gender': ['Female', 'Male'],
+    'Smoker': ['Yes', 'No'],
+    'Diabetes': ['Yes', 'No'],
+    'Hypertension': ['Yes', 'No'],
+    'Physical_Activity': ['Moderate', 'High', 'Low'],
+    'Diet': ['Healthy', 'Unhealthy'],
+    'Family_History': ['Yes', 'No'],
+    'Stress_Level': ['High', 'Low', 'Moderate'],
+    'Alcohol_Consumption': ['Yes', 'No'],
+}
+
+
+def make_training_frame(n_samples: int = 20000, seed: int = 42):
+    """Synthetic (X, y) with the schema of heart_data.csv after the notebook's column drops"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for feature, (low, high) in NUM_RANGES.items():
+        if isinstance(low, int):
+            data[feature] = rng.integers(low, high + 1, n_samples)
+        else:
+            data[feature] = rng.uniform(low, high, n_samples).round(1)
+    for feature, values in CATEGORIES.items():
+        data[feature] = rng.choice(values, n_samples)
+    X = pd.DataFrame(data)[NUM_FEATURES + CAT_FEATURES]
+
+    logit = (
+        (X['Age'] - 47) / 15
+        + (X['Cholesterol_Level'] - 200) / 60
+        + (X['Smoker'] == 'Yes')
+        + (X['Diabetes'] == 'Yes')
+        + (X['Family_History'] == 'Yes')
+        + 0.5 * (X['Hypertension'] == 'Yes')
+        - 0.5 * (X['Physical_Activity'] == 'High')
+        - 1.75
+        + rng.normal(0, 1, n_samples)
+    )
+    y = (logit > 0).astype(int)
+
+    for feature in CAT_FEATURES:
+        X[feature] = X[feature].astype('category')
+    return X, y
+
+
+def build_stub_model(n_estimators: int = 450, max_depth: int = 18, n_samples: int = 20000,
+                     seed: int = 42, n_jobs: int = -1):
+    """Fit the notebook's Pipeline + CalibratedClassifierCV(cv=5, isotonic) on synthetic data"""
+    X, y = make_training_frame(n_samples, seed)
+    pipeline = Pipeline([
+        ('preprocessor', make_preprocessor()),
+        ('classifier', RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_split=15,
+            min_samples_leaf=7,
+            max_features='sqrt',
+            bootstrap=True,
+            class_weight='balanced',
+            n_jobs=n_jobs,
+            random_state=seed
+        ))
+    ])
+    return CalibratedClassifierCV(pipeline, cv=5, method='isotonic').fit(X, y)
+
+
+def sample_patients(n: int, seed: int = 0, unknown_rate: float = 0.1) -> list:
+    """Random /predict payloads (PatientData dicts), with some "I don't know" answers"""
+    rng = np.random.default_rng(seed)
+
+    def pick(options):
+        if rng.random() < unknown_rate:
+            return "I don't know"
+        return str(rng.choice(options))
+
+    patients = []
+    for _ in range(n):
+        patients.append({
+            "age": int(rng.integers(18, 90)),
+            "gender": pick(["Male", "Female"]),
+            "bmi": round(float(rng.uniform(16, 45)), 1),
+            "smoker": pick(["Yes", "No"]),
+            "physical_activity": pick(["High", "Moderate", "Low"]),
+            "diet": pick(["Healthy", "Unhealthy"]),
+            "family_history": pick(["Yes", "No"]),
+            "stress_level": pick(["High", "Moderate", "Low"]),
+            "alcohol_consumption": pick(["Yes", "No"]),
+            "diabetes": pick(["Yes", "No"]),
+            "hypertension": pick(["Yes", "No"]),
+            "cholesterol_level": 180 if rng.random() < 0.3 else round(float(rng.uniform(100, 320)), 1),
+            "sleep_hours": round(float(rng.uniform(3, 11)), 1),
+            "blood_pressure": int(rng.integers(80, 190)),
+            "blood_sugar": 90 if rng.random() < 0.3 else round(float(rng.uniform(60, 220)), 1),
+        })
+    return patients
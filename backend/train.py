@@ -0,0 +1,268 @@
+"""
+HeartCare AI - Training
+Offline tool: the notebook's training run (split, Pipeline(ColumnTransformer,
+RandomForest), CalibratedClassifierCV(cv=5, isotonic), joblib.dump) from a local
+CSV, writing the artifact plus a metrics/timing manifest
+
+The notebook refits the ColumnTransformer inside every calibration fold. Here
+it is fitted once on the training split and the encoded matrices are cached
+under train_cache/, keyed by the CSV's SHA-256, so a rerun skips parsing and
+encoding. Scaling never changes which split a tree picks and the one-hot
+categories are the same in every fold, so the forests grow the same trees (their
+thresholds differ only by float32 rounding). Folds are fitted in parallel
+(--cv-jobs processes x --forest-jobs threads each). Each fold's forest is then
+wrapped back into Pipeline([preprocessor, classifier]), so the artifact has the
+notebook's layout and everything that reads it (compiled engine, lookup table,
+explanations, feature importance) works unchanged.
+
+Usage:
+    python train.py --data ../heart_data.csv --output cardiac_arrest_model.pkl
+    python train.py --data ../heart_data.csv --cv-jobs 5 --forest-jobs 2 --ingest
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import confusion_matrix
+from sklearn.pipeline import Pipeline
+
+import dataset
+from encoder import FEATURE_NAMES, FastEncoder, RawFeatures
+import model_loader
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Heart_Disease_Prediction.ipynb's classifier
+RF_PARAMS = {
+    "n_estimators": 450,
+    "max_depth": 18,
+    "min_samples_split": 15,
+    "min_samples_leaf": 7,
+    "max_features": "sqrt",
+    "bootstrap": True,
+    "class_weight": "balanced",
+    "oob_score": True,
+    "n_jobs": -1,
+    "random_state": 42,
+}
+CV_FOLDS = 5
+CALIBRATION = "isotonic"
+
+MANIFEST_FORMAT_VERSION = 1
+# Bump when the cached arrays would no longer match what encode_dataset produces
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class EncodedDataset:
+    """The notebook's train/test split, encoded once by a preprocessor fitted on the training rows"""
+    preprocessor: object
+    X_train: np.ndarray
+    X_test: np.ndarray
+    y_train: np.ndarray
+    y_test: np.ndarray
+    data_sha256: str
+    rows: int
+
+
+def cache_key(data_sha256: str, test_size: float, random_state: int) -> str:
+    spec = json.dumps([CACHE_FORMAT_VERSION, data_sha256, test_size, random_state, sklearn.__version__])
+    return hashlib.sha256(spec.encode()).hexdigest()[:24]
+
+
+def encode_dataset(path, cache_dir=None, test_size: float = dataset.TEST_SIZE,
+                   random_state: int = dataset.RANDOM_STATE):
+    """(EncodedDataset, cache hit) for a heart_data.csv export; cache_dir=None disables caching"""
+    data_sha256 = model_loader.file_sha256(path)
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = Path(cache_dir) / f"encoded-{cache_key(data_sha256, test_size, random_state)}.joblib"
+        if cache_path.exists():
+            return joblib.load(cache_path), True
+
+    X, y = dataset.load_dataset(path)
+    X_train, X_test, y_train, y_test = dataset.split_dataset(X, y, test_size, random_state)
+    preprocessor = dataset.make_preprocessor().fit(X_train)
+    encoder = FastEncoder.from_preprocessor(preprocessor)
+    encoded = EncodedDataset(
+        preprocessor=preprocessor,
+        X_train=encoder.encode(RawFeatures.from_frame(X_train)),
+        X_test=encoder.encode(RawFeatures.from_frame(X_test)),
+        y_train=y_train.to_numpy(),
+        y_test=y_test.to_numpy(),
+        data_sha256=data_sha256,
+        rows=len(X),
+    )
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        joblib.dump(encoded, tmp)
+        os.replace(tmp, cache_path)
+    return encoded, False
+
+
+def fit_calibrated(encoded: EncodedDataset, params: dict = None, cv: int = CV_FOLDS,
+                   cv_jobs: int = 1, forest_jobs: int = -1) -> CalibratedClassifierCV:
+    """
+    CalibratedClassifierCV(Pipeline(preprocessor, RandomForest), cv, isotonic) fitted
+    on the cached encoding. cv_jobs folds are fitted at once with forest_jobs
+    threads each; the artifact keeps params' n_jobs for serving.
+    """
+    params = {**RF_PARAMS, **(params or {})}
+    model = CalibratedClassifierCV(
+        RandomForestClassifier(**{**params, "n_jobs": forest_jobs}),
+        cv=cv, method=CALIBRATION, n_jobs=cv_jobs
+    ).fit(encoded.X_train, encoded.y_train)
+
+    # Restore the notebook's layout: every fold's forest behind the shared fitted preprocessor
+    for fold in model.calibrated_classifiers_:
+        forest = fold.estimator
+        forest.n_jobs = params["n_jobs"]
+        fold.estimator = Pipeline([('preprocessor', encoded.preprocessor), ('classifier', forest)])
+    model.estimator = Pipeline([
+        ('preprocessor', dataset.make_preprocessor()),
+        ('classifier', RandomForestClassifier(**params)),
+    ])
+    model.n_jobs = None
+    model.n_features_in_ = len(FEATURE_NAMES)
+    model.feature_names_in_ = np.array(FEATURE_NAMES, dtype=object)
+    return model
+
+
+def holdout_metrics(model: CalibratedClassifierCV, encoded: EncodedDataset) -> dict:
+    """Hold-out metrics of the calibrated model (scored on the cached encoding)"""
+    mean_proba = np.zeros(len(encoded.X_test))
+    raw_proba = np.zeros(len(encoded.X_test))
+    oob = []
+    for fold in model.calibrated_classifiers_:
+        forest = fold.estimator[-1]
+        scores = forest.predict_proba(encoded.X_test)[:, 1]
+        raw_proba += scores
+        mean_proba += np.clip(fold.calibrators[0].predict(scores), 0.0, 1.0)
+        if hasattr(forest, 'oob_score_'):
+            oob.append(forest.oob_score_)
+    folds = len(model.calibrated_classifiers_)
+    probability = mean_proba / folds
+
+    tn, fp, fn, tp = confusion_matrix(encoded.y_test, (probability > 0.5).astype(int), labels=[0, 1]).ravel()
+    metrics = dataset.evaluate(encoded.y_test, probability)
+    metrics["uncalibrated_auc"] = dataset.evaluate(encoded.y_test, raw_proba / folds)["auc"]
+    if oob:
+        metrics["oob_accuracy"] = round(float(np.mean(oob)), 5)
+    metrics["confusion_matrix"] = {"tn": int(tn), "fp": int(fp), "fn": int(fn), "tp": int(tp)}
+    return metrics
+
+
+def train(data_path, output, cache_dir=None, params: dict = None, cv: int = CV_FOLDS,
+          cv_jobs: int = None, forest_jobs: int = None, ingest: bool = False) -> dict:
+    """Run the training pipeline; writes output and output.json and returns the manifest"""
+    cpus = os.cpu_count() or 1
+    cv_jobs = cv_jobs or min(cv, cpus)
+    forest_jobs = forest_jobs or max(1, cpus // cv_jobs)
+    output = Path(output)
+    timings = {}
+
+    start = time.perf_counter()
+    encoded, cache_hit = encode_dataset(data_path, cache_dir)
+    timings["prepare"] = time.perf_counter() - start
+    logger.info(
+        f"📂 {encoded.rows:,} rows ({len(encoded.y_train):,} train / {len(encoded.y_test):,} test), "
+        f"encoded matrix {'from cache' if cache_hit else 'built'} in {timings['prepare']:.1f}s"
+    )
+
+    phase = time.perf_counter()
+    model = fit_calibrated(encoded, params, cv, cv_jobs, forest_jobs)
+    timings["fit"] = time.perf_counter() - phase
+    logger.info(f"🌲 {cv} calibration folds fitted in {timings['fit']:.1f}s ({cv_jobs} x {forest_jobs} jobs)")
+
+    phase = time.perf_counter()
+    metrics = holdout_metrics(model, encoded)
+    timings["evaluate"] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    joblib.dump(model, tmp)
+    os.replace(tmp, output)
+    model_sha256 = model_loader.file_sha256(output)
+    if ingest:
+        model_loader.default_store().ingest(output, model_loader.ref_name("full"), model_sha256)
+    timings["save"] = time.perf_counter() - phase
+    timings["total"] = time.perf_counter() - start
+
+    manifest = {
+        "format": MANIFEST_FORMAT_VERSION,
+        "model_sha256": model_sha256,
+        "data": {
+            "path": str(data_path),
+            "sha256": encoded.data_sha256,
+            "rows": encoded.rows,
+            "train_rows": len(encoded.y_train),
+            "test_rows": len(encoded.y_test),
+        },
+        "params": {**RF_PARAMS, **(params or {})},
+        "calibration": {"cv": cv, "method": CALIBRATION},
+        "parallelism": {"cv_jobs": cv_jobs, "forest_jobs": forest_jobs, "cpus": cpus},
+        "cache_hit": cache_hit,
+        "sklearn_version": sklearn.__version__,
+        "metrics": metrics,
+        "timings_s": {phase: round(seconds, 2) for phase, seconds in timings.items()},
+        "ingested": ingest,
+    }
+    with open(output.with_suffix(".json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="heart_data.csv (local file; no network access needed)")
+    parser.add_argument("--output", default=str(Path(__file__).parent / "trained_model.pkl"),
+                        help="Artifact; the manifest goes to the matching .json")
+    parser.add_argument("--cache-dir", default=str(Path(__file__).parent / "train_cache"),
+                        help="Encoded matrix cache")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-read and re-encode the CSV")
+    parser.add_argument("--cv-jobs", type=int, help="Calibration folds fitted at once (default: min(5, CPUs))")
+    parser.add_argument("--forest-jobs", type=int, help="Threads per fold's forest (default: CPUs / cv-jobs)")
+    parser.add_argument("--n-estimators", type=int, help=f"Override the notebook's {RF_PARAMS['n_estimators']} trees")
+    parser.add_argument("--params", help="JSON object of RandomForest parameters to override (e.g. from tune.py)")
+    parser.add_argument("--ingest", action="store_true",
+                        help="Point the model store's serving ref at the new artifact")
+    args = parser.parse_args()
+
+    try:
+        params = json.loads(args.params) if args.params else {}
+    except json.JSONDecodeError as e:
+        raise SystemExit(f"❌ --params is not valid JSON: {e}")
+    if args.n_estimators:
+        params["n_estimators"] = args.n_estimators
+    try:
+        manifest = train(
+            args.data, args.output, None if args.no_cache else args.cache_dir, params,
+            cv_jobs=args.cv_jobs, forest_jobs=args.forest_jobs, ingest=args.ingest
+        )
+    except (ValueError, FileNotFoundError) as e:
+        raise SystemExit(f"❌ {e}")
+
+    metrics = manifest["metrics"]
+    logger.info(f"✅ Model {manifest['model_sha256'][:12]} written to {args.output} in {manifest['timings_s']['total']:.0f}s")
+    logger.info(
+        f"📏 AUC {metrics['auc']:.4f}, Brier {metrics['brier']:.4f}, ECE {metrics['ece']:.4f}, "
+        f"accuracy {metrics['accuracy']:.4f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+HeartCare AI - Hyperparameter Tuning
+Offline tool: successive halving (optionally Hyperband) over the notebook's
+RandomForest settings, scored on validation AUC and serving latency, with the
+Pareto-optimal candidates reported
+
+Candidates are drawn from SEARCH_SPACE with a fixed seed. Each rung fits them on
+a larger share of the training rows (the resource), scores AUC on a validation
+split carved out of the training split (the test split is left alone), and
+times p99 single-row latency. The best 1/eta of a rung (and at least its whole
+Pareto front) go on to the next one, ranked by Pareto front (higher AUC, lower
+latency) and then by AUC, so fast candidates are not all eliminated early by
+slightly more accurate slow ones.
+
+Every finished trial is appended to train_cache/search-<key>.jsonl; rerunning
+the same command replays those trials instead of refitting them.
+
+Usage:
+    python tune.py --data ../heart_data.csv --candidates 27 --eta 3
+    python tune.py --data ../heart_data.csv --hyperband --max-p99-ms 40
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+import train
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Values sampled per candidate; the rest of train.RF_PARAMS is kept as in the notebook
+SEARCH_SPACE = {
+    "n_estimators": [50, 100, 150, 200, 300, 450],
+    "max_depth": [8, 10, 12, 15, 18, 22, None],
+    "min_samples_split": [2, 5, 10, 15, 25],
+    "min_samples_leaf": [1, 3, 5, 7, 10, 15],
+    "max_features": ["sqrt", "log2", 0.3, 0.5],
+}
+# Bump when a change here would make cached trials incomparable with new ones
+SEARCH_FORMAT_VERSION = 1
+VALIDATION_SIZE = 0.2
+
+
+def sample_candidates(n: int, seed: int = 42) -> list:
+    """n distinct parameter sets from SEARCH_SPACE (full RF_PARAMS dicts)"""
+    rng = np.random.default_rng(seed)
+    candidates, seen = [], set()
+    limit = math.prod(len(values) for values in SEARCH_SPACE.values())
+    while len(candidates) < min(n, limit):
+        params = {name: values[rng.integers(len(values))] for name, values in SEARCH_SPACE.items()}
+        key = candidate_id(params)
+        if key not in seen:
+            seen.add(key)
+            candidates.append({**train.RF_PARAMS, "oob_score": False, **params})
+    return candidates
+
+
+def candidate_id(params: dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def pareto_front(trials: list) -> list:
+    """Indices of trials no other trial beats on both AUC (higher) and p99 latency (lower)"""
+    front = []
+    for i, trial in enumerate(trials):
+        dominated = any(
+            other["auc"] >= trial["auc"] and other["p99_ms"] <= trial["p99_ms"]
+            and (other["auc"] > trial["auc"] or other["p99_ms"] < trial["p99_ms"])
+            for other in trials
+        )
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def select(trials: list, k: int) -> list:
+    """The k best trials: whole Pareto fronts in turn, each ordered by AUC"""
+    remaining = list(range(len(trials)))
+    chosen = []
+    while remaining and len(chosen) < k:
+        front = [remaining[i] for i in pareto_front([trials[i] for i in remaining])]
+        chosen.extend(sorted(front, key=lambda i: -trials[i]["auc"]))
+        remaining = [i for i in remaining if i not in front]
+    return [trials[i] for i in chosen[:k]]
+
+
+class TrialCache:
+    """Append-only JSONL of finished trials, keyed by (candidate id, rows)"""
+
+    def __init__(self, path):
+        self.path = Path(path) if path is not None else None
+        self.trials = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    # A line cut short by an interruption is simply refitted
+                    try:
+                        trial = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.trials[(trial["id"], trial["rows"])] = trial
+        self.replayed = 0
+
+    def get(self, params: dict, rows: int):
+        trial = self.trials.get((candidate_id(params), rows))
+        if trial is not None:
+            self.replayed += 1
+        return trial
+
+    def put(self, trial: dict):
+        self.trials[(trial["id"], trial["rows"])] = trial
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(trial) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def latency_percentiles(forest, rows: np.ndarray, folds: int = train.CV_FOLDS) -> tuple:
+    """
+    p50/p99 ms of single-row scoring. Each sample runs the forest once per
+    calibration fold, as the served CalibratedClassifierCV does.
+    """
+    forest.n_jobs = 1
+    forest.predict_proba(rows[:1])
+    times = []
+    for row in rows:
+        row = row.reshape(1, -1)
+        start = time.perf_counter()
+        for _ in range(folds):
+            forest.predict_proba(row)
+        times.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(times, [50, 99]) * 1000
+    return round(float(p50), 3), round(float(p99), 3)
+
+
+def run_trial(params: dict, split: tuple, rows: int, n_jobs: int, latency_samples: int) -> dict:
+    """Fit on the first rows of the (shuffled) fit split, score on the validation split"""
+    X_fit, y_fit, X_val, y_val = split
+    start = time.perf_counter()
+    forest = RandomForestClassifier(**{**params, "n_jobs": n_jobs}).fit(X_fit[:rows], y_fit[:rows])
+    fit_seconds = time.perf_counter() - start
+    auc = roc_auc_score(y_val, forest.predict_proba(X_val)[:, 1])
+    p50, p99 = latency_percentiles(forest, X_val[:latency_samples])
+    return {
+        "id": candidate_id(params),
+        "rows": rows,
+        "params": params,
+        "auc": round(float(auc), 5),
+        "p50_ms": p50,
+        "p99_ms": p99,
+        "fit_s": round(fit_seconds, 2),
+        "nodes": int(sum(tree.tree_.node_count for tree in forest.estimators_)),
+    }
+
+
+def successive_halving(candidates: list, split: tuple, cache: TrialCache, min_rows: int,
+                       eta: int = 3, n_jobs: int = -1, latency_samples: int = 200) -> list:
+    """Trials of the candidates that reach the last rung (all training rows)"""
+    max_rows = len(split[1])
+    rungs = max(0, math.floor(math.log(max_rows / min_rows, eta)))
+    survivors = candidates
+    for rung in range(rungs + 1):
+        rows = max_rows if rung == rungs else int(max_rows / eta ** (rungs - rung))
+        trials = []
+        for params in survivors:
+            trial = cache.get(params, rows)
+            if trial is None:
+                trial = run_trial(params, split, rows, n_jobs, latency_samples)
+                cache.put(trial)
+            trials.append(trial)
+        best = max(trials, key=lambda t: t["auc"])
+        logger.info(
+            f"🪜 rung {rung}: {len(trials)} candidates on {rows:,} rows, best AUC {best['auc']:.4f} "
+            f"({best['p99_ms']:.1f} ms p99)"
+        )
+        if rung == rungs:
+            return trials
+        # The rung's whole Pareto front survives, so the final rung still offers a trade-off
+        keep = max(1, len(trials) // eta, len(pareto_front(trials)))
+        survivors = [trial["params"] for trial in select(trials, keep)]
+    return []
+
+
+def hyperband_brackets(max_rows: int, min_rows: int, eta: int) -> list:
+    """(candidates, starting rows) per Hyperband bracket, most aggressive first"""
+    s_max = max(0, math.floor(math.log(max_rows / min_rows, eta)))
+    return [
+        (math.ceil((s_max + 1) / (s + 1) * eta ** s), max(min_rows, int(max_rows / eta ** s)))
+        for s in range(s_max, -1, -1)
+    ]
+
+
+def validation_split(encoded: train.EncodedDataset, seed: int = 42) -> tuple:
+    """(X_fit, y_fit, X_val, y_val) from the training split; fit rows shuffled so prefixes are random subsets"""
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        encoded.X_train, encoded.y_train, test_size=VALIDATION_SIZE, random_state=seed, stratify=encoded.y_train
+    )
+    return X_fit, y_fit, X_val, y_val
+
+
+def search_path(cache_dir, data_sha256: str, args_key: dict) -> Path:
+    spec = json.dumps([SEARCH_FORMAT_VERSION, data_sha256, SEARCH_SPACE, args_key], sort_keys=True, default=str)
+    return Path(cache_dir) / f"search-{hashlib.sha256(spec.encode()).hexdigest()[:16]}.jsonl"
+
+
+def tune(encoded: train.EncodedDataset, candidates: int = 27, eta: int = 3, min_rows: int = None,
+         hyperband: bool = False, seed: int = 42, n_jobs: int = -1, latency_samples: int = 200,
+         cache_dir=None) -> dict:
+    """Run the search; returns every full-data trial with the Pareto-optimal ones marked"""
+    split = validation_split(encoded, seed)
+    max_rows = len(split[1])
+    min_rows = min_rows or max(200, max_rows // eta ** 3)
+    key = {"candidates": candidates, "eta": eta, "min_rows": min_rows, "hyperband": hyperband, "seed": seed}
+    cache = TrialCache(search_path(cache_dir, encoded.data_sha256, key) if cache_dir is not None else None)
+
+    if hyperband:
+        brackets = hyperband_brackets(max_rows, min_rows, eta)
+    else:
+        brackets = [(candidates, min_rows)]
+
+    final = []
+    for bracket, (n, start_rows) in enumerate(brackets):
+        logger.info(f"🎲 bracket {bracket}: {n} candidates from {start_rows:,} rows")
+        final.extend(successive_halving(
+            sample_candidates(n, seed + bracket), split, cache, start_rows, eta, n_jobs, latency_samples
+        ))
+
+    # The same candidate can finish in several brackets; keep one trial each
+    final = list({trial["id"]: trial for trial in final}.values())
+    front = set(pareto_front(final))
+    return {
+        "data_sha256": encoded.data_sha256,
+        "search": key,
+        "trials_replayed": cache.replayed,
+        "results": sorted(
+            ({**trial, "pareto": i in front} for i, trial in enumerate(final)),
+            key=lambda t: (t["p99_ms"], -t["auc"])
+        ),
+    }
+
+
+def recommend(report: dict, max_p99_ms: float = None):
+    """Highest-AUC Pareto candidate within the latency budget (None if nothing fits)"""
+    eligible = [
+        trial for trial in report["results"]
+        if trial["pareto"] and (max_p99_ms is None or trial["p99_ms"] <= max_p99_ms)
+    ]
+    return max(eligible, key=lambda t: t["auc"]) if eligible else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="heart_data.csv (local file)")
+    parser.add_argument("--candidates", type=int, default=27, help="Candidates in the first rung (successive halving)")
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta of the candidates per rung")
+    parser.add_argument("--min-rows", type=int, help="Training rows in the first rung")
+    parser.add_argument("--hyperband", action="store_true", help="Run every Hyperband bracket instead of one")
+    parser.add_argument("--max-p99-ms", type=float, help="Latency budget for the recommended candidate")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Threads per forest fit")
+    parser.add_argument("--latency-samples", type=int, default=200, help="Single-row timings per trial")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-dir", default=str(Path(__file__).parent / "train_cache"),
+                        help="Encoded matrix cache and finished trials")
+    parser.add_argument("--output", default=str(Path(__file__).parent / "tune_report.json"))
+    args = parser.parse_args()
+
+    if args.eta < 2:
+        raise SystemExit("❌ --eta must be at least 2")
+    try:
+        encoded, _ = train.encode_dataset(args.data, args.cache_dir)
+    except (ValueError, FileNotFoundError) as e:
+        raise SystemExit(f"❌ {e}")
+
+    start = time.perf_counter()
+    report = tune(encoded, args.candidates, args.eta, args.min_rows, args.hyperband, args.seed,
+                  args.n_jobs, args.latency_samples, args.cache_dir)
+    report["search_seconds"] = round(time.perf_counter() - start, 1)
+    best = recommend(report, args.max_p99_ms)
+    report["recommended"] = best
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    logger.info(f"✅ {len(report['results'])} finalists ({report['trials_replayed']} trials replayed from cache)")
+    for trial in report["results"]:
+        if trial["pareto"]:
+            logger.info(f"   ⭐ AUC {trial['auc']:.4f}  p99 {trial['p99_ms']:7.2f} ms  {trial['params']}")
+    if best is None:
+        logger.info("⚠️ No Pareto candidate meets the latency budget")
+    else:
+        tuned = {name: best["params"][name] for name in SEARCH_SPACE}
+        logger.info(f"🏁 Recommended: python train.py --data {args.data} --params '{json.dumps(tuned)}'")
+
+
+if __name__ == "__main__":
+    main()
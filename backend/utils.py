@@ -4,52 +4,26 @@ Helper functions for model loading, preprocessing, and recommendations
 """
 
 import pandas as pd
-import joblib
-from pathlib import Path
 import logging
-from huggingface_hub import hf_hub_download
+
+import importance
+from encoder import CAT_FEATURES, CAT_IMPUTATION, UNKNOWN
+from model_loader import default_store, load_model
+from risk import UTILS_RECOMMENDATIONS
 
 logger = logging.getLogger(__name__)
 
-# Mode dictionary for imputation (default values)
-MODE_DICT = {
-    'Gender': 'Male',
-    'Smoker': 'No',
-    'Diabetes': 'No',
-    'Hypertension': 'No',
-    'Physical_Activity': 'Moderate',
-    'Diet': 'Healthy',
-    'Family_History': 'No',
-    'Stress_Level': 'Moderate',
-    'Alcohol_Consumption': 'No'
-}
+# Imputation defaults by training column (the table itself is encoder.CAT_IMPUTATION)
+_IMPUTATION_DEFAULTS = {feature: default for feature, (_, default) in zip(CAT_FEATURES, CAT_IMPUTATION)}
 
 
 def get_model():
     """
-    Load the trained model from local file or download from Hugging Face
+    Load the trained model (local content-addressed store first, then
+    backend/cardiac_arrest_model.pkl, then Hugging Face Hub if enabled)
     Returns the loaded model object
     """
-    model_path = Path(__file__).parent / "cardiac_arrest_model.pkl"
-    
-    # Try to load local model first
-    if model_path.exists():
-        logger.info(f"Loading model from {model_path}")
-        return joblib.load(model_path)
-    
-    # If not found locally, download from Hugging Face Hub
-    try:
-        logger.info("Model not found locally. Downloading from Hugging Face Hub...")
-        downloaded_path = hf_hub_download(
-            repo_id="ZainShahHere/cardiac_arrest_model",
-            filename="cardiac_arrest_model.pkl",
-            cache_dir=str(Path(__file__).parent)
-        )
-        logger.info(f"Model downloaded to {downloaded_path}")
-        return joblib.load(downloaded_path)
-    except Exception as e:
-        logger.error(f"Failed to download model: {str(e)}")
-        raise Exception("Could not load model. Please ensure model file exists or HF repo is accessible.")
+    return load_model().model
 
 
 def impute_categorical(feature_name, value):
@@ -57,8 +31,8 @@ def impute_categorical(feature_name, value):
     Impute categorical features if user selects "I don't know"
     Uses mode (most common value) as default
     """
-    if value == "I don't know":
-        return MODE_DICT.get(feature_name, 'No')
+    if value == UNKNOWN:
+        return _IMPUTATION_DEFAULTS.get(feature_name, 'No')
     return value
 
 
@@ -119,6 +93,7 @@ def preprocess_input(patient_data):
 def get_risk_message(risk_percentage, patient_data):
     """
     Generate personalized health message and recommendations based on risk level
+    (rules in risk.UTILS_RECOMMENDATIONS; use its messages() for many patients)
     
     Args:
         risk_percentage: Risk percentage (0-100)
@@ -127,66 +102,18 @@ def get_risk_message(risk_percentage, patient_data):
     Returns:
         tuple: (message, recommendations list)
     """
-    recommendations = []
-    
-    # Risk-based message
-    if risk_percentage < 20:
-        message = "🎉 Great news! Your heart health looks good. Keep up the healthy lifestyle!"
-        recommendations.append("Continue your current healthy habits")
-        recommendations.append("Regular exercise and balanced diet are key")
-        recommendations.append("Annual health checkups recommended")
-    elif risk_percentage < 50:
-        message = "⚠️ Moderate risk detected. Some lifestyle improvements may help reduce your risk."
-        recommendations.append("Consider scheduling a medical checkup")
-        recommendations.append("Monitor your blood pressure and cholesterol regularly")
-        recommendations.append("Increase physical activity to 30+ mins daily")
-    else:
-        message = "🚨 High risk detected. Please consult a healthcare professional soon."
-        recommendations.append("⚕️ URGENT: Schedule a medical consultation immediately")
-        recommendations.append("Monitor symptoms like chest pain, shortness of breath")
-        recommendations.append("Avoid strenuous activities until cleared by doctor")
-        recommendations.append("Take prescribed medications regularly")
-    
-    # Lifestyle-specific recommendations
-    if patient_data.smoker == "Yes":
-        recommendations.append("🚭 Quit smoking - it's the single best thing for your heart")
-    
-    if patient_data.physical_activity == "Low":
-        recommendations.append("🏃‍♂️ Start with 15-minute daily walks, gradually increase")
-    
-    if patient_data.diet == "Unhealthy":
-        recommendations.append("🥗 Focus on fruits, vegetables, whole grains, and lean proteins")
-    
-    if patient_data.stress_level == "High":
-        recommendations.append("🧘‍♀️ Practice stress management: meditation, yoga, or deep breathing")
-    
-    if patient_data.bmi >= 30:
-        recommendations.append("⚖️ Weight management through diet and exercise can reduce risk")
-    
-    if patient_data.sleep_hours < 6:
-        recommendations.append("😴 Aim for 7-9 hours of quality sleep per night")
-    
-    if patient_data.alcohol_consumption == "Yes":
-        recommendations.append("🍷 Limit alcohol consumption to moderate levels")
-    
-    # Clinical recommendations
-    if patient_data.hypertension == "Yes":
-        recommendations.append("💊 Keep blood pressure under control with medication and lifestyle")
-    
-    if patient_data.diabetes == "Yes":
-        recommendations.append("🩸 Manage blood sugar levels through diet, exercise, and medication")
-    
-    if patient_data.cholesterol_level > 240:
-        recommendations.append("📊 High cholesterol - discuss statin therapy with your doctor")
-    
-    return message, recommendations
+    return UTILS_RECOMMENDATIONS.message(risk_percentage, patient_data)
 
 
 def get_feature_importance():
     """
-    Get feature importance from the trained model (for future use)
+    Get feature importance from the trained model
     Can be used to show users which factors most influenced their prediction
+
+    Returns:
+        dict: per-input importances (largest first), persisted in the model
+        store after the first call for a given model file
     """
-    # This would require extracting feature importance from the RandomForest
-    # Left as placeholder for future enhancement
-    pass
+    loaded = load_model()
+    root = default_store().root / "importance"
+    return importance.load_or_compute(loaded.path, loaded.sha256, root, loaded.model)
@@ -0,0 +1,45 @@
+"""
+HeartCare AI - Compiled Ensemble Benchmark
+Latency of the sklearn model (single-pass inference layer) vs the compiled
+flat-array ensemble, plus the max probability difference between the two
+
+Usage:
+    python benchmarks/bench_compiled.py [--model cardiac_arrest_model.pkl] [--rows 1 100 1000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from bench_utils import add_model_arguments, load_benchmark_model, sample_frame, time_calls
+from compiled_model import CompiledEnsemble
+from inference import predict
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_model_arguments(parser)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    model = load_benchmark_model(args)
+    start = time.perf_counter()
+    compiled = CompiledEnsemble.from_model(model)
+    print(f"⚙️ Compiled in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({len(compiled.roots)} trees, {len(compiled.feature):,} nodes, {compiled.nbytes / 1e6:.1f} MB)")
+
+    print(f"\n{'rows':>6} | {'sklearn p50':>12} | {'compiled p50':>13} | {'speedup':>8} | {'max |Δp|':>9}")
+    print("-" * 62)
+    for n_rows in args.rows:
+        X = sample_frame(n_rows)
+        diff = np.abs(predict(model, X).probability - compiled.predict_scores(X).probability).max()
+        before = time_calls(lambda: predict(model, X), args.repeat)
+        after = time_calls(lambda: compiled.predict_scores(X), args.repeat)
+        speedup = before["p50_ms"] / after["p50_ms"]
+        print(f"{n_rows:>6} | {before['p50_ms']:>9.2f} ms | {after['p50_ms']:>10.2f} ms | {speedup:>7.1f}x | {diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
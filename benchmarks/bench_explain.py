@@ -0,0 +1,110 @@
+"""
+HeartCare AI - Explanation Benchmark
+Latency of SHAP explanations: TreeExplainer over the folds' forests (what /explain
+uses) per batch size, a naive KernelExplainer over the calibrated model for
+comparison, and /explain end to end with a cold and a warm explanation cache
+
+Needs the optional shap package.
+
+Usage:
+    python benchmarks/bench_explain.py [--model cardiac_arrest_model.pkl] [--rows 1 10 100]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from bench_utils import add_model_arguments, load_benchmark_model, sample_frame, time_calls
+from encoder import RawFeatures
+from explain import EnsembleExplainer, shap
+from inference import predict
+
+
+def bench_endpoint(model_path, repeat: int) -> dict:
+    """POST /explain for one patient: first call (cache miss) vs repeated calls (hits)"""
+    import httpx
+
+    import main
+    from stub_model import sample_patients
+
+    # Loaded and activated the way startup does it (importances are not needed)
+    main.settings.model_path = str(model_path)
+    prepared = main.prepare_model(extras=False)
+    prepared.explainer, prepared.explainer_error = main.build_explainer(prepared.model)
+    main.activate_model(prepared)
+    main.inference_executor.start(prepared.serving_model, prepared.load_worker_model)
+    main.explain_executor.start(None)
+    patients = sample_patients(repeat, seed=7)
+
+    async def run():
+        timings = {"miss": [], "hit": []}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://heartcare") as client:
+            for patient in patients:
+                for kind in ("miss", "hit"):
+                    start = time.perf_counter()
+                    response = await client.post("/explain", json={"patients": [patient]})
+                    response.raise_for_status()
+                    timings[kind].append((time.perf_counter() - start) * 1000)
+        return {kind: sorted(samples)[len(samples) // 2] for kind, samples in timings.items()}
+
+    try:
+        return asyncio.run(run())
+    finally:
+        main.inference_executor.shutdown()
+        main.explain_executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_model_arguments(parser)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--kernel-samples", type=int, default=200,
+                        help="KernelExplainer nsamples for the baseline (0 to skip it)")
+    args = parser.parse_args()
+    if shap is None:
+        raise SystemExit("❌ shap is not installed (pip install shap)")
+
+    model = load_benchmark_model(args)
+
+    start = time.perf_counter()
+    explainer = EnsembleExplainer.from_model(model)
+    print(f"\n🔎 Explainer build: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"\n{'rows':>6} | {'TreeExplainer p50':>18} | {'per row':>10}")
+    print("-" * 42)
+    for n_rows in args.rows:
+        features = RawFeatures.from_frame(sample_frame(n_rows))
+        contributions = explainer.explain(features)
+        # Exact decomposition of the uncalibrated score before timing anything
+        assert np.allclose(explainer.base_value + contributions.sum(axis=1), predict(model, features).raw_score)
+        stats = time_calls(lambda: explainer.explain(features), args.repeat, warmup=1)
+        print(f"{n_rows:>6} | {stats['p50_ms']:>15.1f} ms | {stats['p50_ms'] / n_rows:>7.2f} ms")
+
+    if args.kernel_samples:
+        background = shap.sample(sample_frame(200, seed=5), 50, random_state=0)
+        X = sample_frame(1)
+        kernel = shap.KernelExplainer(lambda data: predict(model, RawFeatures.from_frame(
+            X.iloc[[0] * len(data)].assign(**dict(zip(X.columns, np.asarray(data).T)))
+        )).probability, background)
+        start = time.perf_counter()
+        kernel.shap_values(X, nsamples=args.kernel_samples, silent=True)
+        print(f"\n🐢 KernelExplainer (1 row, {args.kernel_samples} samples x 50 background): "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = args.model
+        if model_path is None:
+            model_path = Path(directory) / "cardiac_arrest_model.pkl"
+            joblib.dump(model, model_path)
+        endpoint = bench_endpoint(model_path, args.repeat)
+    print(f"\n🌐 /explain, 1 patient: {endpoint['miss']:.1f} ms uncached, {endpoint['hit']:.2f} ms cached (p50)")
+
+
+if __name__ == "__main__":
+    main()
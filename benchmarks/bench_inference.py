@@ -0,0 +1,49 @@
+"""
+HeartCare AI - Inference Benchmark
+Compares predict_proba() + predict() (two passes over the ensemble) with the
+single-pass inference layer used by the backend and the Streamlit app
+
+Usage:
+    python benchmarks/bench_inference.py [--model cardiac_arrest_model.pkl] [--rows 1 100 1000]
+"""
+
+import argparse
+
+import numpy as np
+
+from bench_utils import add_model_arguments, load_benchmark_model, sample_frame, time_calls
+from inference import predict
+
+
+def two_pass(model, X):
+    """What predict_risk used to do"""
+    return model.predict_proba(X)[:, 1], model.predict(X)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_model_arguments(parser)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    model = load_benchmark_model(args)
+
+    print(f"\n{'rows':>6} | {'two-pass p50':>13} | {'single-pass p50':>16} | {'saved':>7}")
+    print("-" * 54)
+    for n_rows in args.rows:
+        X = sample_frame(n_rows)
+
+        # Same answers before timing anything
+        proba, label = two_pass(model, X)
+        scores = predict(model, X)
+        assert np.allclose(proba, scores.probability) and np.array_equal(label, scores.label)
+
+        before = time_calls(lambda: two_pass(model, X), args.repeat)
+        after = time_calls(lambda: predict(model, X), args.repeat)
+        saved = 1 - after["p50_ms"] / before["p50_ms"]
+        print(f"{n_rows:>6} | {before['p50_ms']:>10.1f} ms | {after['p50_ms']:>13.1f} ms | {saved:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+HeartCare AI - Streamlit Rerun Benchmark
+Wall time of heart_app.py script runs (every widget change reruns the whole
+script), driven in-process with streamlit.testing.AppTest
+
+    baseline  the app before the rebuild: joblib.load of the artifact on every run,
+              then predict_proba + predict on submit
+    rebuilt   heart_app.py: st.cache_resource model, the backend's predict +
+              risk.assess on submit, per-session memo for repeated answers
+
+Usage:
+    python benchmarks/bench_streamlit.py [--model cardiac_arrest_model.pkl] [--repeat 10]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+
+from bench_utils import add_model_arguments, load_benchmark_model
+from settings import settings
+
+APP_PATH = Path(__file__).resolve().parent.parent / "heart_app.py"
+
+# The pre-rebuild app's per-run work, with the Hub download replaced by a local file
+BASELINE_APP = """
+import joblib
+import pandas as pd
+import streamlit as st
+
+calibrated_rf = joblib.load({model_path!r})
+with st.form("input_form"):
+    age = st.number_input("Age", min_value=1, max_value=120, value=30, key="age")
+    submit = st.form_submit_button("Predict My Risk")
+if submit:
+    input_df = pd.DataFrame([[age, 22.0, 180, 7.0, 120, 90, "Male", "No", "No", "No", "Moderate",
+                              "Healthy", "No", "Low", "No"]],
+                            columns={columns!r})
+    risk_prob = calibrated_rf.predict_proba(input_df)[0][1]
+    prediction = calibrated_rf.predict(input_df)[0]
+    st.markdown(f"{{int(risk_prob * 100)}}% / {{prediction}}")
+"""
+
+
+def timed(action) -> float:
+    start = time.perf_counter()
+    at = action()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def bench_app(at, repeat: int) -> dict:
+    """ms per run: first run, idle rerun, submit with new answers, resubmit of the same answers"""
+    results = {"first": timed(at.run)}
+    results["rerun"] = statistics.median(timed(at.run) for _ in range(repeat))
+    new, same = [], []
+    for i in range(repeat):
+        at.number_input(key="age").set_value(30 + i)
+        new.append(timed(lambda: at.button[0].click().run()))
+        same.append(timed(lambda: at.button[0].click().run()))
+    results["submit_new"] = statistics.median(new)
+    results["submit_same"] = statistics.median(same)
+    return results
+
+
+def main():
+    from streamlit.testing.v1 import AppTest
+
+    from encoder import FEATURE_NAMES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_model_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model
+        if not model_path:
+            model_path = str(Path(tmp) / "stub_model.pkl")
+            joblib.dump(load_benchmark_model(args), model_path)
+        # heart_app.py loads through model_loader, which honours model_path
+        settings.model_path = model_path
+
+        baseline = bench_app(AppTest.from_string(
+            BASELINE_APP.format(model_path=model_path, columns=FEATURE_NAMES), default_timeout=600
+        ), args.repeat)
+        rebuilt = bench_app(AppTest.from_file(str(APP_PATH), default_timeout=600), args.repeat)
+
+    print(f"\n{'script run (p50)':<28} | {'baseline':>10} | {'rebuilt':>10}")
+    print("-" * 56)
+    for key, label in (("first", "first run"), ("rerun", "rerun, no submit"),
+                       ("submit_new", "submit, new answers"), ("submit_same", "submit, same answers")):
+        print(f"{label:<28} | {baseline[key]:>7.1f} ms | {rebuilt[key]:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+HeartCare AI - Benchmark Helpers
+Shared model loading and timing for the scripts in this folder
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from model_loader import deserialize  # noqa: E402
+from stub_model import build_stub_model, make_training_frame  # noqa: E402
+
+
+def add_model_arguments(parser):
+    """--model / --trees / --train-rows options shared by every benchmark"""
+    parser.add_argument("--model", help="Path to cardiac_arrest_model.pkl (default: synthetic stub model)")
+    parser.add_argument("--trees", type=int, default=450, help="Trees per fold for the stub model")
+    parser.add_argument("--train-rows", type=int, default=20000, help="Training rows for the stub model")
+
+
+def load_benchmark_model(args):
+    """Load the real artifact if given, otherwise fit a stub with the same structure"""
+    if args.model:
+        print(f"📥 Loading model from {args.model}")
+        return deserialize(args.model)
+    print(f"🧪 Building stub model ({args.trees} trees x 5 folds, {args.train_rows} rows)")
+    return build_stub_model(n_estimators=args.trees, n_samples=args.train_rows)
+
+
+def sample_frame(n_rows: int, seed: int = 123):
+    """Model input frame with n_rows synthetic patients"""
+    X, _ = make_training_frame(n_rows, seed)
+    return X
+
+
+def time_calls(fn, repeat: int, warmup: int = 2) -> dict:
+    """Run fn repeatedly and summarize wall-clock latency in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
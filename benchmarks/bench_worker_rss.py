@@ -0,0 +1,118 @@
+"""
+HeartCare AI - Worker Memory Benchmark
+Memory per serving process for each way of loading the model, to size how many
+uvicorn/gunicorn workers fit on a node
+
+Each mode starts N fresh (spawned) worker processes that load the model, score a
+warm-up batch and then idle while their RSS / USS / PSS are read with psutil.
+USS (memory private to a worker) is what every additional worker costs; pages
+of a memory-mapped export are shared and only show up in RSS/PSS.
+
+Modes:
+    baseline       imports only (interpreter + numpy/pandas/sklearn)
+    pickle         joblib.load of the artifact
+    pickle-mmap    joblib.load(mmap_mode='r') (sklearn copies tree nodes anyway)
+    compiled       joblib.load + CompiledEnsemble.from_model per worker
+    compiled-mmap  CompiledEnsemble.load of a shared on-disk export
+
+Usage:
+    python benchmarks/bench_worker_rss.py [--model cardiac_arrest_model.pkl] [--workers 4]
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import psutil
+
+from bench_utils import BACKEND_DIR, add_model_arguments, load_benchmark_model, sample_frame
+
+MODES = ["baseline", "pickle", "pickle-mmap", "compiled", "compiled-mmap"]
+
+
+def worker(mode: str, model_path: str, export_dir: str, ready, stop):
+    """Load the model the way `mode` does, touch it with a prediction, then idle"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from compiled_model import CompiledEnsemble
+    from inference import predict
+    from model_loader import deserialize
+
+    model = None
+    if mode == "pickle":
+        model = deserialize(model_path, mmap=False)
+    elif mode == "pickle-mmap":
+        model = deserialize(model_path, mmap=True)
+    elif mode == "compiled":
+        model = CompiledEnsemble.from_model(deserialize(model_path, mmap=False))
+    elif mode == "compiled-mmap":
+        model = CompiledEnsemble.load(export_dir)
+    if model is not None:
+        predict(model, sample_frame(256))
+    ready.set()
+    stop.wait()
+
+
+def measure(mode: str, workers: int, model_path: str, export_dir: str) -> dict:
+    """Mean RSS / USS / PSS (MB) across `workers` processes running `mode`"""
+    ctx = mp.get_context("spawn")
+    stop = ctx.Event()
+    processes, events = [], []
+    for _ in range(workers):
+        ready = ctx.Event()
+        process = ctx.Process(target=worker, args=(mode, model_path, export_dir, ready, stop))
+        process.start()
+        processes.append(process)
+        events.append(ready)
+    for ready in events:
+        ready.wait()
+
+    samples = [psutil.Process(p.pid).memory_full_info() for p in processes]
+    stop.set()
+    for process in processes:
+        process.join()
+
+    def mean_mb(name):
+        values = [getattr(s, name, 0) for s in samples]
+        return sum(values) / len(values) / 1e6
+
+    return {"rss": mean_mb("rss"), "uss": mean_mb("uss"), "pss": mean_mb("pss")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_model_arguments(parser)
+    parser.add_argument("--workers", type=int, default=4, help="Processes per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from compiled_model import CompiledEnsemble
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = load_benchmark_model(args)
+        model_path = args.model
+        if model_path is None:
+            model_path = str(Path(tmp) / "model.pkl")
+            joblib.dump(model, model_path)
+        export_dir = str(Path(tmp) / "compiled")
+        CompiledEnsemble.from_model(model).save(export_dir)
+        del model
+
+        print(f"\n{'mode':>14} | {'RSS/worker':>11} | {'USS/worker':>11} | {'PSS/worker':>11} | {'+ per worker':>12}")
+        print("-" * 72)
+        baseline = None
+        for mode in args.modes:
+            stats = measure(mode, args.workers, model_path, export_dir)
+            if mode == "baseline":
+                baseline = stats["uss"]
+            added = f"{stats['uss'] - baseline:>9.1f} MB" if baseline is not None else f"{'-':>12}"
+            print(f"{mode:>14} | {stats['rss']:>8.1f} MB | {stats['uss']:>8.1f} MB | "
+                  f"{stats['pss']:>8.1f} MB | {added}")
+        print("\n+ per worker = USS above the baseline interpreter: the memory each extra worker adds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+HeartCare AI - Load Test
+Drives /predict or /predict/batch at a fixed concurrency with generated patients
+and reports throughput, p50/p95/p99 latency, CPU and RSS. Results are saved as
+JSON tagged with the git commit so runs can be compared across commits.
+
+The app runs in-process (httpx ASGI transport, startup included) unless --url
+points at a running server. In-process runs use a synthetic stub model unless
+--model is given, so no Hugging Face download is needed.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 16 --requests 2000
+    python benchmarks/load_test.py --endpoint batch --batch-size 100 --requests 200
+    python benchmarks/load_test.py --url http://localhost:8000 --server-pid 12345
+    python benchmarks/load_test.py --compare benchmarks/results/<previous>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import joblib
+import psutil
+
+from bench_utils import BACKEND_DIR, add_model_arguments, load_benchmark_model
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def git_commit() -> dict:
+    """Current commit and whether the tree has uncommitted changes"""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+class ResourceSampler:
+    """Background sampling of a process's RSS, plus its CPU time over the run"""
+
+    def __init__(self, pid: int, interval_s: float = 0.1):
+        self.process = psutil.Process(pid)
+        self.interval_s = interval_s
+        self.rss = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.rss.append(self.process.memory_info().rss)
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self):
+        self._cpu_start = self.process.cpu_times()
+        self._wall_start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        cpu = self.process.cpu_times()
+        self.cpu_s = (cpu.user - self._cpu_start.user) + (cpu.system - self._cpu_start.system)
+        self.wall_s = time.perf_counter() - self._wall_start
+
+    def summary(self) -> dict:
+        return {
+            "pid": self.process.pid,
+            "cpu_s": round(self.cpu_s, 3),
+            "cpu_percent": round(100 * self.cpu_s / self.wall_s, 1),
+            "rss_mb_start": round(self.rss[0] / 1e6, 1) if self.rss else None,
+            "rss_mb_max": round(max(self.rss) / 1e6, 1) if self.rss else None,
+        }
+
+
+async def drive(client: httpx.AsyncClient, args, payloads) -> dict:
+    """Closed-loop load: `concurrency` workers send requests back to back"""
+    if args.endpoint == "batch":
+        path = "/predict/batch"
+        bodies = [
+            {"patients": payloads[i:i + args.batch_size]}
+            for i in range(0, len(payloads) - args.batch_size + 1, args.batch_size)
+        ]
+        rows_per_request = args.batch_size
+    else:
+        path, bodies, rows_per_request = "/predict", payloads, 1
+
+    latencies, statuses = [], Counter()
+    counter = iter(range(args.requests))
+
+    async def worker():
+        for i in counter:
+            body = bodies[i % len(bodies)]
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    # Warm-up (first-call overhead, caches) is excluded from the results
+    for body in bodies[:args.warmup]:
+        await client.post(path, json=body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    ok = statuses.get(200, 0)
+    return {
+        "endpoint": path,
+        "requests": args.requests,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 1),
+        "rows_per_s": round(ok * rows_per_request / elapsed, 1),
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2) if latencies else None,
+        },
+    }
+
+
+async def run_in_process(args, payloads) -> tuple:
+    """Start the FastAPI app in this process and drive it over the ASGI transport"""
+    import main
+
+    await main.load_model()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://heartcare", timeout=args.timeout) as client:
+            with ResourceSampler(os.getpid()) as resources:
+                result = await drive(client, args, payloads)
+            health = (await client.get("/health")).json()
+    finally:
+        await main.stop_executor()
+    return result, resources.summary(), health
+
+
+async def run_against_server(args, payloads) -> tuple:
+    """Drive an already running server; CPU/RSS are read from --server-pid if given"""
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        with ResourceSampler(args.server_pid or os.getpid()) as resources:
+            result = await drive(client, args, payloads)
+        health = (await client.get("/health")).json()
+    summary = resources.summary()
+    summary["measured"] = "server" if args.server_pid else "client"
+    return result, summary, health
+
+
+def compare(current: dict, previous_path: str):
+    """Print throughput and latency changes against an earlier result file"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\n📊 vs {previous_path} (commit {str(previous['git']['commit'])[:10]})")
+    rows = [("throughput_rps", current["result"]["throughput_rps"], previous["result"]["throughput_rps"])]
+    rows += [
+        (f"{q} ms", current["result"]["latency_ms"][q], previous["result"]["latency_ms"][q])
+        for q in ("p50", "p95", "p99")
+    ]
+    for name, now, before in rows:
+        change = (now - before) / before * 100 if before else float("nan")
+        print(f"   {name:>15}: {before:>10} -> {now:>10} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_model_arguments(parser)
+    parser.add_argument("--url", help="Running server to test (default: run the app in-process)")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, for CPU/RSS")
+    parser.add_argument("--endpoint", choices=["predict", "batch"], default="predict")
+    parser.add_argument("--batch-size", type=int, default=100, help="Patients per /predict/batch request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--unique-patients", type=int, default=1000, help="Distinct generated payloads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Result JSON (default: benchmarks/results/load_<commit>_<time>.json)")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from settings import settings
+    from stub_model import sample_patients
+
+    n_payloads = max(args.unique_patients, args.batch_size if args.endpoint == "batch" else 1)
+    payloads = sample_patients(n_payloads, seed=args.seed)
+
+    stub = not args.url and not args.model
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            result, resources, health = asyncio.run(run_against_server(args, payloads))
+        else:
+            if stub:
+                # Stub mode: the app loads a synthetic model through its normal startup path
+                stub_path = Path(tmp) / "stub_model.pkl"
+                joblib.dump(load_benchmark_model(args), stub_path)
+                args.model = str(stub_path)
+            settings.model_path = str(Path(args.model).resolve())
+            result, resources, health = asyncio.run(run_in_process(args, payloads))
+
+    git = git_commit()
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git": git,
+        "config": {
+            "mode": "server" if args.url else "in-process",
+            "url": args.url,
+            "model": f"stub ({args.trees} trees x 5 folds)" if stub else args.model,
+            "endpoint": args.endpoint,
+            "batch_size": args.batch_size if args.endpoint == "batch" else 1,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "unique_patients": n_payloads,
+            "env": {k: v for k, v in os.environ.items() if k.startswith("HEARTCARE_")},
+        },
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "result": result,
+        "resources": resources,
+        "server": {key: health.get(key) for key in ("inference_engine", "executor", "batching", "cache")},
+    }
+
+    latency = result["latency_ms"]
+    print(f"\n🚀 {result['endpoint']} x {args.requests} @ concurrency {args.concurrency}")
+    print(f"   throughput: {result['throughput_rps']} req/s ({result['rows_per_s']} rows/s)")
+    print(f"   latency:    p50 {latency['p50']} ms | p95 {latency['p95']} ms | p99 {latency['p99']} ms | max {latency['max']} ms")
+    print(f"   statuses:   {result['statuses']}")
+    print(f"   resources:  CPU {resources['cpu_percent']}% | RSS max {resources['rss_mb_max']} MB")
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"load_{(git['commit'] or 'nogit')[:10]}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Saved {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,50 @@
 # Modern Streamlit Heart Disease Risk Prediction MVP
 import streamlit as st
-import numpy as np
-import pandas as pd
-import joblib
-import shap
-from huggingface_hub import hf_hub_download
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
 
+# Shared inference core with the FastAPI backend
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+import risk
+from encoder import RawFeatures
+from inference import predict
+from model_loader import load_model
 
 
-# Download model file from Hugging Face Hub with caching
-@st.cache_data
-def get_model_path():
-	return hf_hub_download(
-		repo_id="ZainShahHere/cardiac_arrest_model",  # your model repo
-		filename="cardiac_arrest_model.pkl"      # exact file name you uploaded
-	)
 
-model_path = get_model_path()
-calibrated_rf = joblib.load(model_path)
+# Load the model once per server process: local model store first,
+# Hugging Face Hub only if enabled (same loader as the FastAPI backend).
+# Reruns of this script reuse the same object instead of deserializing again.
+@st.cache_resource
+def get_model():
+	return load_model().model
+
+calibrated_rf = get_model()
 
+# Assessments remembered per browser session, so resubmitting the same answers
+# skips the model call
+MEMO_SIZE = 32
 
 
-# Load model
-# @st.cache_resource
-# def load_model():
-# 	return joblib.load('cardiac_arrest_model.pkl')
-# calibrated_rf = load_model()
+def assess_patient(patient):
+	"""The backend's /predict steps: "I don't know" imputation, one pass over the ensemble, risk adjustment, recommendations"""
+	scores = predict(calibrated_rf, RawFeatures.from_patients([patient]))
+	return risk.assess(scores, risk.patient_columns([patient]))[0]
 
-# Example: cache data loading if you use a CSV or heavy preprocessing
-# @st.cache_data
-# def load_data():
-# 	return pd.read_csv('heart_data.csv')
-# df = load_data()  # Uncomment if you use the dataset in the app
 
-# Feature lists
-num_features = ['Age', 'BMI', 'Cholesterol_Level', 'Sleep_Hours', 'Blood_Pressure', 'Blood_Sugar']
-cat_features = ['Gender', 'Smoker', 'Diabetes', 'Hypertension', 'Physical_Activity', 'Diet', 'Family_History', 'Stress_Level', 'Alcohol_Consumption']
+def memoized_assessment(patient):
+	memo = st.session_state.setdefault("assessments", OrderedDict())
+	key = tuple(sorted(vars(patient).items()))
+	if key in memo:
+		memo.move_to_end(key)
+	else:
+		memo[key] = assess_patient(patient)
+		if len(memo) > MEMO_SIZE:
+			memo.popitem(last=False)
+	return memo[key]
 
-# Imputation function for categorical features
-def impute_cat(feature, value, mode_dict):
-	if value == "I don't know":
-		return mode_dict.get(feature, 'No')
-	return value
 
 # UI Styling
 
@@ -66,9 +69,6 @@ st.title("Heart Disease Risk Predictor")
 st.subheader("Empowering You to Take Control of Your Heart Health")
 st.markdown("Enter your health details below. The app predicts your risk of cardiac arrest using AI.")
 
-# Mode dictionary for imputation (can be updated with real mode values)
-mode_dict = {f: 'No' for f in cat_features}
-
 # Input form
 with st.form("input_form"):
 	with st.expander("👤 Personal Information", expanded=True):
@@ -106,25 +106,18 @@ with st.form("input_form"):
 	submit = st.form_submit_button("Predict My Risk")
 
 if submit:
-	# Impute categorical features
-	cat_inputs = [
-		impute_cat('Gender', gender, mode_dict),
-		impute_cat('Smoker', smoker, mode_dict),
-		impute_cat('Diabetes', diabetes, mode_dict),
-		impute_cat('Hypertension', hypertension, mode_dict),
-		impute_cat('Physical_Activity', activity, mode_dict),
-		impute_cat('Diet', diet, mode_dict),
-		impute_cat('Family_History', family, mode_dict),
-		impute_cat('Stress_Level', stress, mode_dict),
-		impute_cat('Alcohol_Consumption', alcohol, mode_dict)
-	]
-	num_inputs = [age, bmi, chol, sleep, bp, sugar]
-	input_df = pd.DataFrame([num_inputs + cat_inputs], columns=num_features + cat_features)
-
-	# Only run prediction inside button
-	risk_prob = calibrated_rf.predict_proba(input_df)[0][1]
-	risk_pct = int(risk_prob * 100)
-	prediction = calibrated_rf.predict(input_df)[0]
+	patient = SimpleNamespace(
+		age=age, gender=gender, bmi=bmi,
+		smoker=smoker, physical_activity=activity, diet=diet, family_history=family,
+		stress_level=stress, alcohol_consumption=alcohol,
+		diabetes=diabetes, hypertension=hypertension, cholesterol_level=chol,
+		sleep_hours=sleep, blood_pressure=bp, blood_sugar=sugar
+	)
+	assessment = memoized_assessment(patient)
+	risk_pct = assessment["risk_percentage"]
 
 	st.markdown(f"## Your heart is <span style='color:red'>{risk_pct}%</span> at risk of cardiac arrest.", unsafe_allow_html=True)
-	st.markdown(f"### AI Prediction: {'High Risk' if prediction == 1 else 'Low Risk'}")
+	st.markdown(f"### AI Prediction: {'High Risk' if assessment['prediction'] == 1 else 'Low Risk'} ({assessment['risk_category']})")
+	st.markdown(assessment["message"])
+	for recommendation in assessment["recommendations"]:
+		st.markdown(f"- {recommendation}")
@@ -0,0 +1,87 @@
+"""
+Shared test fixtures
+Puts backend/ on sys.path and provides the stub model most tests score with,
+plus an in-process HTTP client for the API
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import joblib
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+import main  # noqa: E402
+from stub_model import build_stub_model  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def stub_model():
+    """Small calibrated forest with the notebook's layout (5 trees per fold)"""
+    return build_stub_model(n_estimators=5, n_samples=2000, n_jobs=1)
+
+
+@pytest.fixture(scope="session")
+def stub_model_path(stub_model, tmp_path_factory):
+    """stub_model pickled like the served artifact"""
+    path = tmp_path_factory.mktemp("model") / "cardiac_arrest_model.pkl"
+    joblib.dump(stub_model, path)
+    return path
+
+
+class AppClient:
+    """Requests to main.app without a server: session() inside an asyncio scenario, get()/post() from sync tests"""
+
+    def session(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://heartcare")
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        async with self.session() as client:
+            return await client.request(method, path, **kwargs)
+
+    def get(self, path: str, **kwargs) -> httpx.Response:
+        return asyncio.run(self.request("GET", path, **kwargs))
+
+    def post(self, path: str, **kwargs) -> httpx.Response:
+        return asyncio.run(self.request("POST", path, **kwargs))
+
+
+@pytest.fixture(scope="session")
+def client():
+    return AppClient()
+
+
+@pytest.fixture
+def api(stub_model, client):
+    """client, with stub_model serving on a fresh executor and empty caches"""
+    main.model = stub_model
+    main.inference_executor.start(stub_model)
+    main.explain_executor.start(None)
+    for cache in (main.prediction_cache, main.explanation_cache):
+        if cache is not None:
+            cache.clear()
+    yield client
+    main.inference_executor.shutdown()
+    main.explain_executor.shutdown()
+    main.model = None
+
+
+@pytest.fixture
+def serving(stub_model_path, tmp_path, monkeypatch):
+    """
+    stub_model_path loaded and activated the way startup does it (prepare_model,
+    then activate_model), with tmp_path as the model store; main's model
+    globals are restored afterwards
+    """
+    monkeypatch.setattr(main.settings, "model_path", str(stub_model_path))
+    monkeypatch.setattr(main.settings, "model_store_dir", str(tmp_path))
+    for name in ("model", "model_path", "model_info", "serving_version", "feature_importance", "explainer",
+                 "explainer_error"):
+        monkeypatch.setattr(main, name, getattr(main, name))
+    prepared = main.prepare_model()
+    main.activate_model(prepared)
+    return prepared
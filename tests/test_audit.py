@@ -0,0 +1,165 @@
+"""
+Tests for the prediction audit log
+Queued predictions must reach the SQLite file in batches and on shutdown, the
+overflow policy must bound the queue, and every row the API scores must be
+recorded with its inputs, risks and model version
+"""
+
+import asyncio
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+
+import main
+from audit import AuditLog, connect, parse_time, query
+from batcher import MicroBatcher
+from encoder import patient_vectors
+from inference import predict_timed
+from stub_model import sample_patients
+
+PATIENTS = sample_patients(12, seed=9, unknown_rate=0.3)
+
+
+def vectors(n: int) -> np.ndarray:
+    return patient_vectors([main.PatientData(**patient) for patient in PATIENTS[:n]])
+
+
+def test_batches_time_range_and_append_only(tmp_path):
+    path = tmp_path / "audit.db"
+    audit = AuditLog(path, batch_size=8, flush_interval_s=60)
+
+    async def scenario():
+        for _ in range(3):
+            await audit.record("/predict/batch", "v1", "a" * 64, vectors(3), np.full(3, 20.0), [25] * 3, 1.5)
+        await asyncio.sleep(0.2)  # the third call filled a batch
+        written = audit.written
+        middle = parse_time("2100-01-01")
+        await audit.record("/predict", "v2", "b" * 64, vectors(1), [60.0], [66], 0.8)
+        await audit.stop()
+        return written, middle
+
+    written, middle = asyncio.run(scenario())
+    assert written == 9 and audit.written == 10 and audit.queued == 0
+
+    rows = query(path)
+    assert [row["model_version"] for row in rows] == ["v1"] * 9 + ["v2"]
+    assert rows[-1]["gender"] == PATIENTS[0]["gender"] and rows[-1]["age"] == PATIENTS[0]["age"]
+    assert rows[-1]["adjusted_risk"] == 66 and rows[-1]["route"] == "/predict"
+    assert len(query(path, since=parse_time(rows[-1]["ts"]))) == 1
+    assert query(path, since=middle) == []
+    assert len(query(path, limit=4)) == 4
+
+    connection = connect(path)
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        connection.execute("DELETE FROM predictions")
+    with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+        connection.execute("UPDATE predictions SET adjusted_risk = 10")
+    connection.close()
+
+
+@pytest.mark.parametrize("overflow", ["drop", "block"])
+def test_overflow_policy(tmp_path, overflow):
+    audit = AuditLog(tmp_path / "audit.db", max_queue=10, batch_size=100, flush_interval_s=60, overflow=overflow)
+
+    async def scenario():
+        accepted = [
+            await audit.record("/predict/batch", "v1", "a" * 64, vectors(4), np.full(4, 30.0), [30] * 4)
+            for _ in range(5)
+        ]
+        await audit.stop()
+        return accepted
+
+    accepted = asyncio.run(scenario())
+    if overflow == "drop":
+        assert accepted == [True, True, False, False, False]
+        assert (audit.written, audit.dropped) == (8, 12)
+    else:
+        assert all(accepted)
+        assert (audit.written, audit.dropped) == (20, 0)
+    assert len(query(tmp_path / "audit.db")) == audit.written
+
+
+def test_stop_flushes_rows_recorded_during_a_flush(tmp_path, monkeypatch):
+    path = tmp_path / "audit.db"
+    audit = AuditLog(path, batch_size=1, flush_interval_s=60)
+    insert = audit._insert
+
+    def slow_insert(entries):
+        time.sleep(0.3)
+        insert(entries)
+
+    monkeypatch.setattr(audit, "_insert", slow_insert)
+
+    async def scenario():
+        await audit.record("/predict", "v1", "a" * 64, vectors(1), [20.0], [25])
+        await asyncio.sleep(0.05)  # the first row is being written
+        await audit.record("/predict", "v1", "a" * 64, vectors(2)[1:], [30.0], [35])
+        await audit.stop()
+        # After stop() nothing is queued and the database is not reopened
+        assert not await audit.record("/predict", "v1", "a" * 64, vectors(1), [40.0], [45])
+
+    asyncio.run(scenario())
+    assert (audit.written, audit.queued, audit.dropped) == (2, 0, 1)
+    assert [row["adjusted_risk"] for row in query(path)] == [25, 35]
+    assert audit._connection is None
+
+
+def test_api_records_every_scored_row(api, tmp_path, monkeypatch):
+    path = tmp_path / "audit.db"
+    monkeypatch.setattr(main, "audit_log", AuditLog(path, flush_interval_s=0.05))
+    monkeypatch.setattr(main, "serving_version", "v3")
+    monkeypatch.setattr(main, "model_info", {"sha256": "c" * 64})
+
+    async def scenario():
+        async with api.session() as client:
+            single = (await client.post("/predict", json=PATIENTS[0])).json()
+            batch = (await client.post("/predict/batch", json={"patients": PATIENTS[1:]})).json()
+        await main.audit_log.stop()
+        return [single] + [item["result"] for item in batch["results"]]
+
+    results = asyncio.run(scenario())
+    rows = query(path)
+    assert [row["route"] for row in rows] == ["/predict"] + ["/predict/batch"] * (len(PATIENTS) - 1)
+    assert {(row["model_version"], row["model_sha256"]) for row in rows} == {("v3", "c" * 64)}
+    for row, patient, result in zip(rows, PATIENTS, results):
+        assert {field: row[field] for field in patient} == patient
+        assert row["adjusted_risk"] == result["risk_percentage"]
+        assert row["raw_risk"] == pytest.approx(result["confidence"] * 100, abs=0.05)
+        assert row["latency_ms"] > 0
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_rows_keep_the_model_that_scored_them(api, tmp_path, monkeypatch, batching):
+    path = tmp_path / "audit.db"
+    monkeypatch.setattr(main, "audit_log", AuditLog(path, flush_interval_s=0.05))
+    monkeypatch.setattr(main, "serving_version", "v3")
+    monkeypatch.setattr(main, "model_info", {"sha256": "c" * 64})
+    if batching:
+        monkeypatch.setattr(main, "request_batcher", MicroBatcher(main.score_coalesced, max_wait_ms=20))
+
+    def slow_predict(model, features):
+        time.sleep(0.2)
+        return predict_timed(model, features)
+
+    monkeypatch.setattr(main, "predict_timed", slow_predict)
+
+    async def scenario():
+        async with api.session() as client:
+            request = asyncio.create_task(client.post("/predict", json=PATIENTS[0]))
+            await asyncio.sleep(0.1)
+            # A hot reload lands while v3 is still scoring the request (as activate_model does it)
+            main.serving_version, main.model_info = "v4", {"sha256": "d" * 64}
+            main.prediction_cache.bind("d" * 64)
+            assert (await request).status_code == 200
+            # v3's score was not cached for v4, so the same input is scored (and logged) by v4
+            assert (await client.post("/predict", json=PATIENTS[0])).status_code == 200
+        if main.request_batcher is not None:
+            await main.request_batcher.stop()
+        await main.audit_log.stop()
+
+    asyncio.run(scenario())
+    assert [(row["model_version"], row["model_sha256"]) for row in query(path)] == [
+        ("v3", "c" * 64), ("v4", "d" * 64)
+    ]
@@ -0,0 +1,106 @@
+"""
+Tests for micro-batching
+Concurrent /predict calls share one model call and each get their own row;
+the wait queue is bounded and waiting rows time out like executor jobs
+"""
+
+import asyncio
+
+import pytest
+
+import main
+from batcher import MicroBatcher
+from executor import ExecutorSaturated
+from inference import predict_timed
+from stub_model import sample_patients
+
+
+@pytest.fixture
+def batcher(api, monkeypatch):
+    """A generous wait window so concurrent test requests land in one batch"""
+    batcher = MicroBatcher(main.score_coalesced, max_batch_size=8, max_wait_ms=200, max_concurrent=1,
+                           max_queue=32, timeout_s=5)
+    monkeypatch.setattr(main, "request_batcher", batcher)
+    return batcher
+
+
+def test_concurrent_predicts_share_one_model_call(api, batcher, monkeypatch):
+    patients = sample_patients(5, seed=9)
+    expected = [item["result"] for item in api.post("/predict/batch", json={"patients": patients}).json()["results"]]
+    main.prediction_cache.clear()
+
+    model_calls = []
+
+    def counted_predict(model, features):
+        model_calls.append(len(features))
+        return predict_timed(model, features)
+
+    monkeypatch.setattr(main, "predict_timed", counted_predict)
+
+    async def scenario():
+        try:
+            async with api.session() as session:
+                responses = await asyncio.gather(*(session.post("/predict", json=patient) for patient in patients))
+                health = (await session.get("/health")).json()
+                metrics = (await session.get("/metrics")).text
+        finally:
+            await batcher.stop()
+        return responses, health, metrics
+
+    responses, health, metrics = asyncio.run(scenario())
+    assert model_calls == [len(patients)]
+    assert [response.status_code for response in responses] == [200] * len(patients)
+    assert [{**response.json(), "explanation": None} for response in responses] == expected
+
+    stats = health["batching"]
+    assert (stats["batches"], stats["rows"], stats["max_batch_size_seen"]) == (1, 5, 5)
+    assert (stats["flushed_full"], stats["flushed_timeout"], stats["queued"]) == (0, 1, 0)
+    assert stats["batch_size_histogram"]["<=8"] == 1
+    assert "heartcare_batcher_batches_total 1" in metrics
+    assert "heartcare_batcher_rows_total 5" in metrics
+
+
+def test_full_queue_answers_with_retry_after(api, batcher, monkeypatch):
+    monkeypatch.setattr(batcher, "max_queue", 0)
+    response = api.post("/predict", json=sample_patients(1, seed=10)[0])
+    assert response.status_code == main.settings.executor_reject_status
+    assert response.headers["Retry-After"] == str(main.settings.executor_retry_after_s)
+    assert batcher.rejected == 1
+
+
+def test_queue_bound_and_timeouts():
+    scored = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def score_batch(items):
+            scored.append(items)
+            await release.wait()
+            return items
+
+        batcher = MicroBatcher(score_batch, max_batch_size=1, max_wait_ms=0, max_concurrent=1,
+                               max_queue=2, timeout_s=0.2)
+        # "a" takes the only scoring slot; "b" and "c" then wait for it
+        waiting = [asyncio.create_task(batcher.submit("a"))]
+        await asyncio.sleep(0.02)
+        waiting += [asyncio.create_task(batcher.submit(item)) for item in "bc"]
+        await asyncio.sleep(0.02)
+        assert batcher.queued == 2
+        with pytest.raises(ExecutorSaturated):
+            await batcher.submit("d")
+
+        results = await asyncio.gather(*waiting, return_exceptions=True)
+        assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+
+        # Rows whose callers gave up are not scored once the slot frees up
+        release.set()
+        await asyncio.sleep(0.05)
+        assert batcher.queued == 0
+        assert await batcher.submit("e") == ["e"]
+        await batcher.stop()
+        return batcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert scored == [["a"], ["e"]]
+    assert (stats["rejected"], stats["timed_out"], stats["batches"]) == (1, 3, 2)
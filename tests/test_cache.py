@@ -0,0 +1,86 @@
+"""
+Tests for the prediction cache
+LRU eviction, TTL expiry and model binding, and /predict answering repeated
+inputs without a model call
+"""
+
+from types import SimpleNamespace
+
+import cache
+import main
+from cache import PredictionCache
+from inference import predict_timed
+from stub_model import sample_patients
+
+
+def test_least_recently_used_entry_is_evicted():
+    predictions = PredictionCache(max_size=2)
+    predictions.put("a", 1)
+    predictions.put("b", 2)
+    assert predictions.get("a") == 1  # "b" is now the least recently used
+    predictions.put("c", 3)
+
+    assert predictions.get("b") is None
+    assert (predictions.get("a"), predictions.get("c")) == (1, 3)
+    assert (len(predictions), predictions.evictions) == (2, 1)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    predictions = PredictionCache(ttl_s=10)
+    predictions.put("a", 1)
+
+    clock.now += 9
+    assert predictions.get("a") == 1
+    clock.now += 2
+    assert predictions.get("a") is None
+    stats = predictions.stats()
+    assert (stats["size"], stats["expirations"], stats["hits"], stats["misses"]) == (0, 1, 1, 1)
+
+
+def test_binding_another_model_clears_entries():
+    predictions = PredictionCache()
+    predictions.bind("sha-1")
+    predictions.put("a", 1)
+    predictions.bind("sha-1")
+    assert predictions.get("a") == 1
+
+    predictions.bind("sha-2")
+    assert predictions.get("a") is None
+    assert (predictions.fingerprint, predictions.invalidations) == ("sha-2", 1)
+
+
+def test_put_from_before_a_swap_is_discarded():
+    predictions = PredictionCache()
+    predictions.bind("sha-1")
+    fingerprint = predictions.fingerprint  # taken before the model call, as score_features does
+    predictions.bind("sha-2")
+
+    predictions.put("a", 1, fingerprint)
+    assert len(predictions) == 0
+    predictions.put("a", 2, predictions.fingerprint)
+    assert predictions.get("a") == 2
+
+
+def test_repeated_predict_is_served_from_cache(api, monkeypatch):
+    model_calls = []
+
+    def counted_predict(model, features):
+        model_calls.append(len(features))
+        return predict_timed(model, features)
+
+    monkeypatch.setattr(main, "predict_timed", counted_predict)
+    patient = sample_patients(1, seed=12)[0]
+    before = api.get("/health").json()["cache"]
+
+    first = api.post("/predict", json=patient)
+    second = api.post("/predict", json=patient)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert model_calls == [1]
+
+    after = api.get("/health").json()["cache"]
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert after["size"] == 1
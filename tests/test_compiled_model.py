@@ -0,0 +1,57 @@
+"""
+Parity tests for the compiled flat-array ensemble
+Runs offline against a small stub model with the production pipeline layout
+"""
+
+import numpy as np
+import pytest
+
+import compiled_model
+from compiled_model import CompiledEnsemble
+from inference import predict
+from stub_model import build_stub_model, make_training_frame
+
+
+@pytest.fixture(scope="module")
+def model():
+    return build_stub_model(n_estimators=25, n_samples=3000, n_jobs=1)
+
+
+@pytest.fixture(scope="module")
+def frame():
+    X, _ = make_training_frame(500, seed=7)
+    # Unseen category and out-of-range numerics must behave like sklearn
+    X['Smoker'] = X['Smoker'].astype(object)
+    X.loc[0, 'Smoker'] = 'Sometimes'
+    X.loc[1, 'Age'] = 120
+    X.loc[2, 'Blood_Sugar'] = 20.0
+    return X
+
+
+def test_predict_proba_matches_sklearn(model, frame):
+    compiled = CompiledEnsemble.from_model(model)
+    np.testing.assert_allclose(compiled.predict_proba(frame), model.predict_proba(frame), atol=1e-9)
+    np.testing.assert_array_equal(compiled.predict(frame), model.predict(frame))
+
+
+def test_raw_scores_match_inference_layer(model, frame):
+    expected = predict(model, frame)
+    scores = predict(CompiledEnsemble.from_model(model), frame)
+    np.testing.assert_allclose(scores.raw_score, expected.raw_score, atol=1e-12)
+    np.testing.assert_allclose(scores.probability, expected.probability, atol=1e-9)
+
+
+def test_chunked_traversal_matches(model, frame, monkeypatch):
+    compiled = CompiledEnsemble.from_model(model)
+    expected = compiled.predict_proba(frame)
+    monkeypatch.setattr(compiled_model, "MAX_TRAVERSAL_CELLS", 1000)
+    np.testing.assert_array_equal(compiled.predict_proba(frame), expected)
+
+
+def test_memory_mapped_export_round_trip(model, frame, tmp_path):
+    compiled = CompiledEnsemble.from_model(model)
+    compiled.save(tmp_path / "export", model_sha256="abc")
+    loaded = CompiledEnsemble.load(tmp_path / "export")
+    assert loaded.model_sha256 == "abc"
+    assert not loaded.feature.flags.writeable
+    np.testing.assert_array_equal(loaded.predict_proba(frame), compiled.predict_proba(frame))
@@ -0,0 +1,84 @@
+"""
+Tests for model distillation
+Students must track the teacher's risk, survive a joblib round trip, and be
+served through the store when HEARTCARE_MODEL_VARIANT=distilled
+"""
+
+import asyncio
+
+import joblib
+import numpy as np
+import pytest
+
+import dataset
+import main
+import model_loader
+from distill import compare, distill
+from distilled import DistilledClassifier
+from encoder import RawFeatures
+from inference import predict
+from settings import settings
+from stub_model import sample_patients
+
+
+@pytest.fixture(scope="module")
+def split():
+    return dataset.split_dataset(*dataset.synthetic_dataset(2500, seed=7))
+
+
+@pytest.mark.parametrize("kind, trees", [("forest", 10), ("gbt", 100), ("logistic", None)])
+def test_student_tracks_teacher(stub_model, split, kind, trees):
+    X_train, X_test, _, y_test = split
+    student = distill(stub_model, X_train, kind, augment_factor=0.5, trees=trees, n_jobs=1)
+    report = compare(stub_model, student, X_test, y_test, repeats=2)
+
+    assert report["fidelity"]["mean_abs_diff"] < 0.1
+    assert report["fidelity"]["label_agreement"] > 0.85
+    assert abs(report["delta"]["auc"]) < 0.1
+    assert report["student"]["bytes"] < report["teacher"]["bytes"]
+
+    proba = student.predict_proba(X_test)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    assert ((proba >= 0) & (proba <= 1)).all()
+    np.testing.assert_array_equal(student.predict(X_test), (proba[:, 1] > 0.5).astype(int))
+
+
+def test_evaluate_metrics():
+    y = np.array([0, 0, 1, 1])
+    metrics = dataset.evaluate(y, np.array([0.1, 0.2, 0.8, 0.9]))
+    assert metrics["auc"] == 1.0 and metrics["accuracy"] == 1.0
+    assert metrics["brier"] == pytest.approx(0.025)
+    assert dataset.expected_calibration_error(y, np.array([0.0, 0.0, 1.0, 1.0])) == 0.0
+
+
+def test_distilled_variant_is_served(stub_model, split, client, tmp_path, monkeypatch):
+    student = distill(stub_model, split[0], "logistic")
+    artifact = tmp_path / "distilled_model.pkl"
+    joblib.dump(student, artifact)
+
+    monkeypatch.setattr(settings, "model_path", None)
+    monkeypatch.setattr(settings, "model_hub_enabled", False)
+    monkeypatch.setattr(settings, "model_store_dir", str(tmp_path / "store"))
+    monkeypatch.setattr(settings, "model_variant", "distilled")
+    with pytest.raises(FileNotFoundError, match="distill.py"):
+        model_loader.resolve_model()
+
+    model_loader.default_store().ingest(artifact, model_loader.ref_name("distilled"))
+    loaded = model_loader.load_model()
+    assert isinstance(loaded.model, DistilledClassifier)
+    features = RawFeatures.from_frame(split[1])
+    np.testing.assert_array_equal(predict(loaded.model, features).probability,
+                                  predict(student, features).probability)
+
+    async def start_and_predict():
+        await main.load_model()
+        try:
+            return await client.request("POST", "/predict", json=sample_patients(1, seed=9)[0])
+        finally:
+            main.inference_executor.shutdown()
+
+    response = asyncio.run(start_and_predict())
+    assert response.status_code == 200
+    assert main.model_info["variant"] == "distilled"
+    assert main.feature_importance is None
+    main.model = main.explainer = None
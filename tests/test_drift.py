@@ -0,0 +1,79 @@
+"""
+Tests for the drift monitor
+Live rows drawn like the training data must look stable, a shifted feature must
+be flagged, and /drift must count every row the API scored
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import main
+from drift import DriftMonitor, build_reference, frame_vectors, save_reference, score_vectors
+from settings import settings
+from stub_model import make_training_frame, sample_patients
+
+
+@pytest.fixture(scope="module")
+def reference(stub_model):
+    X, _ = make_training_frame(20000, seed=1)
+    return build_reference(X, model=stub_model, model_sha256="0" * 64, score_rows=5000)
+
+
+def test_monitor_flags_shifted_feature(reference, stub_model):
+    X, _ = make_training_frame(6000, seed=2)
+    vectors = frame_vectors(X)
+    raw_risk, adjusted_risk = score_vectors(stub_model, vectors)
+
+    monitor = DriftMonitor(reference, window=3000)
+    counts = monitor.counts
+    for start in range(3000):
+        monitor.record(vectors[start:start + 1], raw_risk[start:start + 1], adjusted_risk[start:start + 1])
+    report = monitor.report()
+    assert report["window_rows"] == 3000 and report["drifting_features"] == []
+    assert all(stats["status"] == "stable" for stats in report["features"].values())
+    assert all(stats["status"] == "stable" for stats in report["scores"].values())
+    assert report["features"]["smoker"]["unknown_rate"] == 0.0
+
+    # Older patients and more unknown answers, for two windows: the first one ages out
+    vectors[:, 0] += 20
+    vectors[::2, 7] = 0
+    monitor.record(vectors[3000:], raw_risk[3000:], adjusted_risk[3000:])
+    assert monitor.report()["features"]["age"]["status"] != "stable"
+    monitor.record(vectors[3000:], raw_risk[3000:], adjusted_risk[3000:])
+    report = monitor.report()
+    assert monitor.counts is counts
+    assert report["rows_seen"] == 9000 and report["window_rows"] == 6000
+    assert report["drifting_features"] == ["age"]
+    assert report["features"]["age"]["ks"] > 0.2
+    assert report["features"]["smoker"]["unknown_rate"] == pytest.approx(0.5, abs=0.01)
+
+
+def test_drift_endpoint_counts_scored_rows(api, reference, tmp_path, monkeypatch):
+    path = tmp_path / "drift_reference.json"
+    save_reference({**reference, "scores": {**reference["scores"], "model_sha256": "a" * 64}}, path)
+    monkeypatch.setattr(settings, "drift_reference_path", str(path))
+    monkeypatch.setattr(main, "drift_monitor", None)
+    monkeypatch.setattr(main, "model_info", {"sha256": "a" * 64})
+    patients = sample_patients(40, seed=6, unknown_rate=0.2)
+
+    async def scenario():
+        async with api.session() as client:
+            assert (await client.get("/drift")).status_code == 503
+            main.drift_monitor = main.load_drift_monitor()
+            single = (await client.post("/predict", json=patients[0])).json()
+            batch = (await client.post("/predict/batch", json={"patients": patients[1:]})).json()
+            return [single] + [item["result"] for item in batch["results"]], (await client.get("/drift")).json()
+
+    results, report = asyncio.run(scenario())
+
+    assert report["rows_seen"] == report["window_rows"] == len(patients)
+    assert report["reference"]["scores_model_is_serving"]
+    assert report["scores"]["adjusted_risk"]["rows"] == len(patients)
+    adjusted = main.drift_monitor.counts[1, main.drift_monitor.offsets[-2]:]
+    expected = np.bincount(
+        np.searchsorted(reference["scores"]["edges"], [r["risk_percentage"] for r in results], side="right"),
+        minlength=len(adjusted)
+    )
+    np.testing.assert_array_equal(adjusted, expected)
@@ -0,0 +1,78 @@
+"""
+Parity tests for the fast preprocessing encoder
+Compares FastEncoder with the fitted ColumnTransformer of every calibrated fold
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from encoder import (
+    ANSWERS, CAT_FEATURES, CAT_IMPUTATION, FEATURE_NAMES, NUM_FIELDS, FastEncoder, RawFeatures, patient_vector,
+)
+from inference import predict
+from stub_model import make_training_frame, sample_patients
+
+
+@pytest.fixture(scope="module")
+def preprocessors(stub_model):
+    return [fold.estimator.named_steps['preprocessor'] for fold in stub_model.calibrated_classifiers_]
+
+
+def reference_frame(patients):
+    """How the API built its model input before the fast encoder"""
+    rows = []
+    for p in patients:
+        num = [getattr(p, field) for field in NUM_FIELDS]
+        cat = [default if getattr(p, field) == "I don't know" else getattr(p, field)
+               for field, default in CAT_IMPUTATION]
+        rows.append(num + cat)
+    return pd.DataFrame(rows, columns=FEATURE_NAMES)
+
+
+def test_transform_matches_column_transformer(preprocessors):
+    X, _ = make_training_frame(300, seed=11)
+    X[CAT_FEATURES] = X[CAT_FEATURES].astype(object)
+    X.loc[0, 'Diet'] = 'Keto'  # unseen category -> all-zero block
+    for preprocessor in preprocessors:
+        encoder = FastEncoder.from_preprocessor(preprocessor)
+        np.testing.assert_allclose(encoder.transform(X), preprocessor.transform(X), rtol=0, atol=1e-12)
+
+
+def test_encode_patients_matches_column_transformer(preprocessors):
+    patients = [SimpleNamespace(**p) for p in sample_patients(200, seed=5, unknown_rate=0.3)]
+    expected_input = reference_frame(patients)
+    for preprocessor in preprocessors:
+        encoder = FastEncoder.from_preprocessor(preprocessor)
+        np.testing.assert_allclose(
+            encoder.encode_patients(patients), preprocessor.transform(expected_input), rtol=0, atol=1e-12
+        )
+
+
+def test_raw_features_round_trip():
+    patients = [SimpleNamespace(**p) for p in sample_patients(20, seed=2, unknown_rate=0.5)]
+    frame = RawFeatures.from_patients(patients).to_frame()
+    pd.testing.assert_frame_equal(frame, reference_frame(patients), check_dtype=False)
+
+
+def test_patient_schema_codes_answers():
+    for field, answers in ANSWERS.items():
+        assert set(main.PatientData.model_fields[field].annotation.__args__) == set(answers)
+    patients = [main.PatientData(**p) for p in sample_patients(50, seed=4, unknown_rate=0.3)]
+    plain = [SimpleNamespace(**p.model_dump()) for p in patients]
+    np.testing.assert_array_equal([p.feature_vector for p in patients], [patient_vector(p) for p in plain])
+    pd.testing.assert_frame_equal(
+        RawFeatures.from_patients(patients).to_frame(), reference_frame(plain), check_dtype=False
+    )
+    with pytest.raises(ValueError):
+        main.PatientData(**{**sample_patients(1)[0], "smoker": "yes"})
+
+
+def test_coded_predict_matches_frame_predict(stub_model):
+    patients = [main.PatientData(**p) for p in sample_patients(100, seed=8, unknown_rate=0.3)]
+    features = RawFeatures.from_patients(patients)
+    expected = stub_model.predict_proba(features.to_frame())[:, 1]
+    np.testing.assert_allclose(predict(stub_model, features).probability, expected, rtol=0, atol=1e-12)
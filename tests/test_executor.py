@@ -0,0 +1,114 @@
+"""
+Tests for the inference executor
+A full queue is answered with backpressure, timed-out jobs keep their slot until
+they finish, and process workers score with their own copy of the model
+"""
+
+import asyncio
+import threading
+import time
+from functools import partial
+
+import numpy as np
+import pytest
+
+import main
+from encoder import RawFeatures
+from executor import ExecutorSaturated, InferenceExecutor, load_and_prepare
+from inference import predict, predict_timed
+from metrics import REJECTIONS
+from stub_model import make_training_frame, sample_patients
+
+
+def wait_for(model, event: threading.Event):
+    event.wait(5)
+    return model
+
+
+def test_saturated_queue_answers_with_retry_after(api, monkeypatch):
+    monkeypatch.setattr(main.inference_executor, "max_pending", 2)
+    monkeypatch.setattr(main.settings, "executor_reject_status", 429)
+    monkeypatch.setattr(main.settings, "executor_retry_after_s", 3)
+    patient = sample_patients(1, seed=6)[0]
+    rejected = main.inference_executor.rejected
+    saturated = REJECTIONS.value(reason="saturated")
+
+    async def scenario():
+        release = threading.Event()
+        jobs = [asyncio.create_task(main.inference_executor.run(wait_for, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            async with api.session() as session:
+                response = await session.post("/predict", json=patient)
+        finally:
+            release.set()
+            await asyncio.gather(*jobs)
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert main.inference_executor.rejected == rejected + 1
+    assert REJECTIONS.value(reason="saturated") == saturated + 1
+
+    # Once the jobs have finished the slots are free again
+    assert main.inference_executor.pending == 0
+    assert api.post("/predict", json=patient).status_code == 200
+
+
+def test_timed_out_job_keeps_its_slot_until_done():
+    executor = InferenceExecutor(workers=1, max_pending=1, timeout_s=0.05)
+    executor.start(model=None)
+
+    async def scenario():
+        release = threading.Event()
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(wait_for, release)
+        assert (executor.timed_out, executor.pending) == (1, 1)
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(wait_for, release)
+        release.set()
+        for _ in range(200):
+            if not executor.pending:
+                break
+            await asyncio.sleep(0.01)
+        assert await executor.run(wait_for, release) is None
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert executor.stats() == {
+        "kind": "thread", "workers": 1, "pending": 0, "max_pending": 1,
+        "completed": 2, "rejected": 1, "timed_out": 1,
+    }
+
+
+def test_timeout_maps_to_503(api, monkeypatch):
+    monkeypatch.setattr(main.inference_executor, "timeout_s", 0.01)
+
+    def slow_predict(model, features):
+        time.sleep(0.2)
+        return predict_timed(model, features)
+
+    monkeypatch.setattr(main, "predict_timed", slow_predict)
+    response = api.post("/predict", json=sample_patients(1, seed=7)[0])
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Inference timed out"
+
+
+def test_process_pool_scores_like_the_parent(stub_model, stub_model_path):
+    X, _ = make_training_frame(50, seed=8)
+    features = RawFeatures.from_frame(X)
+    executor = InferenceExecutor(kind="process", workers=1)
+    executor.start(model=None, load_worker_model=partial(load_and_prepare, str(stub_model_path)))
+    try:
+        scores, timings = asyncio.run(executor.run(predict_timed, features))
+    finally:
+        executor.shutdown()
+
+    expected = predict(stub_model, features)
+    np.testing.assert_array_equal(scores.probability, expected.probability)
+    np.testing.assert_array_equal(scores.label, expected.label)
+    assert set(timings) == {"encode", "model"}
+    assert executor.completed == 1
@@ -0,0 +1,91 @@
+"""
+Tests for SHAP explanations
+Contributions must add up to the model's uncalibrated score, be cached like
+predictions, run on a bounded pool, and /explain must answer 501 when shap is
+unavailable
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import main
+from encoder import FastEncoder, RawFeatures
+from explain import INPUT_FIELDS, EnsembleExplainer, shap
+from inference import predict
+from stub_model import sample_patients
+
+needs_shap = pytest.mark.skipif(shap is None, reason="shap is not installed")
+
+
+@pytest.fixture
+def explain_api(api, serving):
+    """api with the stub model's explainers built at activation"""
+    return api
+
+
+def test_collapse_matrix_maps_one_hot_blocks(stub_model):
+    encoder = FastEncoder.from_preprocessor(stub_model.calibrated_classifiers_[0].estimator.named_steps['preprocessor'])
+    matrix = encoder.collapse_matrix()
+    assert matrix.shape == (encoder.n_encoded, len(INPUT_FIELDS))
+    np.testing.assert_array_equal(matrix.sum(axis=1), 1)
+    assert matrix[:, INPUT_FIELDS.index('physical_activity')].sum() == 3
+
+
+@needs_shap
+def test_contributions_add_up_to_raw_score(stub_model):
+    explainer = EnsembleExplainer.from_model(stub_model)
+    features = RawFeatures.from_patients([SimpleNamespace(**p) for p in sample_patients(20, seed=4)])
+    contributions = explainer.explain(features)
+    np.testing.assert_allclose(
+        explainer.base_value + contributions.sum(axis=1), predict(stub_model, features).raw_score, atol=1e-9
+    )
+
+
+@needs_shap
+def test_explain_endpoint_batches_and_caches(explain_api):
+    patients = sample_patients(3, seed=5)
+    first = explain_api.post("/explain", json={"patients": patients}).json()["explanations"]
+    hits = main.explanation_cache.hits
+    second = explain_api.post("/explain", json={"patients": patients[::-1]}).json()["explanations"]
+
+    assert main.explanation_cache.hits == hits + 3
+    assert second == first[::-1]
+    assert list(first[0]["contributions"]) and set(first[0]["contributions"]) == set(INPUT_FIELDS)
+
+    predicted = explain_api.post("/predict?explain=true", json=patients[0]).json()
+    assert predicted["explanation"] == first[0]
+    assert "explanation" not in explain_api.post("/predict", json=patients[0]).json()
+
+
+def test_explain_unavailable_is_501(explain_api, monkeypatch):
+    monkeypatch.setattr(main, "explainer", None)
+    monkeypatch.setattr(main, "explainer_error", "shap is not installed (pip install shap)")
+    response = explain_api.post("/explain", json={"patients": sample_patients(1)})
+    assert response.status_code == 501 and "shap is not installed" in response.json()["detail"]
+    assert explain_api.post("/predict?explain=true", json=sample_patients(1)[0]).status_code == 501
+
+
+def test_explain_queue_is_bounded(explain_api, monkeypatch):
+    monkeypatch.setattr(main.explain_executor, "max_pending", 1)
+    rejected = main.explain_executor.rejected
+
+    async def scenario():
+        release = threading.Event()
+        busy = asyncio.create_task(main.explain_executor.run(lambda model: release.wait(5)))
+        await asyncio.sleep(0)
+        try:
+            async with explain_api.session() as session:
+                return await session.post("/explain", json={"patients": sample_patients(1, seed=6)})
+        finally:
+            release.set()
+            await busy
+
+    response = asyncio.run(scenario())
+    assert response.status_code == main.settings.executor_reject_status
+    assert response.headers["Retry-After"] == str(main.settings.executor_retry_after_s)
+    assert main.explain_executor.rejected == rejected + 1
+    assert explain_api.get("/health").json()["explanations"]["executor"]["pending"] == 0
@@ -0,0 +1,56 @@
+"""
+Tests for the Streamlit app
+The app must show /predict's adjusted risk and load the model once per process;
+repeated identical submissions are answered from the session memo
+"""
+
+from pathlib import Path
+
+import pytest
+
+import inference
+import model_loader
+from settings import settings
+
+streamlit_testing = pytest.importorskip("streamlit.testing.v1")
+
+APP_PATH = Path(__file__).resolve().parent.parent / "heart_app.py"
+
+# Answers to enter in the form (widget key -> /predict field); the rest keep their defaults
+FORM_ANSWERS = {
+    "gender": ("gender", "I don't know"), "smoker": ("smoker", "Yes"), "activity": ("physical_activity", "High"),
+    "family": ("family_history", "Yes"), "stress": ("stress_level", "High"),
+    "alcohol": ("alcohol_consumption", "Yes"), "diabetes": ("diabetes", "Yes"),
+    "hypertension": ("hypertension", "Yes"),
+}
+PATIENT = {
+    "age": 70, "bmi": 22.0, "diet": "Healthy", "cholesterol_level": 180, "sleep_hours": 7.0,
+    "blood_pressure": 120, "blood_sugar": 90, **dict(FORM_ANSWERS.values()),
+}
+
+
+def test_app_matches_api_and_memoizes(api, stub_model_path, monkeypatch):
+    monkeypatch.setattr(settings, "model_path", str(stub_model_path))
+    loads, predictions = [], []
+    deserialize, predict = model_loader.deserialize, inference.predict
+    monkeypatch.setattr(model_loader, "deserialize", lambda *args: loads.append(1) or deserialize(*args))
+    monkeypatch.setattr(inference, "predict", lambda *args: predictions.append(1) or predict(*args))
+
+    at = streamlit_testing.AppTest.from_file(str(APP_PATH), default_timeout=60).run()
+    at.number_input(key="age").set_value(PATIENT["age"])
+    for key, (_, answer) in FORM_ANSWERS.items():
+        at.selectbox(key=key).set_value(answer)
+    at.button[0].click().run()
+    assert not at.exception
+    texts = [element.value for element in at.markdown]
+
+    # Rerunning and resubmitting the same answers neither reloads the model nor rescores
+    at.run()
+    at.button[0].click().run()
+    assert not at.exception
+    assert len(loads) == 1 and len(predictions) == 1
+
+    expected = api.post("/predict", json=PATIENT).json()
+    assert any(f">{expected['risk_percentage']}%<" in text for text in texts)
+    assert expected["message"] in texts
+    assert f"- {expected['recommendations'][-1]}" in texts
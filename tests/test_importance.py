@@ -0,0 +1,48 @@
+"""
+Tests for global feature importance
+Importances cover the 15 inputs, are persisted per model hash, and are served
+by /feature-importance without touching the model
+"""
+
+import numpy as np
+import pytest
+
+import importance
+import main
+from encoder import INPUT_FIELDS
+from stub_model import build_stub_model
+
+
+@pytest.fixture(scope="module")
+def model():
+    return build_stub_model(n_estimators=10, n_samples=3000, n_jobs=1)
+
+
+def test_importances_cover_inputs(model):
+    result = importance.compute(model)
+    features = result["features"]
+    assert sorted(item["feature"] for item in features) == sorted(INPUT_FIELDS)
+    assert np.isclose(sum(item["importance"] for item in features), 1.0)
+    values = [item["importance"] for item in features]
+    assert values == sorted(values, reverse=True)
+    # The stub's outcome depends on age and cholesterol, not on gender
+    ranked = [item["feature"] for item in features]
+    assert ranked.index("age") < ranked.index("gender")
+    assert ranked.index("cholesterol_level") < ranked.index("gender")
+
+
+def test_persisted_per_model_hash(model, tmp_path):
+    first = importance.load_or_compute("unused.pkl", "abc123", tmp_path, model)
+    assert importance.importance_path(tmp_path, "abc123").exists()
+    # Second call reads the file; the (nonexistent) artifact is never deserialized
+    assert importance.load_or_compute("missing.pkl", "abc123", tmp_path) == first
+
+
+def test_endpoint_serves_startup_cache(serving, client, tmp_path, monkeypatch):
+    response = client.get("/feature-importance")
+    assert response.status_code == 200
+    assert response.json()["model_sha256"] == serving.sha256
+    assert (tmp_path / "importance" / f"{serving.sha256}.json").exists()
+
+    monkeypatch.setattr(main, "feature_importance", None)
+    assert client.get("/feature-importance").status_code == 503
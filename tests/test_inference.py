@@ -0,0 +1,47 @@
+"""
+Tests for single-pass inference
+One walk over each fold's forest must give the same probability and label as
+predict_proba() followed by predict(), plus the uncalibrated score
+"""
+
+import numpy as np
+import pytest
+
+from encoder import RawFeatures
+from inference import predict, predict_timed
+from stub_model import make_training_frame
+
+
+@pytest.fixture(scope="module")
+def frame():
+    X, _ = make_training_frame(300, seed=11)
+    return X
+
+
+@pytest.mark.parametrize("raw", [False, True], ids=["frame", "raw_features"])
+def test_matches_predict_proba_and_predict(stub_model, frame, raw):
+    scores = predict(stub_model, RawFeatures.from_frame(frame) if raw else frame)
+    np.testing.assert_allclose(scores.probability, stub_model.predict_proba(frame)[:, 1], atol=1e-12)
+    np.testing.assert_array_equal(scores.label, stub_model.predict(frame))
+
+    folds = stub_model.calibrated_classifiers_
+    raw_score = np.mean([fold.estimator.predict_proba(frame)[:, 1] for fold in folds], axis=0)
+    np.testing.assert_allclose(scores.raw_score, raw_score, atol=1e-12)
+
+
+def test_walks_each_forest_once(stub_model, frame, monkeypatch):
+    calls = []
+
+    def counted(forest):
+        def predict_proba(X):
+            calls.append(len(X))
+            return type(forest).predict_proba(forest, X)
+        return predict_proba
+
+    for fold in stub_model.calibrated_classifiers_:
+        monkeypatch.setattr(fold.estimator[-1], "predict_proba", counted(fold.estimator[-1]))
+
+    scores, timings = predict_timed(stub_model, RawFeatures.from_frame(frame))
+    assert calls == [len(frame)] * len(stub_model.calibrated_classifiers_)
+    assert len(scores) == len(frame)
+    assert set(timings) == {"encode", "model"}
@@ -0,0 +1,51 @@
+"""
+Tests for the precomputed risk lookup table
+Grid points and clamped inputs must match the live model up to uint16 quantization
+"""
+
+import numpy as np
+import pytest
+
+from build_lookup_table import build_table, make_grids, sample_inputs, split_ranges, table_categories
+from encoder import NUM_FEATURES, encode_column
+from inference import predict
+from lookup_table import PROBABILITY_SCALE, RiskTable
+
+QUANTIZATION_ERROR = 0.5 / PROBABILITY_SCALE + 1e-12
+
+
+@pytest.fixture(scope="module")
+def table(stub_model, tmp_path_factory):
+    grids = make_grids(split_ranges(stub_model), {feature: 2 for feature in NUM_FEATURES})
+    categories = table_categories(stub_model)
+    values = build_table(stub_model, grids, categories, tmp_path_factory.mktemp("table") / "table.npy")
+    return RiskTable(values, grids, categories, stub_model.classes_)
+
+
+def test_grid_points_match_model(stub_model, table):
+    features = sample_inputs(table.grids, table.categories, 500)
+    rng = np.random.default_rng(1)
+    for j, grid in enumerate(table.grids):
+        features.num[:, j] = grid[rng.integers(0, len(grid), len(features))]
+    expected = predict(stub_model, features)
+    for interpolation in ("nearest", "linear"):
+        table.interpolation = interpolation
+        scores = table.predict_scores(features)
+        np.testing.assert_allclose(scores.probability, expected.probability, atol=QUANTIZATION_ERROR)
+
+
+def test_inputs_beyond_split_range_are_exact(stub_model, table):
+    features = sample_inputs(table.grids, table.categories, 500)
+    for j, grid in enumerate(table.grids):
+        features.num[:, j] = np.where(np.arange(len(features)) % 2, grid[0] - 50, grid[-1] + 50)
+    table.interpolation = "linear"
+    np.testing.assert_allclose(
+        table.predict_scores(features).probability, predict(stub_model, features).probability, atol=QUANTIZATION_ERROR
+    )
+
+
+def test_unknown_category_is_rejected(table):
+    features = sample_inputs(table.grids, table.categories, 3)
+    features.codes[1, 0] = encode_column("gender", ["Other"])[0]
+    with pytest.raises(ValueError, match="Gender"):
+        table.predict_scores(features)
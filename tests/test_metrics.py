@@ -0,0 +1,84 @@
+"""
+Tests for /metrics and request profiling
+The text exposition follows the Prometheus format, failed requests are still
+counted, and an X-Profile request leaves a collapsed-stack file behind
+"""
+
+import json
+
+import pytest
+
+import main
+from metrics import REQUESTS, Counter, Histogram, Registry
+from stub_model import sample_patients
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    latency = registry.register(Histogram("test_seconds", "Test latency", ["route"], buckets=(0.1, 1.0)))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(3.0, route="/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 3.55',
+        'test_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_label_values_are_escaped_and_collectors_rendered():
+    registry = Registry()
+    errors = registry.register(Counter("test_errors_total", "Errors by type", ["type"]))
+    errors.inc(type='bad "quote"\\path\nnext')
+    errors.inc(2, type="plain")
+    registry.add_collector(lambda: [("test_queue", "Queued jobs", "gauge", 4)])
+
+    assert registry.render().splitlines() == [
+        "# HELP test_errors_total Errors by type",
+        "# TYPE test_errors_total counter",
+        'test_errors_total{type="bad \\"quote\\"\\\\path\\nnext"} 1',
+        'test_errors_total{type="plain"} 2',
+        "# HELP test_queue Queued jobs",
+        "# TYPE test_queue gauge",
+        "test_queue 4",
+    ]
+
+    with pytest.raises(ValueError, match="expects labels"):
+        errors.inc(route="/a")
+
+
+def test_failing_request_is_counted_as_500(api, monkeypatch):
+    def broken_collector():
+        raise RuntimeError("collector failed")
+
+    monkeypatch.setattr(main.REGISTRY, "collectors", [broken_collector])
+    before = REQUESTS.value(route="/metrics", method="GET", status=500)
+    with pytest.raises(RuntimeError, match="collector failed"):
+        api.get("/metrics")
+    assert REQUESTS.value(route="/metrics", method="GET", status=500) == before + 1
+
+
+def test_profiled_stream_writes_collapsed_stacks(api, tmp_path, monkeypatch):
+    monkeypatch.setattr(main.settings, "profiling_enabled", True)
+    monkeypatch.setattr(main.settings, "profiling_dir", str(tmp_path))
+    body = "\n".join(json.dumps(patient) for patient in sample_patients(20, seed=13))
+
+    response = api.post("/predict/stream", content=body, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.text.splitlines()[-1] == '{"done": true, "succeeded": 20, "failed": 0}'
+
+    profile = tmp_path / response.headers["X-Profile-File"]
+    lines = profile.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+    # Without the header nothing is sampled
+    assert "X-Profile-File" not in api.post("/predict/stream", content=body).headers
+    assert list(tmp_path.iterdir()) == [profile]
@@ -0,0 +1,61 @@
+"""
+Tests for the unified model loader
+Store resolution, hash verification and the offline / hub fallback rules
+"""
+
+import joblib
+import numpy as np
+import pytest
+
+import model_loader
+from model_loader import ModelStore, file_sha256
+from settings import settings
+from stub_model import build_stub_model, make_training_frame
+
+
+@pytest.fixture(scope="module")
+def artifact(tmp_path_factory):
+    path = tmp_path_factory.mktemp("artifact") / "cardiac_arrest_model.pkl"
+    joblib.dump(build_stub_model(n_estimators=3, n_samples=1000, n_jobs=1), path)
+    return path
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """Empty store, no legacy file, no hub"""
+    monkeypatch.setattr(settings, "model_path", None)
+    monkeypatch.setattr(settings, "model_hub_enabled", False)
+    monkeypatch.setattr(model_loader, "LEGACY_MODEL_PATH", tmp_path / "missing.pkl")
+    return ModelStore(tmp_path / "store")
+
+
+def test_store_round_trip(artifact, offline):
+    sha256 = offline.ingest(artifact, settings.model_name)
+    loaded = model_loader.load_model(offline)
+    assert loaded.source == "store"
+    assert loaded.sha256 == sha256 == file_sha256(artifact)
+    X, _ = make_training_frame(50, seed=3)
+    np.testing.assert_array_equal(loaded.model.predict_proba(X), joblib.load(artifact).predict_proba(X))
+    assert {"verify", "deserialize", "total"} <= set(loaded.timings_ms)
+
+
+def test_legacy_file_is_ingested(artifact, offline, monkeypatch):
+    monkeypatch.setattr(model_loader, "LEGACY_MODEL_PATH", artifact)
+    assert model_loader.load_model(offline).source == "local"
+    assert offline.read_ref(settings.model_name) == file_sha256(artifact)
+
+
+def test_corrupt_object_is_not_served(artifact, offline):
+    sha256 = offline.ingest(artifact, settings.model_name)
+    with open(offline.object_path(sha256), "ab") as f:
+        f.write(b"tampered")
+    with pytest.raises(FileNotFoundError, match="hub download is disabled"):
+        model_loader.load_model(offline)
+
+
+def test_hub_fallback_when_enabled(artifact, offline, monkeypatch):
+    monkeypatch.setattr(settings, "model_hub_enabled", True)
+    monkeypatch.setattr(model_loader, "download_from_hub", lambda cache_dir=None: artifact)
+    loaded = model_loader.load_model(offline)
+    assert loaded.source == "hub"
+    assert model_loader.load_model(offline).source == "store"
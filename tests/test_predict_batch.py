@@ -0,0 +1,52 @@
+"""
+Tests for the batch prediction endpoint
+Invalid rows are reported in place without failing the batch, the batch size is
+capped, and every scored row matches a single /predict call
+"""
+
+import main
+from stub_model import sample_patients
+
+
+def test_mixed_rows_report_errors_in_place(api):
+    patients = sample_patients(4, seed=3)
+    rows = [
+        patients[0],
+        {**patients[1], "age": 500},
+        patients[2],
+        {key: value for key, value in patients[3].items() if key != "bmi"},
+        {**patients[3], "smoker": "Sometimes"},
+    ]
+
+    response = api.post("/predict/batch", json={"patients": rows})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 3)
+    assert [item["index"] for item in body["results"]] == [0, 1, 2, 3, 4]
+    assert [item["error"] is None for item in body["results"]] == [True, False, True, False, False]
+    assert body["results"][1]["error"].startswith("age:")
+    assert body["results"][3]["error"].startswith("bmi:")
+    assert body["results"][4]["error"].startswith("smoker:")
+    assert all(item["result"] is None for item in body["results"] if item["error"])
+
+
+def test_batch_size_limit(api):
+    patient = sample_patients(1, seed=4)[0]
+    assert api.post("/predict/batch", json={"patients": []}).json() == {"results": [], "succeeded": 0, "failed": 0}
+
+    response = api.post("/predict/batch", json={"patients": [patient] * (main.MAX_BATCH_SIZE + 1)})
+    assert response.status_code == 422
+
+
+def test_rows_match_single_predictions(api):
+    patients = sample_patients(12, seed=5)
+    batch = api.post("/predict/batch", json={"patients": patients}).json()
+    assert batch["succeeded"] == len(patients)
+
+    # Single calls must not be answered from rows the batch just cached
+    main.prediction_cache.clear()
+    for patient, item in zip(patients, batch["results"]):
+        response = api.post("/predict", json=patient)
+        assert response.status_code == 200
+        # /predict leaves out the explanation it was not asked for
+        assert {**item["result"], "explanation": None} == {"explanation": None, **response.json()}
@@ -0,0 +1,54 @@
+"""
+Tests for the NDJSON streaming endpoint
+Lines split across body chunks, invalid and oversized lines are answered
+inline and in order, and scores match /predict/batch
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import main
+from ndjson import iter_lines
+from stub_model import sample_patients
+
+
+async def pieces(body: bytes, size: int):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+async def collect(body: bytes, size: int, max_line_bytes: int = 1024):
+    return [item async for item in iter_lines(pieces(body, size), max_line_bytes)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_iter_lines_any_chunking(size):
+    body = b'{"a": 1}\n\n  \n{"b": 2}\r\n' + b"x" * 2000 + b'\n{"c": 3}'
+    assert asyncio.run(collect(body, size)) == [
+        (1, b'{"a": 1}'), (4, b'{"b": 2}\r'), (5, None), (6, b'{"c": 3}')
+    ]
+
+
+def test_stream_matches_batch_and_reports_errors_inline(api, monkeypatch):
+    monkeypatch.setattr(main.settings, "stream_chunk_size", 4)
+    patients = sample_patients(9, seed=2)
+    lines = [json.dumps(p) for p in patients[:5]]
+    lines += ["", "{not json", json.dumps({**patients[0], "age": 500}), "y" * 70000]
+    lines += [json.dumps(p) for p in patients[5:]]
+    body = "\n".join(lines).encode()
+
+    response = api.post("/predict/stream", content=pieces(body, 513))
+    assert response.headers["content-type"] == "application/x-ndjson"
+    output = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [item.get("line") for item in output[:-1]] == [1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12, 13]
+    assert "Invalid JSON" in output[5]["error"]
+    assert output[6]["error"].startswith("age:")
+    assert output[7]["error"] == "Line longer than 65536 bytes"
+    assert output[-1] == {"done": True, "succeeded": 9, "failed": 3}
+
+    batch = api.post("/predict/batch", json={"patients": patients}).json()["results"]
+    streamed = [item["result"] for item in output if "result" in item]
+    assert streamed == [item["result"] for item in batch]
@@ -0,0 +1,134 @@
+"""
+Tests for the model registry, hot reload and shadow scoring
+A promoted version must replace the serving model without failing requests that
+are in flight, and a candidate must be scored on sampled traffic without
+changing any response
+"""
+
+import asyncio
+
+import joblib
+import numpy as np
+import pytest
+
+import main
+import model_loader
+from encoder import RawFeatures
+from inference import predict
+from registry import ModelRegistry
+from settings import settings
+from shadow import ShadowScorer
+from stub_model import build_stub_model, sample_patients
+
+PATIENTS = sample_patients(16, seed=3)
+
+
+@pytest.fixture(scope="module")
+def artifacts(tmp_path_factory):
+    root = tmp_path_factory.mktemp("artifacts")
+    paths = []
+    for seed in (1, 2):
+        path = root / f"model_{seed}.pkl"
+        joblib.dump(build_stub_model(n_estimators=5, n_samples=2000, seed=seed, n_jobs=1), path)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "model_path", None)
+    monkeypatch.setattr(settings, "model_hub_enabled", False)
+    monkeypatch.setattr(settings, "model_store_dir", str(tmp_path / "store"))
+    return ModelRegistry()
+
+
+def test_publish_promote_rollback(registry, artifacts):
+    first, second = (registry.publish(path) for path in artifacts)
+    assert (first["version"], second["version"]) == (1, 2)
+    assert registry.publish(artifacts[0])["version"] == 1
+
+    registry.promote(1)
+    registry.set_candidate(2)
+    assert registry.candidate() == (2, second["sha256"])
+    registry.promote(2)
+    assert registry.serving() == (2, second["sha256"])
+    assert registry.candidate() is None
+    assert model_loader.resolve_model()[1] == second["sha256"]
+
+    registry.rollback()
+    assert registry.serving() == (1, first["sha256"])
+    with pytest.raises(ValueError, match="no version 7"):
+        registry.promote(7)
+
+
+def test_hot_reload_and_shadow(registry, artifacts, client, monkeypatch):
+    monkeypatch.setattr(settings, "explain_enabled", False)
+    monkeypatch.setattr(settings, "registry_poll_s", 0)
+    monkeypatch.setattr(settings, "shadow_sample_rate", 1.0)
+    features = RawFeatures.from_patients([main.PatientData(**patient) for patient in PATIENTS])
+    expected = {version: predict(joblib.load(path), features).probability for version, path in enumerate(artifacts, 1)}
+    registry.promote(registry.publish(artifacts[0])["version"])
+    registry.publish(artifacts[1])
+
+    async def scenario():
+        async with client.session() as session:
+            async def score():
+                response = await session.post("/predict/batch", json={"patients": PATIENTS})
+                assert response.status_code == 200
+                return response.json()["results"]
+
+            await main.load_model()
+            try:
+                assert main.model_info["version"] == 1
+                assert main.shadow is None
+
+                # Candidate: every model call is also scored on v2, responses still come from v1
+                registry.set_candidate(2)
+                await main.sync_registry()
+                assert main.shadow.version == "v2"
+                await score()
+                for _ in range(200):
+                    if main.shadow.calls:
+                        break
+                    await asyncio.sleep(0.01)
+                stats = main.shadow.stats()
+                assert stats["rows"] == len(PATIENTS)
+                assert stats["mean_abs_delta"] == pytest.approx(np.abs(expected[2] - expected[1]).mean(), abs=1e-6)
+
+                # Promotion: requests keep flowing while v2 is loaded, warmed and swapped in
+                registry.promote(2)
+                main.prediction_cache.clear()  # so the traffic really reaches the executor during the swap
+                traffic = [asyncio.create_task(score()) for _ in range(6)]
+                await main.sync_registry()
+                await asyncio.gather(*traffic)
+                assert main.model_info["version"] == 2 and main.shadow is None
+
+                # Rows scored before the swap were dropped from the cache with v1
+                return (await main.score_features(features)).probability
+            finally:
+                await main.stop_executor()
+
+    np.testing.assert_allclose(asyncio.run(scenario()), expected[2])
+    assert main.prediction_cache.fingerprint == registry.serving()[1]
+    main.model = None
+
+
+def test_shadow_burst_is_bounded_before_any_job_starts(stub_model):
+    features = RawFeatures.from_patients([main.PatientData(**patient) for patient in PATIENTS])
+    serving = predict(stub_model, features)
+
+    async def scenario():
+        scorer = ShadowScorer(stub_model, "v2", "abc123", sample_rate=1.0, max_pending=2)
+        # No task has run yet, so the candidate's executor has nothing pending
+        offered = [scorer.offer(features, serving, 0.001, "v1") for _ in range(5)]
+        assert scorer.stats()["pending"] == 2
+        for _ in range(200):
+            if not scorer.scheduled:
+                break
+            await asyncio.sleep(0.01)
+        await scorer.stop()
+        return offered, scorer.stats()
+
+    offered, stats = asyncio.run(scenario())
+    assert offered == [True, True, False, False, False]
+    assert (stats["calls"], stats["dropped"], stats["pending"]) == (2, 3, 0)
@@ -0,0 +1,182 @@
+"""
+Property tests for the vectorized risk rules
+The NumPy implementations must give exactly what the original per-patient
+branches in main.py and utils.py gave, on random and on boundary inputs
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import risk
+
+YES_NO = ["Yes", "No", "I don't know"]
+LEVELS = ["High", "Moderate", "Low", "I don't know"]
+
+# Values on and next to every threshold the rules use
+BOUNDARY_AGES = [1, 39, 40, 41, 64, 65, 66, 120]
+BOUNDARY_BMI = [10.0, 24.9, 25.0, 25.1, 29.9, 30.0, 30.1, 60.0]
+BOUNDARY_SLEEP = [0.0, 5.9, 6.0, 6.1, 24.0]
+BOUNDARY_CHOLESTEROL = [100.0, 180, 239.9, 240, 240.1, 400.0]
+BOUNDARY_RISK = [0.0, 10.0, 19.999, 20.0, 20.001, 39.999, 40.0, 40.001, 49.999, 50.0, 50.001,
+                 60.0, 60.001, 69.999, 70.0, 70.001, 82.6, 95.0, 99.0, 100.0]
+
+
+# ---- Original scalar implementations (reference) ----
+
+def reference_adjust_risk(predicted_risk, p):
+    critical_count = 0
+    if p.family_history == "Yes": critical_count += 1
+    if p.diabetes == "Yes": critical_count += 1
+    if p.hypertension == "Yes": critical_count += 1
+    if p.smoker == "Yes": critical_count += 1
+    if p.age >= 65: critical_count += 1
+    if p.cholesterol_level >= 240: critical_count += 1
+
+    protective_count = 0
+    if p.age < 40: protective_count += 1
+    if p.physical_activity == "High": protective_count += 1
+    if p.diet == "Healthy": protective_count += 1
+    if p.smoker == "No": protective_count += 1
+    if p.bmi < 25: protective_count += 1
+    if p.stress_level == "Low": protective_count += 1
+
+    adjustment_factor = 1.0
+    if critical_count >= 4 and predicted_risk < 50:
+        adjustment_factor = 1.15
+    elif critical_count >= 3 and predicted_risk < 40:
+        adjustment_factor = 1.10
+    elif protective_count >= 5 and predicted_risk > 60:
+        adjustment_factor = 0.85
+    elif protective_count >= 4 and predicted_risk > 50:
+        adjustment_factor = 0.90
+    elif critical_count >= 2 and protective_count >= 3:
+        adjustment_factor = 1.0
+
+    return min(max(predicted_risk * adjustment_factor, 10), 95)
+
+
+def reference_risk_level(adjusted_risk):
+    if adjusted_risk >= 70:
+        return "High"
+    elif adjusted_risk >= 40:
+        return "Moderate"
+    else:
+        return "Low"
+
+
+def reference_api_message(risk_pct, p):
+    if risk_pct < 40:
+        message = "🎉 Great news! Your heart health looks good. Keep up the healthy lifestyle!"
+        recs = ["✓ Continue your current healthy habits", "✓ Annual health checkups recommended"]
+    elif risk_pct < 70:
+        message = "⚠️ Moderate risk detected. Some lifestyle improvements may help."
+        recs = ["⚕️ Schedule a medical checkup soon", "📊 Monitor blood pressure and cholesterol regularly",
+                "🏃 Increase physical activity to 30+ mins daily"]
+    else:
+        message = "🚨 High risk detected. Please consult a healthcare professional immediately."
+        recs = ["🚨 URGENT: Schedule medical consultation ASAP", "💊 Take prescribed medications regularly",
+                "⚠️ Monitor symptoms: chest pain, shortness of breath"]
+    if p.smoker == "Yes": recs.append("🚭 Quit smoking - critical for heart health")
+    if p.physical_activity == "Low": recs.append("🏃‍♂️ Start with 15-min daily walks")
+    if p.diet == "Unhealthy": recs.append("🥗 Focus on fruits, vegetables, whole grains")
+    if p.stress_level == "High": recs.append("🧘 Practice stress management techniques")
+    if p.bmi >= 30: recs.append("⚖️ Weight management can reduce risk significantly")
+    if p.sleep_hours < 6: recs.append("😴 Aim for 7-9 hours of sleep nightly")
+    return message, recs
+
+
+def reference_utils_message(risk_percentage, p):
+    recs = []
+    if risk_percentage < 20:
+        message = "🎉 Great news! Your heart health looks good. Keep up the healthy lifestyle!"
+        recs += ["Continue your current healthy habits", "Regular exercise and balanced diet are key",
+                 "Annual health checkups recommended"]
+    elif risk_percentage < 50:
+        message = "⚠️ Moderate risk detected. Some lifestyle improvements may help reduce your risk."
+        recs += ["Consider scheduling a medical checkup", "Monitor your blood pressure and cholesterol regularly",
+                 "Increase physical activity to 30+ mins daily"]
+    else:
+        message = "🚨 High risk detected. Please consult a healthcare professional soon."
+        recs += ["⚕️ URGENT: Schedule a medical consultation immediately",
+                 "Monitor symptoms like chest pain, shortness of breath",
+                 "Avoid strenuous activities until cleared by doctor", "Take prescribed medications regularly"]
+    if p.smoker == "Yes": recs.append("🚭 Quit smoking - it's the single best thing for your heart")
+    if p.physical_activity == "Low": recs.append("🏃‍♂️ Start with 15-minute daily walks, gradually increase")
+    if p.diet == "Unhealthy": recs.append("🥗 Focus on fruits, vegetables, whole grains, and lean proteins")
+    if p.stress_level == "High": recs.append("🧘‍♀️ Practice stress management: meditation, yoga, or deep breathing")
+    if p.bmi >= 30: recs.append("⚖️ Weight management through diet and exercise can reduce risk")
+    if p.sleep_hours < 6: recs.append("😴 Aim for 7-9 hours of quality sleep per night")
+    if p.alcohol_consumption == "Yes": recs.append("🍷 Limit alcohol consumption to moderate levels")
+    if p.hypertension == "Yes": recs.append("💊 Keep blood pressure under control with medication and lifestyle")
+    if p.diabetes == "Yes": recs.append("🩸 Manage blood sugar levels through diet, exercise, and medication")
+    if p.cholesterol_level > 240: recs.append("📊 High cholesterol - discuss statin therapy with your doctor")
+    return message, recs
+
+
+# ---- Generators ----
+
+def random_patients(n, seed, boundary=False):
+    rng = np.random.default_rng(seed)
+
+    def pick(values):
+        return values[rng.integers(len(values))]
+
+    patients = []
+    for _ in range(n):
+        patients.append(SimpleNamespace(
+            age=int(pick(BOUNDARY_AGES)) if boundary else int(rng.integers(1, 121)),
+            bmi=float(pick(BOUNDARY_BMI)) if boundary else round(float(rng.uniform(10, 60)), 1),
+            sleep_hours=float(pick(BOUNDARY_SLEEP)) if boundary else round(float(rng.uniform(0, 24)), 1),
+            cholesterol_level=pick(BOUNDARY_CHOLESTEROL) if boundary else round(float(rng.uniform(100, 400)), 1),
+            smoker=pick(YES_NO), diabetes=pick(YES_NO), hypertension=pick(YES_NO),
+            family_history=pick(YES_NO), alcohol_consumption=pick(YES_NO),
+            physical_activity=pick(LEVELS), stress_level=pick(LEVELS),
+            diet=pick(["Healthy", "Unhealthy", "I don't know"]),
+        ))
+    risks = (rng.choice(BOUNDARY_RISK, n) if boundary else rng.uniform(0, 100, n))
+    return patients, risks
+
+
+CASES = [(seed, False) for seed in range(5)] + [(seed, True) for seed in range(5)]
+
+
+@pytest.mark.parametrize("seed,boundary", CASES)
+def test_adjust_risk_and_levels_match_reference(seed, boundary):
+    patients, risks = random_patients(2000, seed, boundary)
+    adjusted = risk.adjust_risk(risks, risk.patient_columns(patients))
+    expected = [reference_adjust_risk(r, p) for r, p in zip(risks.tolist(), patients)]
+    assert adjusted.tolist() == expected
+    assert risk.risk_levels(adjusted).tolist() == [reference_risk_level(a) for a in expected]
+
+
+@pytest.mark.parametrize("seed,boundary", CASES)
+def test_messages_match_reference(seed, boundary):
+    patients, risks = random_patients(2000, seed, boundary)
+    columns = risk.patient_columns(patients)
+    risk_pct = risks.astype(int)
+    for table, reference in [(risk.API_RECOMMENDATIONS, reference_api_message),
+                             (risk.UTILS_RECOMMENDATIONS, reference_utils_message)]:
+        expected = [reference(r, p) for r, p in zip(risk_pct.tolist(), patients)]
+        assert table.messages(risk_pct, columns) == expected
+        assert [table.message(r, p) for r, p in zip(risk_pct.tolist(), patients)] == expected
+
+
+def test_scalar_wrappers_match_reference():
+    import utils
+    from main import adjust_risk, get_risk_message, risk_level
+
+    patients, risks = random_patients(300, seed=11, boundary=True)
+    for r, p in zip(risks.tolist(), patients):
+        assert adjust_risk(r, p) == reference_adjust_risk(r, p)
+        assert risk_level(r) == reference_risk_level(r)
+        assert get_risk_message(int(r), p) == reference_api_message(int(r), p)
+        assert utils.get_risk_message(int(r), p) == reference_utils_message(int(r), p)
+
+
+def test_returned_lists_are_independent():
+    patients, _ = random_patients(2, seed=3)
+    first = risk.API_RECOMMENDATIONS.message(10, patients[0])
+    first[1].append("mutated")
+    assert "mutated" not in risk.API_RECOMMENDATIONS.message(10, patients[0])[1]
@@ -0,0 +1,120 @@
+"""
+Tests for the bulk CSV/Parquet scorer
+Results must match the per-patient API path, and interrupted runs must resume
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from encoder import CAT_FEATURES, FEATURE_NAMES
+from score_file import RESULT_COLUMNS, score_file
+from stub_model import make_training_frame
+from utils import impute_categorical
+
+CHUNK_ROWS = 100
+
+
+@pytest.fixture(scope="module")
+def export(tmp_path_factory):
+    """heart_data.csv-like export with unknown/blank answers, a bad row and extra columns"""
+    X, y = make_training_frame(450, seed=5)
+    X = X.astype({feature: object for feature in CAT_FEATURES})
+    X.loc[::7, 'Smoker'] = "I don't know"
+    X.loc[::11, 'Diet'] = None
+    X.loc[3, 'BMI'] = np.nan
+    X['Region'] = 'Urban'
+    X['Cardiac_Arrest'] = y
+    directory = tmp_path_factory.mktemp("export")
+    X.to_csv(directory / "export.csv", index=False)
+    X.to_parquet(directory / "export.parquet")
+    return directory, X
+
+
+def reference_scores(model, X: pd.DataFrame) -> np.ndarray:
+    """Adjusted risk % the way /predict computes it, one row at a time"""
+    from types import SimpleNamespace
+
+    from main import adjust_risk
+
+    adjusted = []
+    for _, row in X.iterrows():
+        answers = {f: (row[f] if isinstance(row[f], str) else "I don't know") for f in CAT_FEATURES}
+        frame = pd.DataFrame([{**row[FEATURE_NAMES].to_dict(),
+                               **{f: impute_categorical(f, answers[f]) for f in CAT_FEATURES}}])[FEATURE_NAMES]
+        probability = model.predict_proba(frame)[0, 1]
+        patient = SimpleNamespace(**{f.lower(): row[f] for f in FEATURE_NAMES})
+        patient.__dict__.update((f.lower(), answers[f]) for f in CAT_FEATURES)
+        adjusted.append(int(round(adjust_risk(probability * 100, patient))))
+    return np.array(adjusted)
+
+
+def test_csv_matches_api_path(stub_model, stub_model_path, export, tmp_path):
+    directory, X = export
+    output = tmp_path / "scored.csv"
+    summary = score_file(directory / "export.csv", output, stub_model_path, workers=0, chunk_rows=CHUNK_ROWS, messages=True)
+    result = pd.read_csv(output)
+
+    assert summary["chunks"] == 5 and len(result) == len(X)
+    assert list(result.columns[:len(X.columns)]) == list(X.columns)
+    assert result.loc[3, "error"] == "invalid BMI" and pd.isna(result.loc[3, "risk_percentage"])
+
+    # Every 3rd valid row through the (slow) per-row reference
+    rows = np.flatnonzero(result["error"].isna().to_numpy())[::3]
+    expected = reference_scores(stub_model, X.iloc[rows])
+    np.testing.assert_array_equal(result.loc[rows, "risk_percentage"].to_numpy(dtype=int), expected)
+    assert not Path(str(output) + ".parts").exists()
+
+
+def test_parquet_on_process_pool_matches_csv(stub_model_path, export, tmp_path):
+    directory, _ = export
+    score_file(directory / "export.csv", tmp_path / "a.csv", stub_model_path, workers=0, chunk_rows=CHUNK_ROWS)
+    score_file(directory / "export.parquet", tmp_path / "b.parquet", stub_model_path, workers=2, chunk_rows=CHUNK_ROWS)
+    a, b = pd.read_csv(tmp_path / "a.csv"), pd.read_parquet(tmp_path / "b.parquet")
+    pd.testing.assert_series_equal(a["risk_percentage"].astype("Int64"), b["risk_percentage"])
+    assert a["risk_category"].equals(b["risk_category"])
+
+
+def test_interrupted_run_resumes(stub_model_path, export, tmp_path):
+    directory, _ = export
+    # A blank line in the first chunk: the reader drops it, so resuming must count rows, not lines
+    lines = (directory / "export.csv").read_text().splitlines(keepends=True)
+    export_csv = tmp_path / "export.csv"
+    export_csv.write_text("".join(lines[:10] + ["\n"] + lines[10:]))
+    output = tmp_path / "scored.csv"
+    score_file(export_csv, output, stub_model_path, workers=0, chunk_rows=CHUNK_ROWS, keep_parts=True)
+    complete = output.read_bytes()
+
+    # Simulate a crash after some chunks: merged output and two parts missing
+    output.unlink()
+    parts = sorted(Path(str(output) + ".parts").glob("part-*.csv"))
+    parts[1].unlink()
+    parts[3].unlink()
+
+    summary = score_file(export_csv, output, stub_model_path, workers=0, chunk_rows=CHUNK_ROWS)
+    assert (summary["chunks_scored"], summary["chunks_resumed"]) == (2, 3)
+    assert output.read_bytes() == complete
+
+
+def test_resume_refuses_changed_settings(stub_model_path, export, tmp_path):
+    directory, _ = export
+    output = tmp_path / "scored.csv"
+    score_file(directory / "export.csv", output, stub_model_path, workers=0, chunk_rows=CHUNK_ROWS, keep_parts=True)
+    with pytest.raises(SystemExit, match="chunk_rows"):
+        score_file(directory / "export.csv", output, stub_model_path, workers=0, chunk_rows=CHUNK_ROWS * 2)
+    summary = score_file(directory / "export.csv", output, stub_model_path, workers=0, chunk_rows=CHUNK_ROWS * 2,
+                         restart=True)
+    assert summary["chunks_scored"] == 3
+
+
+def test_empty_parquet_keeps_schema(export, stub_model_path, tmp_path):
+    _, X = export
+    X.iloc[:0].to_parquet(tmp_path / "empty.parquet")
+    output = tmp_path / "scored.parquet"
+
+    summary = score_file(tmp_path / "empty.parquet", output, stub_model_path, workers=0, chunk_rows=CHUNK_ROWS)
+    result = pd.read_parquet(output)
+    assert (summary["chunks"], summary["rows_scored"], len(result)) == (1, 0, 0)
+    assert list(result.columns) == [*X.columns, *RESULT_COLUMNS]
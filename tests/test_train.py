@@ -0,0 +1,66 @@
+"""
+Tests for the headless training pipeline
+The encoded matrix is cached per CSV, and the artifact has the notebook's
+layout so every serving path can read it
+"""
+
+import joblib
+import numpy as np
+import pytest
+
+import dataset
+import importance
+import train
+from compiled_model import CompiledEnsemble
+from encoder import CAT_FEATURES, RawFeatures
+from inference import predict
+from stub_model import make_training_frame
+
+PARAMS = {"n_estimators": 8, "oob_score": False}
+
+
+@pytest.fixture(scope="module")
+def heart_csv(tmp_path_factory):
+    """Synthetic heart_data.csv: Yes/No target plus a column the notebook drops"""
+    X, y = make_training_frame(2000, seed=11)
+    frame = X.astype({feature: object for feature in CAT_FEATURES})
+    frame["Cardiac_Arrest"] = np.where(y == 1, " Yes", "No")
+    frame["Region"] = "North"
+    path = tmp_path_factory.mktemp("data") / "heart_data.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+def test_encoded_matrix_is_cached(heart_csv, tmp_path, monkeypatch):
+    first = train.train(heart_csv, tmp_path / "a.pkl", tmp_path / "cache", PARAMS, cv_jobs=1, forest_jobs=1)
+    assert not first["cache_hit"]
+
+    def no_csv(path):
+        raise AssertionError("CSV parsed despite a cached encoding")
+
+    monkeypatch.setattr(dataset, "load_dataset", no_csv)
+    second = train.train(heart_csv, tmp_path / "b.pkl", tmp_path / "cache", PARAMS, cv_jobs=2, forest_jobs=1)
+    assert second["cache_hit"]
+    # Fold fitting is deterministic whatever the parallelism
+    assert second["metrics"] == first["metrics"]
+    assert set(second["timings_s"]) == {"prepare", "fit", "evaluate", "save", "total"}
+    assert (tmp_path / "b.json").exists()
+
+
+def test_artifact_has_notebook_layout(heart_csv, tmp_path):
+    manifest = train.train(heart_csv, tmp_path / "model.pkl", None, PARAMS, cv_jobs=1, forest_jobs=1)
+    model = joblib.load(tmp_path / "model.pkl")
+    X, y = dataset.load_dataset(heart_csv)
+    _, X_test, _, y_test = dataset.split_dataset(X, y)
+
+    assert len(model.calibrated_classifiers_) == train.CV_FOLDS
+    for fold in model.calibrated_classifiers_:
+        assert list(fold.estimator.named_steps) == ["preprocessor", "classifier"]
+        assert fold.estimator[-1].n_jobs == train.RF_PARAMS["n_jobs"]
+
+    features = RawFeatures.from_frame(X_test)
+    probability = predict(model, features).probability
+    np.testing.assert_allclose(probability, model.predict_proba(X_test)[:, 1])
+    np.testing.assert_allclose(CompiledEnsemble.from_model(model).predict_scores(features).probability, probability)
+    assert importance.compute(model)["folds"] == train.CV_FOLDS
+    assert manifest["metrics"]["auc"] == dataset.evaluate(y_test, probability)["auc"]
@@ -0,0 +1,63 @@
+"""
+Tests for hyperparameter tuning
+Pareto selection, Hyperband bracket sizes, and resuming a search from its
+trial cache without refitting
+"""
+
+import numpy as np
+import pytest
+
+import train
+import tune
+from encoder import CAT_FEATURES
+from stub_model import make_training_frame
+
+
+@pytest.fixture(scope="module")
+def encoded(tmp_path_factory):
+    X, y = make_training_frame(2000, seed=12)
+    frame = X.astype({feature: object for feature in CAT_FEATURES})
+    frame["Cardiac_Arrest"] = np.where(y == 1, "Yes", "No")
+    path = tmp_path_factory.mktemp("data") / "heart_data.csv"
+    frame.to_csv(path, index=False)
+    return train.encode_dataset(path)[0]
+
+
+def test_pareto_front_and_select():
+    trials = [
+        {"auc": 0.90, "p99_ms": 10.0},   # fast
+        {"auc": 0.95, "p99_ms": 50.0},   # accurate
+        {"auc": 0.89, "p99_ms": 20.0},   # dominated by the first
+        {"auc": 0.93, "p99_ms": 30.0},   # trade-off
+        {"auc": 0.93, "p99_ms": 40.0},   # dominated by the fourth
+    ]
+    assert tune.pareto_front(trials) == [0, 1, 3]
+    assert tune.select(trials, 4) == [trials[1], trials[3], trials[0], trials[4]]
+
+
+def test_hyperband_brackets():
+    brackets = tune.hyperband_brackets(max_rows=2700, min_rows=100, eta=3)
+    assert brackets == [(27, 100), (12, 300), (6, 900), (4, 2700)]
+
+
+def test_search_resumes_from_cache(encoded, tmp_path, monkeypatch):
+    monkeypatch.setattr(tune, "SEARCH_SPACE", {
+        "n_estimators": [3, 5, 8],
+        "max_depth": [4, 8, None],
+        "min_samples_leaf": [1, 5],
+    })
+    options = dict(candidates=6, eta=2, min_rows=300, n_jobs=1, latency_samples=5, cache_dir=tmp_path)
+    first = tune.tune(encoded, **options)
+    assert first["trials_replayed"] == 0
+    assert any(trial["pareto"] for trial in first["results"])
+    assert all(trial["rows"] == 1280 for trial in first["results"])
+
+    def refit(*args):
+        raise AssertionError("trial refitted despite the cache")
+
+    monkeypatch.setattr(tune, "run_trial", refit)
+    second = tune.tune(encoded, **options)
+    assert second["results"] == first["results"]
+    assert second["trials_replayed"] > len(first["results"])
+    assert tune.recommend(second, max_p99_ms=0.0) is None
+    assert tune.recommend(second)["pareto"]